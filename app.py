@@ -1,20 +1,256 @@
+import atexit
+import functools
+import hashlib
+import hmac
+import inspect
+import json
 import os
+import tempfile
 import uuid
+import click
 import requests
-from flask import Flask, render_template, request, redirect, url_for, session, send_file, jsonify
+from flask import (
+    Flask, Request, Response, g, render_template, request, redirect, url_for, session, send_file, jsonify,
+    stream_with_context
+)
 from werkzeug.utils import secure_filename
-from github import Github, GithubException
 from config import Config
 from utils.resume_parser import ResumeParser
 from utils.portfolio_generator import PortfolioGenerator
+from utils.prompt_builder import PromptBuilder
+from utils.pipeline import RENDERERS, PortfolioPipeline
+from utils.batch import BatchError, BatchGenerator, open_zip_items, read_directory, read_zip
+from utils.job_queue import JobQueue, QueueFullError
+from utils.parser_pool import ParserPool
+from utils.parse_cache import ParseCache
+from utils.pii_scrubber import PiiScrubber
+from utils.generation_cache import GenerationCache
+from utils.theme_applier import ThemeApplier
+from utils.preview_store import PreviewStore, precompress
+from utils.local_renderer import LocalRenderer
+from utils.llm_router import LlmBackend, LlmRouter
+from utils.github_deployer import GitHubClientCache, GitHubError, GitHubPagesDeployer
+from utils.rate_limit import MemoryRateLimitBackend, RateLimiter, RateLimitExceeded, RedisRateLimitBackend
+from utils.storage import LocalStorage, S3Storage, ShardedStorage, StorageError
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, configure_default_metrics
+from utils.event_loop import EventLoopThread
+from utils.http_client import (
+    AsyncHttpClient, HttpClient, configure_default_async_client, configure_default_client
+)
+
+
+class UploadRequest(Request):
+    """Request whose file uploads stay in memory up to UPLOAD_SPOOL_MAX_BYTES; only larger ones spool to disk"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_MAX_BYTES, mode='rb+')
+
+
+# Every async view runs on this one long-lived loop, so concurrent requests await the
+# network side by side and share the async HTTP client's connection pool
+event_loop = EventLoopThread('async-views')
+
+
+class PortfolioApp(Flask):
+    """Flask app whose async views run on the shared event loop instead of a new loop per request"""
+
+    def async_to_sync(self, func):
+        return lambda *args, **kwargs: event_loop.run(func(*args, **kwargs))
+
 
 # Initialize Flask app
-app = Flask(__name__)
+app = PortfolioApp(__name__)
+app.request_class = UploadRequest
 app.config.from_object(Config)
 
-# Ensure required directories exist
-os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(Config.GENERATED_FOLDER, exist_ok=True)
+# Stage timings, upstream status codes and LLM token counts reported by the hot paths,
+# optionally traced as OpenTelemetry spans; scraped at /metrics
+metrics = Metrics(enabled=Config.METRICS_ENABLED, tracing=Config.TRACING_ENABLED)
+configure_default_metrics(metrics)
+
+# Pooled, retrying HTTP client shared by the Perplexity and GitHub integrations
+http_client = HttpClient(
+    pool_size=Config.HTTP_POOL_SIZE,
+    max_retries=Config.HTTP_MAX_RETRIES,
+    backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+    failure_threshold=Config.HTTP_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=Config.HTTP_CIRCUIT_RESET_SECONDS
+)
+configure_default_client(http_client)
+
+# Same policy for the asyncio pipeline; one connection pool per event loop
+async_http_client = AsyncHttpClient(
+    pool_size=Config.HTTP_POOL_SIZE,
+    max_retries=Config.HTTP_MAX_RETRIES,
+    backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+    failure_threshold=Config.HTTP_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=Config.HTTP_CIRCUIT_RESET_SECONDS
+)
+configure_default_async_client(async_http_client)
+event_loop.add_closer(async_http_client.aclose)
+atexit.register(event_loop.shutdown)
+
+# One GitHub client per access token, so repeat deploys reuse cached repo
+# metadata and revalidate with conditional requests
+github_clients = GitHubClientCache(
+    http_client,
+    Config.GITHUB_API_URL,
+    timeout=Config.GITHUB_TIMEOUT_SECONDS,
+    metadata_ttl=Config.GITHUB_METADATA_TTL_SECONDS
+)
+
+# Latency-ranked, hedged routing across the configured LLM backends; shared so
+# latency history and hedge counters survive between requests
+llm_router = LlmRouter(
+    [LlmBackend(backend['name'], backend['api_url'], backend['api_key'], backend['model'])
+     for backend in Config.LLM_BACKENDS],
+    http_client,
+    async_http_client,
+    hedge=Config.LLM_HEDGE_ENABLED,
+    min_hedge_delay=Config.LLM_HEDGE_MIN_DELAY_SECONDS,
+    default_hedge_delay=Config.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+)
+
+# Bounded worker pool for portfolio generation jobs
+job_queue = JobQueue(
+    max_workers=Config.JOB_WORKERS,
+    max_pending=Config.JOB_MAX_PENDING,
+    retention=Config.JOB_RETENTION_SECONDS
+)
+
+# Admission control: refuse over-eager users and a saturated server up front
+# instead of letting requests pile up inside Flask workers
+rate_limiter = RateLimiter(
+    RedisRateLimitBackend.from_url(Config.RATE_LIMIT_REDIS_URL) if Config.RATE_LIMIT_REDIS_URL
+    else MemoryRateLimitBackend(),
+    limits={
+        'generate': (Config.GENERATE_RATE_PER_MINUTE, Config.GENERATE_BURST),
+        'deploy': (Config.DEPLOY_RATE_PER_MINUTE, Config.DEPLOY_BURST)
+    },
+    max_in_flight=Config.GENERATION_MAX_IN_FLIGHT,
+    busy_retry_after=Config.BUSY_RETRY_AFTER_SECONDS
+)
+
+# Resume parsing runs in recycled worker processes with per-document limits
+parser_pool = ParserPool(
+    max_workers=Config.PARSE_WORKERS,
+    timeout=Config.PARSE_TIMEOUT_SECONDS,
+    memory_limit_mb=Config.PARSE_MEMORY_LIMIT_MB,
+    max_tasks_per_child=Config.PARSE_MAX_TASKS_PER_CHILD,
+    parse_func=functools.partial(
+        ResumeParser.parse,
+        max_pages=Config.PARSE_MAX_PAGES,
+        max_chars=Config.PARSE_MAX_CHARS,
+        scrubber=PiiScrubber.with_rules(Config.PII_EXTRA_RULES),
+        prompt_sections=Config.PROMPT_SECTIONS,
+        max_section_chars=Config.PROMPT_SECTION_MAX_CHARS
+    )
+)
+
+# Parse results by upload content hash: re-submitted resumes skip the worker pool entirely
+parse_cache = ParseCache(
+    parser_pool,
+    max_entries=Config.PARSE_CACHE_MAX_ENTRIES,
+    disk=LocalStorage(
+        Config.PARSE_CACHE_DIR,
+        ttl=Config.PARSE_CACHE_TTL_SECONDS,
+        quota_bytes=Config.PARSE_CACHE_DISK_QUOTA_MB * 1024 * 1024,
+        gc_interval=Config.STORAGE_GC_INTERVAL_SECONDS
+    ) if Config.PARSE_CACHE_DISK_QUOTA_MB else None,
+    fingerprint=json.dumps([Config.PARSE_MAX_PAGES, Config.PARSE_MAX_CHARS, sorted(Config.PII_EXTRA_RULES)]),
+    prompt_sections=Config.PROMPT_SECTIONS,
+    max_section_chars=Config.PROMPT_SECTION_MAX_CHARS
+)
+
+# Generated HTML shared across requests, keyed by resume, theme, model and prompt
+generation_cache = GenerationCache(
+    Config.GENERATION_CACHE_DIR,
+    max_entries=Config.GENERATION_CACHE_MAX_ENTRIES,
+    ttl=Config.GENERATION_CACHE_TTL_SECONDS
+)
+
+# Hot previews served from memory; cold ones straight from disk
+preview_store = PreviewStore(
+    max_entries=Config.PREVIEW_CACHE_MAX_ENTRIES,
+    max_bytes=Config.PREVIEW_CACHE_MAX_BYTES
+)
+
+
+def _create_storage():
+    """Storage for generated portfolios, chosen by STORAGE_BACKEND"""
+    lifecycle = {
+        'ttl': Config.GENERATED_TTL_SECONDS,
+        'quota_bytes': Config.GENERATED_QUOTA_MB * 1024 * 1024,
+        'gc_interval': Config.STORAGE_GC_INTERVAL_SECONDS
+    }
+    if Config.STORAGE_BACKEND == 's3':
+        cache = LocalStorage(Config.GENERATED_FOLDER, ttl=Config.GENERATED_TTL_SECONDS,
+                             quota_bytes=Config.S3_CACHE_QUOTA_MB * 1024 * 1024,
+                             gc_interval=Config.STORAGE_GC_INTERVAL_SECONDS)
+        return S3Storage(Config.S3_ENDPOINT_URL, Config.S3_BUCKET, Config.S3_ACCESS_KEY, Config.S3_SECRET_KEY,
+                         cache, region=Config.S3_REGION, prefix=Config.S3_PREFIX, http_client=http_client,
+                         on_fetch=precompress, **lifecycle)
+    if Config.STORAGE_BACKEND == 'sharded':
+        return ShardedStorage(Config.GENERATED_FOLDER, **lifecycle)
+    return LocalStorage(Config.GENERATED_FOLDER, **lifecycle)
+
+
+# Generated portfolios, expired and kept under quota by garbage collection
+portfolio_storage = _create_storage()
+
+# Uploads too large to parse from memory, and batch archives awaiting their job, are copied
+# here and deleted once parsed; collection removes any a crashed request left behind
+upload_storage = LocalStorage(
+    Config.UPLOAD_FOLDER,
+    ttl=Config.UPLOAD_TTL_SECONDS,
+    quota_bytes=Config.UPLOAD_QUOTA_MB * 1024 * 1024,
+    gc_interval=Config.STORAGE_GC_INTERVAL_SECONDS
+)
+
+# Jinja renderer for the no-LLM fast path and for fallback when the LLM fails
+local_renderer = LocalRenderer()
+
+
+def _collect_metrics(m):
+    """Copy the counters kept by caches, queues and storage into the metrics registry at scrape time"""
+    cache_hits = m.counter('cache_hits_total', 'Cache hits', ('cache',))
+    cache_misses = m.counter('cache_misses_total', 'Cache misses', ('cache',))
+    cache_hit_ratio = m.gauge('cache_hit_ratio', 'Share of lookups served from the cache', ('cache',))
+
+    generation = generation_cache.stats()
+    parse = parse_cache.stats()
+    counts = {
+        'generation': (generation['hits'], generation['misses']),
+        'parse': (parse['memory_hits'] + parse['disk_hits'], parse['misses']),
+        'preview': (preview_store.hits, preview_store.misses)
+    }
+    for cache, (hits, misses) in counts.items():
+        cache_hits.set(hits, cache=cache)
+        cache_misses.set(misses, cache=cache)
+        cache_hit_ratio.set(hits / (hits + misses) if hits + misses else 0.0, cache=cache)
+
+    m.gauge('jobs_pending', 'Background jobs queued or running').set(job_queue.pending_count())
+    m.gauge('generations_in_flight', 'Generations holding an admission slot').set(rate_limiter.in_flight())
+
+    router = llm_router.stats()
+    m.counter('llm_hedges_total', 'Hedged LLM requests sent').set(router['hedges'])
+    m.counter('llm_hedge_wins_total', 'Hedged LLM requests that answered first').set(router['hedge_wins'])
+    m.counter('llm_failovers_total', 'LLM requests resent after the primary failed fast').set(router['failovers'])
+    healthy = m.gauge('llm_backend_healthy', 'Whether an LLM backend is taking traffic', ('backend',))
+    for backend in router['backends']:
+        healthy.set(int(backend['healthy']), backend=backend['name'])
+
+    usage = m.gauge('storage_usage_bytes', 'Bytes held by local storage', ('storage',))
+    collected = m.counter('storage_collected_total', 'Files removed by storage collection', ('storage',))
+    for storage, stats in (('portfolios', portfolio_storage.stats()), ('uploads', upload_storage.stats())):
+        # S3 storage reports the usage of its local cache; collection counts objects removed from the bucket
+        local = stats.get('cache', stats)
+        if local['usage_bytes'] is not None:  # Unknown until the first collection has walked the tree
+            usage.set(local['usage_bytes'], storage=storage)
+        collected.set(stats['collected'], storage=storage)
+
+
+metrics.add_collector(_collect_metrics)
 
 # Validate configuration on startup
 try:
@@ -65,16 +301,20 @@ def github_callback():
     if not code:
         return render_template('login.html', error='Authentication failed. Please try again.')
 
-    # Exchange code for access token
-    token_response = requests.post(
-        Config.GITHUB_TOKEN_URL,
-        headers={'Accept': 'application/json'},
-        data={
-            'client_id': Config.GITHUB_CLIENT_ID,
-            'client_secret': Config.GITHUB_CLIENT_SECRET,
-            'code': code
-        }
-    )
+    try:
+        # Exchange code for access token
+        token_response = http_client.post(
+            Config.GITHUB_TOKEN_URL,
+            headers={'Accept': 'application/json'},
+            data={
+                'client_id': Config.GITHUB_CLIENT_ID,
+                'client_secret': Config.GITHUB_CLIENT_SECRET,
+                'code': code
+            },
+            timeout=Config.GITHUB_TIMEOUT_SECONDS
+        )
+    except requests.exceptions.RequestException:
+        return render_template('login.html', error='GitHub is unavailable. Please try again later.')
 
     if token_response.status_code != 200:
         return render_template('login.html', error='Failed to authenticate with GitHub.')
@@ -85,11 +325,15 @@ def github_callback():
     if not access_token:
         return render_template('login.html', error='Failed to obtain access token.')
 
-    # Get user information
-    user_response = requests.get(
-        Config.GITHUB_USER_API_URL,
-        headers={'Authorization': f'token {access_token}'}
-    )
+    try:
+        # Get user information
+        user_response = http_client.get(
+            Config.GITHUB_USER_API_URL,
+            headers={'Authorization': f'token {access_token}'},
+            timeout=Config.GITHUB_TIMEOUT_SECONDS
+        )
+    except requests.exceptions.RequestException:
+        return render_template('login.html', error='GitHub is unavailable. Please try again later.')
 
     if user_response.status_code != 200:
         return render_template('login.html', error='Failed to fetch user information.')
@@ -128,30 +372,30 @@ def upload():
     return render_template(
         'upload.html',
         user=session['user'],
-        themes=Config.COLOR_THEMES
+        themes=Config.COLOR_THEMES,
+        default_renderer=Config.DEFAULT_RENDERER
     )
 
 
-@app.route('/generate', methods=['POST'])
-def generate():
-    """Generate portfolio from uploaded resume"""
-    if 'user' not in session:
-        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
-
+def _get_resume_upload():
+    """
+    Validate the uploaded resume and selected theme.
+    Returns (file, theme, None) or (None, None, error_response)
+    """
     # Check if file was uploaded
     if 'resume' not in request.files:
-        return jsonify({'success': False, 'error': 'No file uploaded'}), 400
+        return None, None, (jsonify({'success': False, 'error': 'No file uploaded'}), 400)
 
     file = request.files['resume']
 
     if not file.filename:
-        return jsonify({'success': False, 'error': 'No file selected'}), 400
+        return None, None, (jsonify({'success': False, 'error': 'No file selected'}), 400)
 
     if not Config.allowed_file(file.filename):
-        return jsonify({
+        return None, None, (jsonify({
             'success': False,
             'error': 'Invalid file format. Please upload PDF or DOCX file.'
-        }), 400
+        }), 400)
 
     # Get selected theme
     theme = request.form.get('theme', 'professional-blue')
@@ -159,80 +403,367 @@ def generate():
     if theme not in Config.COLOR_THEMES:
         theme = 'professional-blue'
 
-    try:
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(Config.UPLOAD_FOLDER, unique_filename)
-        file.save(file_path)
-
-        # Parse resume
-        parsed_data = ResumeParser.parse(file_path)
-
-        if not parsed_data['has_content']:
-            os.remove(file_path)
-            return jsonify({
-                'success': False,
-                'error': 'Unable to extract content from resume.'
-            }), 400
-
-        # Generate portfolio using filtered content
-        generator = PortfolioGenerator(
-            Config.PERPLEXITY_API_KEY,
-            Config.PERPLEXITY_API_URL,
-            Config.PERPLEXITY_MODEL
-        )
+    return file, theme, None
+
+
+def _read_upload(file):
+    """
+    Parser input for the uploaded resume: its bytes while it fits in memory,
+    otherwise the path of a copy in upload storage (parser workers cannot
+    open the spooled temporary file). Returns (source, upload_name), where
+    upload_name is None for in-memory uploads.
+    """
+    stream = file.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+
+    if size <= Config.UPLOAD_SPOOL_MAX_BYTES:
+        return stream.read(), None
+
+    filename = secure_filename(file.filename)
+    upload_name = f"{uuid.uuid4()}_{filename}"
+    file.save(upload_storage.path(upload_name))
+    upload_storage.commit(upload_name)
+    return upload_storage.path(upload_name), upload_name
+
+
+def _discard_upload(upload_name):
+    """Delete an upload copied to disk by _read_upload; in-memory uploads need nothing"""
+    if upload_name is not None:
+        upload_storage.delete(upload_name)
+
+
+def _create_generator():
+    return PortfolioGenerator(
+        Config.PERPLEXITY_API_KEY,
+        Config.PERPLEXITY_API_URL,
+        Config.PERPLEXITY_MODEL,
+        cache=generation_cache,
+        http_client=http_client,
+        async_http_client=async_http_client,
+        prompt_builder=PromptBuilder(Config.PROMPT_TOKEN_BUDGET),
+        timeout=Config.LLM_TIMEOUT_SECONDS,
+        router=llm_router,
+        optimize_html=Config.HTML_OPTIMIZE
+    )
 
-        # Get the color theme dictionary
-        color_theme = Config.COLOR_THEMES.get(theme, Config.COLOR_THEMES['professional-blue'])
 
-        result = generator.generate_portfolio(
-            parsed_data['filtered_text'],
-            color_theme
-        )
+def _create_pipeline():
+    return PortfolioPipeline(
+        _create_generator(),
+        portfolio_storage,
+        Config.COLOR_THEMES,
+        parser=parse_cache,
+        local_renderer=local_renderer,
+        fallback=Config.LOCAL_RENDER_FALLBACK
+    )
 
-        if not result['success']:
-            os.remove(file_path)
-            return jsonify({
-                'success': False,
-                'error': result.get('error', 'Failed to generate portfolio')
-            }), 500
 
-        # Save generated portfolio
-        portfolio_filename = f"{uuid.uuid4()}_portfolio.html"
-        portfolio_path = os.path.join(Config.GENERATED_FOLDER, portfolio_filename)
+def rate_limited(action, generation=False):
+    """
+    Refuse the request before it does any work once the user is over their
+    rate for action (429) or, for generations, every slot is busy (503).
+    The generation slot is released when the response closes, unless the
+    view takes it out of g.generation_slot to release it itself.
+    """
+    def admit():
+        if 'user' not in session:
+            return
+        rate_limiter.check(session['user']['id'], action)
+        if generation:
+            g.generation_slot = rate_limiter.acquire()
+
+    def release_slot():
+        slot = g.pop('generation_slot', None)
+        if slot is not None:
+            slot.release()
+
+    def finish(rv):
+        slot = g.pop('generation_slot', None)
+        if slot is None:
+            return rv
+        response = app.make_response(rv)
+        # Streamed responses close only after the last event is sent
+        response.call_on_close(slot.release)
+        return response
+
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                admit()
+                try:
+                    rv = await view(*args, **kwargs)
+                except BaseException:
+                    release_slot()
+                    raise
+                return finish(rv)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            admit()
+            try:
+                rv = view(*args, **kwargs)
+            except BaseException:
+                release_slot()
+                raise
+            return finish(rv)
+        return wrapper
+    return decorator
 
-        if not generator.save_portfolio(result['html'], portfolio_path):
-            os.remove(file_path)
-            return jsonify({
-                'success': False,
-                'error': 'Failed to save portfolio'
-            }), 500
 
-        # Clean up uploaded file
-        os.remove(file_path)
+def _get_renderer():
+    """Renderer chosen for this request: 'llm', 'structured' (JSON content, server-rendered) or 'local' (no API call)"""
+    renderer = request.form.get('renderer', Config.DEFAULT_RENDERER)
+    return renderer if renderer in RENDERERS else Config.DEFAULT_RENDERER
 
-        # Store portfolio info in session
-        session['portfolio'] = {
-            'filename': portfolio_filename,
-            'path': portfolio_path,
-            'theme': theme
-        }
 
-        return jsonify({
-            'success': True,
-            'redirect': url_for('result')
-        })
+@app.route('/generate', methods=['POST'])
+@rate_limited('generate', generation=True)
+def generate():
+    """Enqueue portfolio generation for the uploaded resume and return a job id"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    file, theme, error_response = _get_resume_upload()
+
+    if error_response:
+        return error_response
+
+    # Read the upload (spooled to disk only if large); the background job discards it when done
+    source, upload_name = _read_upload(file)
+
+    # The slot is held until the background job finishes, not just this response
+    slot = g.pop('generation_slot', None)
+    try:
+        job = job_queue.submit(session['user']['id'], 'generate', _generate_job, source, upload_name, theme,
+                               _get_renderer(), slot=slot)
+    except QueueFullError as e:
+        _discard_upload(upload_name)
+        if slot is not None:
+            slot.release()
+        return jsonify({'success': False, 'error': str(e)}), 503
+
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': url_for('job_status', job_id=job.id)
+    }), 202
+
+
+@app.route('/generate/stream', methods=['POST'])
+@rate_limited('generate', generation=True)
+def generate_stream():
+    """Generate portfolio and stream the HTML to the browser as Server-Sent Events"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
 
+    file, theme, error_response = _get_resume_upload()
+
+    if error_response:
+        return error_response
+
+    renderer = _get_renderer()
+    source, upload_name = _read_upload(file)
+    pipeline = _create_pipeline()
+
+    try:
+        parsed_data = pipeline.parse(source)
     except Exception as e:
-        # Clean up files if they exist
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
+        return jsonify({'success': False, 'error': f'Error processing resume: {str(e)}'}), 500
+    finally:
+        _discard_upload(upload_name)
 
+    if not parsed_data['has_content']:
         return jsonify({
             'success': False,
-            'error': f'Error processing resume: {str(e)}'
-        }), 500
+            'error': 'Unable to extract content from resume.'
+        }), 400
+
+    try:
+        # Tracked as a job so the client can claim the result through /jobs/<id>/result
+        job = job_queue.track(session['user']['id'], 'generate')
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+
+    portfolio_filename = f"{uuid.uuid4()}_{theme}_portfolio.html"
+    portfolio_path = portfolio_storage.path(portfolio_filename)
+    generator = pipeline.generator
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def events():
+        job.set_stage('generating')
+        yield sse('stage', {'stage': 'generating'})
+
+        outcome = {'success': False, 'error': 'Generation ended unexpectedly'}
+        try:
+            rendered = None
+            if renderer == 'llm':
+                for kind, payload in generator.stream_portfolio(
+                        parsed_data['prompt_text'], Config.COLOR_THEMES[theme], portfolio_path):
+                    if kind == 'chunk':
+                        yield sse('chunk', {'html': payload})
+                    else:
+                        outcome = payload
+                if not outcome['success']:
+                    rendered = pipeline.apply_fallback(outcome, parsed_data, theme, renderer)
+            else:
+                # Structured and local pages are built server-side in one piece
+                rendered = pipeline.generate(parsed_data, theme, renderer)
+
+            if rendered is not None:
+                if rendered['success'] and not generator.save_portfolio(rendered['html'], portfolio_path):
+                    rendered = {'success': False, 'error': 'Failed to save portfolio'}
+                if rendered['success']:
+                    # Replaces whatever partial page was streamed before the LLM failed
+                    yield sse('replace', {'html': rendered['html']})
+                outcome = rendered
+
+            if outcome['success']:
+                try:
+                    portfolio_storage.commit(portfolio_filename)
+                except StorageError as e:
+                    outcome = {'success': False, 'error': f'Failed to store portfolio: {str(e)}'}
+        finally:
+            if outcome['success']:
+                job.set_stage('saved')
+                job.finish('completed', result={
+                    'success': True,
+                    'filename': portfolio_filename,
+                    'path': portfolio_path,
+                    'theme': theme,
+                    'variants': {theme: portfolio_filename},
+                    'prompt_tokens': outcome.get('prompt_tokens'),
+                    'bytes_saved': outcome.get('bytes_saved', 0),
+                    'renderer': outcome.get('renderer', 'llm')
+                })
+            else:
+                job.finish('failed', error=outcome['error'])
+
+        if outcome['success']:
+            yield sse('done', {'job_id': job.id, 'result_url': url_for('job_result', job_id=job.id)})
+        else:
+            yield sse('error', {'error': outcome['error']})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/generate/async', methods=['POST'])
+@rate_limited('generate', generation=True)
+async def generate_async():
+    """
+    Generate portfolio on the asyncio pipeline and respond when it is ready.
+    The view runs on the shared event loop, where the LLM calls of all
+    concurrent requests wait on the network together.
+    """
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    file, theme, error_response = _get_resume_upload()
+
+    if error_response:
+        return error_response
+
+    renderer = _get_renderer()
+    source, upload_name = _read_upload(file)
+
+    try:
+        result = await _create_pipeline().arun(source, theme, renderer=renderer)
+    finally:
+        _discard_upload(upload_name)
+
+    if not result['success']:
+        return jsonify({'success': False, 'error': result['error']}), 500
+
+    # Store portfolio info in session
+    session['portfolio'] = {
+        'filename': result['filename'],
+        'path': result['path'],
+        'theme': theme,
+        'variants': result['variants']
+    }
+
+    return jsonify({
+        'success': True,
+        'redirect': url_for('result')
+    })
+
+
+def _generate_job(job, source, upload_name, theme, renderer='llm', slot=None):
+    """Background job: parse the uploaded resume and generate the portfolio"""
+    try:
+        result = _create_pipeline().run(source, theme, progress=job.set_stage, renderer=renderer)
+        result['theme'] = theme
+        return result
+    finally:
+        if slot is not None:
+            slot.release()
+        # Clean up uploaded file
+        _discard_upload(upload_name)
+
+
+# ============================================================================
+# ROUTES - Background Jobs
+# ============================================================================
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report status and current stage of a background job"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    job = job_queue.get(job_id, owner=session['user']['id'])
+
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Return the outcome of a finished background job"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    job = job_queue.get(job_id, owner=session['user']['id'])
+
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    if not job.finished:
+        return jsonify({'success': False, 'status': job.status, 'stage': job.stage}), 202
+
+    if job.status == 'failed':
+        return jsonify({'success': False, 'error': job.error or 'Job failed'}), 500
+
+    if job.kind == 'deploy':
+        return jsonify(dict(job.result, success=True))
+
+    if job.kind == 'batch':
+        return jsonify(dict(job.result, success=True,
+                            download_url=url_for('batch_download', filename=job.result['filename'])))
+
+    # Store portfolio info in session
+    session['portfolio'] = {
+        'filename': job.result['filename'],
+        'path': job.result['path'],
+        'theme': job.result['theme'],
+        'variants': job.result['variants']
+    }
+
+    return jsonify({
+        'success': True,
+        'redirect': url_for('result')
+    })
 
 
 @app.route('/result')
@@ -247,26 +778,90 @@ def result():
     return render_template(
         'result.html',
         user=session['user'],
-        portfolio=session['portfolio']
+        portfolio=session['portfolio'],
+        themes=Config.COLOR_THEMES
     )
 
 
+@app.route('/retheme/<filename>', methods=['POST'])
+def retheme(filename):
+    """Switch an existing portfolio to another colour theme without regenerating it"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    theme = request.form.get('theme') or (request.get_json(silent=True) or {}).get('theme')
+
+    if theme not in Config.COLOR_THEMES:
+        return jsonify({'success': False, 'error': 'Unknown theme'}), 400
+
+    file_path = portfolio_storage.local_path(filename)
+
+    if file_path is None:
+        return jsonify({'success': False, 'error': 'Portfolio not found'}), 404
+
+    portfolio = session.get('portfolio', {})
+    variants = portfolio.get('variants', {}) if filename in portfolio.get('variants', {}).values() else {}
+    themed_filename = variants.get(theme)
+
+    if not themed_filename or portfolio_storage.local_path(themed_filename) is None:
+        # No pre-rendered variant: re-skin the existing document
+        with open(file_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+
+        themed_filename = f"{uuid.uuid4()}_{theme}_portfolio.html"
+
+        try:
+            themed_path = portfolio_storage.save(
+                themed_filename, ThemeApplier.apply(html_content, Config.COLOR_THEMES[theme]).encode('utf-8')
+            )
+        except StorageError as e:
+            return jsonify({'success': False, 'error': f'Failed to store portfolio: {str(e)}'}), 500
+        precompress(themed_path)
+
+    if variants:
+        variants[theme] = themed_filename
+        session['portfolio'] = {
+            'filename': themed_filename,
+            'path': portfolio_storage.path(themed_filename),
+            'theme': theme,
+            'variants': variants
+        }
+
+    return jsonify({
+        'success': True,
+        'filename': themed_filename,
+        'theme': theme,
+        'preview_url': url_for('preview', filename=themed_filename)
+    })
+
+
 @app.route('/preview/<filename>')
 def preview(filename):
     """Preview generated portfolio"""
     if 'user' not in session:
         return redirect(url_for('login'))
 
-    file_path = os.path.join(Config.GENERATED_FOLDER, filename)
+    file_path = portfolio_storage.local_path(filename)
+    preview_file = preview_store.get(file_path, request.headers.get('Accept-Encoding', '')) if file_path else None
 
-    if not os.path.exists(file_path):
+    if preview_file is None:
         return "Portfolio not found", 404
 
-    # Read and return HTML content
-    with open(file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    if preview_file.body is not None:
+        response = Response(preview_file.body, mimetype='text/html')
+        response.set_etag(preview_file.etag)
+    else:
+        # Streamed from disk, through the server's zero-copy file wrapper where available
+        response = send_file(preview_file.file_path, mimetype='text/html', etag=preview_file.etag,
+                             conditional=False, max_age=None)
 
-    return html_content
+    if preview_file.encoding:
+        response.headers['Content-Encoding'] = preview_file.encoding
+    response.vary.add('Accept-Encoding')
+    # Revalidate on every load; unchanged previews come back as an empty 304
+    response.cache_control.no_cache = True
+    response.cache_control.private = True
+    return response.make_conditional(request)
 
 
 @app.route('/download/<filename>')
@@ -275,9 +870,9 @@ def download(filename):
     if 'user' not in session:
         return redirect(url_for('login'))
 
-    file_path = os.path.join(Config.GENERATED_FOLDER, filename)
+    file_path = portfolio_storage.local_path(filename)
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         return "Portfolio not found", 404
 
     return send_file(
@@ -289,108 +884,212 @@ def download(filename):
 
 
 @app.route('/deploy/<filename>', methods=['POST'])
+@rate_limited('deploy')
 def deploy(filename):
-    """Deploy portfolio to GitHub Pages"""
+    """Enqueue deployment of the portfolio to GitHub Pages and return a job id"""
     if 'user' not in session:
         return jsonify({'success': False, 'error': 'Not authenticated'}), 401
 
-    file_path = os.path.join(Config.GENERATED_FOLDER, filename)
+    file_path = portfolio_storage.local_path(filename)
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         return jsonify({'success': False, 'error': 'Portfolio not found'}), 404
 
+    # Read the portfolio HTML content
+    with open(file_path, 'r', encoding='utf-8') as f:
+        html_content = f.read()
+
+    # Identical content for the same user coalesces onto the deploy already in flight
+    content_hash = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+    user = session['user']
+
     try:
-        # Get user's access token
-        access_token = session['user']['access_token']
-        username = session['user']['username']
+        job = job_queue.submit_once(user['id'], 'deploy', content_hash, _deploy_job,
+                                    user['username'], user['access_token'], html_content)
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
 
-        # Initialize GitHub client
-        g = Github(access_token)
-        user = g.get_user()
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': url_for('job_status', job_id=job.id),
+        'result_url': url_for('job_result', job_id=job.id)
+    }), 202
 
-        # Repository name for GitHub Pages
-        repo_name = f"{username}.github.io"
 
-        # Read the portfolio HTML content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+def _deploy_job(job, username, access_token, html_content):
+    """Background job: commit the portfolio to the user's GitHub Pages repository"""
+    # Repository name for GitHub Pages
+    repo_name = f"{username}.github.io"
 
-        # Check if repository exists
-        try:
-            repo = user.get_repo(repo_name)
-            # Repository exists, update index.html
-            try:
-                # Try to get existing index.html
-                contents = repo.get_contents("index.html")
-                repo.update_file(
-                    "index.html",
-                    "Update portfolio via Resume to Portfolio app",
-                    html_content,
-                    contents.sha,
-                    branch="main"
-                )
-                message = "Portfolio updated successfully"
-            except GithubException:
-                # File doesn't exist, create it
-                repo.create_file(
-                    "index.html",
-                    "Deploy portfolio via Resume to Portfolio app",
-                    html_content,
-                    branch="main"
-                )
-                message = "Portfolio deployed successfully"
-
-        except GithubException as e:
-            if e.status == 404:
-                # Repository doesn't exist, create it
-                repo = user.create_repo(
-                    repo_name,
-                    description="Personal portfolio website generated by Resume to Portfolio",
-                    homepage=f"https://{repo_name}",
-                    has_issues=False,
-                    has_wiki=False,
-                    has_projects=False,
-                    auto_init=True
-                )
-
-                # Wait a moment for repo initialization
-                import time
-                time.sleep(2)
-
-                # Create index.html
-                repo.create_file(
-                    "index.html",
-                    "Initial portfolio deployment via Resume to Portfolio app",
-                    html_content,
-                    branch="main"
-                )
-                message = "Repository created and portfolio deployed successfully"
-            else:
-                raise e
+    try:
+        deployer = GitHubPagesDeployer(
+            github_clients.get(access_token),
+            ready_attempts=Config.GITHUB_READY_POLL_ATTEMPTS,
+            ready_backoff=Config.GITHUB_READY_POLL_BACKOFF_SECONDS
+        )
+        with metrics.stage('deploy'):
+            deployment = deployer.deploy(
+                username,
+                repo_name,
+                {'index.html': html_content},
+                "Deploy portfolio via Resume to Portfolio app",
+                progress=job.set_stage
+            )
+
+    except GitHubError as e:
+        return {'success': False, 'error': f'GitHub API error: {str(e)}'}
+    except Exception as e:
+        return {'success': False, 'error': f'Deployment failed: {str(e)}'}
+
+    if deployment['created_repo']:
+        message = "Repository created and portfolio deployed successfully"
+    elif deployment['status'] == 'unchanged':
+        message = "Portfolio is already up to date"
+    elif deployment['status'] == 'updated':
+        message = "Portfolio updated successfully"
+    else:
+        message = "Portfolio deployed successfully"
+
+    job.set_stage('deployed')
+    # GitHub Pages is automatically enabled for username.github.io repos
+    return {
+        'success': True,
+        'message': message,
+        'url': f"https://{username}.github.io",
+        'repo_url': f"https://github.com/{username}/{repo_name}",
+        'commit_sha': deployment['commit_sha']
+    }
 
-        # GitHub Pages is automatically enabled for username.github.io repos
-        # No need to explicitly enable it via API
 
-        # Return success with the GitHub Pages URL
-        pages_url = f"https://{username}.github.io"
+# ============================================================================
+# ROUTES - Batch Generation
+# ============================================================================
 
-        return jsonify({
-            'success': True,
-            'message': message,
-            'url': pages_url,
-            'repo_url': f"https://github.com/{username}/{repo_name}"
-        })
+@app.route('/batch', methods=['POST'])
+@rate_limited('generate', generation=True)
+def batch_generate():
+    """Enqueue portfolio generation for a zip of resumes and return a job id"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
 
-    except GithubException as e:
-        return jsonify({
-            'success': False,
-            'error': f'GitHub API error: {str(e)}'
-        }), 500
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'Deployment failed: {str(e)}'
-        }), 500
+    file = request.files.get('resumes')
+
+    if file is None or not file.filename:
+        return jsonify({'success': False, 'error': 'No archive uploaded'}), 400
+
+    theme = request.form.get('theme', 'professional-blue')
+
+    if theme not in Config.COLOR_THEMES:
+        theme = 'professional-blue'
+
+    # The job reads resumes from a copy of the archive, one at a time, long after the request has gone
+    upload_name = f"{uuid.uuid4()}_batch.zip"
+    file.save(upload_storage.path(upload_name))
+    upload_storage.commit(upload_name)
+
+    try:
+        names = read_zip(upload_storage.path(upload_name), Config.ALLOWED_EXTENSIONS, Config.BATCH_MAX_ITEMS,
+                         Config.MAX_CONTENT_LENGTH, Config.BATCH_MAX_UNCOMPRESSED_MB * 1024 * 1024)
+    except BatchError as e:
+        _discard_upload(upload_name)
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    # The job keeps the request's generation slot and takes more for concurrent generations; it releases it when done
+    slot = g.pop('generation_slot', None)
+    try:
+        job = job_queue.submit(session['user']['id'], 'batch', _batch_job, upload_name, names, theme,
+                               _get_renderer(), slot=slot)
+    except QueueFullError as e:
+        _discard_upload(upload_name)
+        if slot is not None:
+            slot.release()
+        return jsonify({'success': False, 'error': str(e)}), 503
+
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'total': len(names),
+        'status_url': url_for('job_status', job_id=job.id),
+        'result_url': url_for('job_result', job_id=job.id)
+    }), 202
+
+
+def _try_acquire_slot():
+    """A generation slot, or None while the server is at its in-flight limit"""
+    try:
+        return rate_limiter.acquire()
+    except RateLimitExceeded:
+        return None
+
+
+def _run_batch(items, theme, output, renderer, max_concurrency=None, progress=None, slot=None):
+    """Generate a batch; with the request's slot, every concurrent generation holds an admission slot too"""
+    batch = BatchGenerator(
+        _create_pipeline(),
+        parse_concurrency=Config.PARSE_WORKERS,
+        max_concurrency=max_concurrency or Config.BATCH_MAX_CONCURRENCY,
+        acquire_slot=_try_acquire_slot if slot is not None else None
+    )
+    return batch.run(items, theme, output, renderer, progress=progress)
+
+
+def _batch_job(job, upload_name, names, theme, renderer='llm', *, slot=None):
+    """Background job: generate every resume of an uploaded zip into a zip in portfolio storage"""
+    archive_name = f"{uuid.uuid4()}_batch.zip"
+    try:
+        with open_zip_items(upload_storage.path(upload_name), names) as items:
+            report = _run_batch(
+                items, theme, portfolio_storage.path(archive_name), renderer,
+                progress=lambda finished, total: job.set_stage(f'{finished}/{total} generated'), slot=slot
+            )
+        portfolio_storage.commit(archive_name)
+    except Exception:
+        # Never committed, so the collector would only find it once it expires
+        portfolio_storage.delete(archive_name)
+        raise
+    finally:
+        _discard_upload(upload_name)
+        if slot is not None:
+            slot.release()
+
+    return {'success': True, 'filename': archive_name, 'report': report}
+
+
+@app.route('/batch/download/<filename>')
+def batch_download(filename):
+    """Download the zip of portfolios produced by a batch job"""
+    if 'user' not in session:
+        return redirect(url_for('login'))
+
+    file_path = portfolio_storage.local_path(filename) if filename.endswith('_batch.zip') else None
+
+    if file_path is None:
+        return "Batch not found", 404
+
+    return send_file(
+        file_path,
+        as_attachment=True,
+        download_name='portfolios.zip',
+        mimetype='application/zip'
+    )
+
+
+# ============================================================================
+# ROUTES - Monitoring
+# ============================================================================
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint: stage timings, upstream statuses, token counts, cache and queue gauges"""
+    if not Config.METRICS_ENABLED:
+        return jsonify({'success': False, 'error': 'Metrics are disabled'}), 404
+
+    if Config.METRICS_TOKEN and not hmac.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {Config.METRICS_TOKEN}'):
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
 
 
 # ============================================================================
@@ -403,12 +1102,54 @@ def not_found(_):
     return render_template('login.html', error='Page not found'), 404
 
 
+@app.errorhandler(RateLimitExceeded)
+def rate_limit_exceeded(e):
+    """Refuse a throttled or saturated request fast, telling the client when to retry"""
+    response = jsonify({'success': False, 'error': str(e)})
+    response.headers['Retry-After'] = e.retry_after_header
+    return response, e.status
+
+
 @app.errorhandler(500)
 def server_error(_):
     """Handle 500 errors"""
     return render_template('login.html', error='Internal server error'), 500
 
 
+# ============================================================================
+# CLI
+# ============================================================================
+
+@app.cli.command('batch')
+@click.argument('input_dir', type=click.Path(exists=True, file_okay=False))
+@click.argument('output_zip', type=click.Path(dir_okay=False, writable=True))
+@click.option('--theme', type=click.Choice(sorted(Config.COLOR_THEMES)), default='professional-blue',
+              show_default=True)
+@click.option('--renderer', type=click.Choice(RENDERERS), default=Config.DEFAULT_RENDERER, show_default=True)
+@click.option('--concurrency', type=int, default=Config.BATCH_MAX_CONCURRENCY, show_default=True,
+              help='LLM calls in flight at once')
+def batch_command(input_dir, output_zip, theme, renderer, concurrency):
+    """Generate portfolios for every resume in INPUT_DIR into OUTPUT_ZIP"""
+    items = read_directory(input_dir, Config.ALLOWED_EXTENSIONS)
+
+    if not items:
+        raise click.ClickException(f'No PDF or DOCX resumes found in {input_dir}')
+
+    try:
+        report = _run_batch(
+            items, theme, output_zip, renderer, max_concurrency=concurrency,
+            progress=lambda finished, total: click.echo(f'[{finished}/{total}]', err=True)
+        )
+    finally:
+        parser_pool.shutdown()
+
+    for entry in report['items']:
+        outcome = entry['portfolio'] if entry['success'] else f"FAILED: {entry['error']}"
+        click.echo(f"{entry['resume']}: {outcome}")
+    click.echo(f"{report['succeeded']}/{report['total']} portfolios written to {output_zip} "
+               f"in {report['seconds']:.1f}s")
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -0,0 +1,40 @@
+"""
+ASGI entry point.
+
+Run with an ASGI server, e.g. ``uvicorn asgi:application``. Each request
+runs the Flask app on a thread from a bounded pool (ASGI_THREADS), and
+async views such as /generate/async are awaited on the app's shared event
+loop, so many generations can wait on the network at once.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from app import app
+from config import Config
+
+# asgiref's wrapper runs every request on one shared thread (thread_sensitive=True),
+# which serialises the whole app; requests get threads of their own from this pool instead
+executor = ThreadPoolExecutor(max_workers=Config.ASGI_THREADS, thread_name_prefix='asgi')
+
+
+class ThreadedWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """WsgiToAsgiInstance that runs the WSGI app on the request thread pool"""
+
+    # The undecorated function behind asgiref's @sync_to_async run_wsgi_app
+    _run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+
+    # Async like the @sync_to_async original, which pylint cannot see through
+    async def run_wsgi_app(self, body):  # pylint: disable=invalid-overridden-method
+        await sync_to_async(self._run_wsgi_app, thread_sensitive=False, executor=executor)(body)
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi whose requests run concurrently rather than one at a time"""
+
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiToAsgiInstance(self.wsgi_application)(scope, receive, send)
+
+
+application = ThreadedWsgiToAsgi(app)
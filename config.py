@@ -1,3 +1,4 @@
+import json
 import os
 import tempfile
 
@@ -6,6 +7,24 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+
+def _llm_backends(default_url, default_model):
+    """
+    OpenAI-compatible backends from LLM_BACKENDS, a JSON list of
+    {"name", "api_url", "model", "api_key_env"} objects; defaults to Perplexity alone.
+    """
+    raw = os.getenv('LLM_BACKENDS')
+    if not raw:
+        return [{'name': 'perplexity', 'api_url': default_url, 'model': default_model,
+                 'api_key': os.getenv('PERPLEXITY_API_KEY')}]
+    return [{
+        'name': entry.get('name') or entry['api_url'],
+        'api_url': entry['api_url'],
+        'model': entry.get('model', default_model),
+        'api_key': os.getenv(entry.get('api_key_env', 'PERPLEXITY_API_KEY'))
+    } for entry in json.loads(raw)]
+
+
 class Config:
     """Configuration class for Flask application"""
 
@@ -19,12 +38,36 @@ class Config:
     GITHUB_TOKEN_URL = 'https://github.com/login/oauth/access_token'
     GITHUB_USER_API_URL = 'https://api.github.com/user'
     GITHUB_REPOS_API_URL = 'https://api.github.com/user/repos'
+    GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+    GITHUB_TIMEOUT_SECONDS = 30
+    GITHUB_METADATA_TTL_SECONDS = float(os.getenv('GITHUB_METADATA_TTL_SECONDS', '60'))
+    # Backoff polling for a newly created Pages repository to get its first commit
+    GITHUB_READY_POLL_ATTEMPTS = int(os.getenv('GITHUB_READY_POLL_ATTEMPTS', '8'))
+    GITHUB_READY_POLL_BACKOFF_SECONDS = float(os.getenv('GITHUB_READY_POLL_BACKOFF_SECONDS', '0.25'))
 
     # Perplexity API Settings
     PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
     PERPLEXITY_API_URL = 'https://api.perplexity.ai/chat/completions'
     PERPLEXITY_MODEL = 'sonar'  # Using the correct model name
 
+    # LLM routing: requests go to the fastest healthy backend; a non-streaming call that
+    # outlives the backend's p95 latency is re-sent to the next one and the first answer wins
+    LLM_BACKENDS = _llm_backends(PERPLEXITY_API_URL, PERPLEXITY_MODEL)
+    LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'true').lower() == 'true'
+    LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv('LLM_HEDGE_MIN_DELAY_SECONDS', '2'))
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY_SECONDS', '30'))
+
+    # ASGI Server Settings (asgi.py): threads running Flask requests concurrently; async views
+    # share one event loop, so a thread waiting on one costs no extra connections
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', '32'))
+
+    # Outbound HTTP Settings (shared by Perplexity and GitHub calls)
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+    HTTP_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('HTTP_CIRCUIT_FAILURE_THRESHOLD', '5'))
+    HTTP_CIRCUIT_RESET_SECONDS = float(os.getenv('HTTP_CIRCUIT_RESET_SECONDS', '30'))
+
     # File Upload Settings
     TEMP_DIR = tempfile.gettempdir()
 
@@ -32,6 +75,95 @@ class Config:
     GENERATED_FOLDER = os.path.join(TEMP_DIR, 'generated')
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max file size
+    # Uploads up to this size are parsed straight from memory; larger ones are spooled to disk
+    UPLOAD_SPOOL_MAX_BYTES = int(os.getenv('UPLOAD_SPOOL_MAX_BYTES', str(2 * 1024 * 1024)))
+
+    # Storage Settings: generated portfolios go to 'local' (GENERATED_FOLDER), 'sharded'
+    # (hashed subdirectories of it) or 's3' (an S3-compatible bucket such as MinIO, shared by
+    # all replicas and cached locally). Files older than their TTL are garbage collected and
+    # the oldest are evicted once a folder passes its quota.
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+    STORAGE_GC_INTERVAL_SECONDS = float(os.getenv('STORAGE_GC_INTERVAL_SECONDS', '300'))
+    UPLOAD_TTL_SECONDS = float(os.getenv('UPLOAD_TTL_SECONDS', '3600'))
+    UPLOAD_QUOTA_MB = int(os.getenv('UPLOAD_QUOTA_MB', '512'))
+    GENERATED_TTL_SECONDS = float(os.getenv('GENERATED_TTL_SECONDS', str(7 * 24 * 3600)))
+    GENERATED_QUOTA_MB = int(os.getenv('GENERATED_QUOTA_MB', '1024'))
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL', 'http://localhost:9000')
+    S3_BUCKET = os.getenv('S3_BUCKET', 'portfolios')
+    S3_PREFIX = os.getenv('S3_PREFIX', 'generated/')
+    S3_REGION = os.getenv('S3_REGION', 'us-east-1')
+    S3_ACCESS_KEY = os.getenv('S3_ACCESS_KEY')
+    S3_SECRET_KEY = os.getenv('S3_SECRET_KEY')
+    S3_CACHE_QUOTA_MB = int(os.getenv('S3_CACHE_QUOTA_MB', '256'))
+
+    # Resume Parsing Worker Settings
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(min(4, os.cpu_count() or 1))))
+    PARSE_TIMEOUT_SECONDS = float(os.getenv('PARSE_TIMEOUT_SECONDS', '30'))
+    PARSE_MEMORY_LIMIT_MB = int(os.getenv('PARSE_MEMORY_LIMIT_MB', '512'))
+    PARSE_MAX_TASKS_PER_CHILD = int(os.getenv('PARSE_MAX_TASKS_PER_CHILD', '50'))
+    PARSE_MAX_PAGES = int(os.getenv('PARSE_MAX_PAGES', '10'))
+    PARSE_MAX_CHARS = int(os.getenv('PARSE_MAX_CHARS', '50000'))
+    # Extra PII rules on top of phone/address/ZIP: email, url_token, national_id
+    PII_EXTRA_RULES = [name.strip() for name in os.getenv('PII_EXTRA_RULES', '').split(',') if name.strip()]
+    # Resume sections sent to the LLM (empty = all found) and per-section size cap
+    PROMPT_SECTIONS = [name.strip() for name in os.getenv('PROMPT_SECTIONS', '').split(',') if name.strip()] or None
+    PROMPT_SECTION_MAX_CHARS = int(os.getenv('PROMPT_SECTION_MAX_CHARS', '4000'))
+    # Parsed resumes by content hash, so re-submitting the same file skips extraction.
+    # Only PII-filtered text is kept, in memory unless PARSE_CACHE_DISK_QUOTA_MB enables a disk tier
+    PARSE_CACHE_MAX_ENTRIES = int(os.getenv('PARSE_CACHE_MAX_ENTRIES', '128'))
+    PARSE_CACHE_DIR = os.path.join(TEMP_DIR, 'parse_cache')
+    PARSE_CACHE_DISK_QUOTA_MB = int(os.getenv('PARSE_CACHE_DISK_QUOTA_MB', '0'))
+    PARSE_CACHE_TTL_SECONDS = float(os.getenv('PARSE_CACHE_TTL_SECONDS', str(24 * 3600)))
+    # Estimated input tokens per generation (system prompt + resume); the resume is trimmed to fit
+    PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '8000'))
+    LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '120'))
+
+    # Renderer used when a request does not choose one: 'llm' (model writes the HTML),
+    # 'structured' (model returns JSON content, rendered server-side) or 'local' (no API call)
+    DEFAULT_RENDERER = os.getenv('DEFAULT_RENDERER', 'llm')
+    # Minify generated HTML/CSS and load web fonts without blocking render before saving
+    HTML_OPTIMIZE = os.getenv('HTML_OPTIMIZE', 'true').lower() == 'true'
+    # Render locally when the LLM fails or times out instead of reporting an error
+    LOCAL_RENDER_FALLBACK = os.getenv('LOCAL_RENDER_FALLBACK', 'true').lower() == 'true'
+
+    # Generation Cache Settings
+    GENERATION_CACHE_DIR = os.path.join(TEMP_DIR, 'generation_cache')
+    GENERATION_CACHE_MAX_ENTRIES = int(os.getenv('GENERATION_CACHE_MAX_ENTRIES', '500'))
+    GENERATION_CACHE_TTL_SECONDS = int(os.getenv('GENERATION_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+
+    # Preview Cache Settings (in-memory LRU of frequently previewed portfolios)
+    PREVIEW_CACHE_MAX_ENTRIES = int(os.getenv('PREVIEW_CACHE_MAX_ENTRIES', '64'))
+    PREVIEW_CACHE_MAX_BYTES = int(os.getenv('PREVIEW_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+    # Background Job Settings
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+    JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', '100'))
+    JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+
+    # Batch Generation Settings (zip upload at /batch, `flask batch` over a directory):
+    # resumes per batch, their total uncompressed size and LLM calls in flight per batch;
+    # parsing uses PARSE_WORKERS
+    BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '200'))
+    BATCH_MAX_UNCOMPRESSED_MB = int(os.getenv('BATCH_MAX_UNCOMPRESSED_MB', '256'))
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '4'))
+
+    # Observability Settings: Prometheus metrics at /metrics (bearer METRICS_TOKEN required when
+    # set) and OpenTelemetry spans around each pipeline stage when TRACING_ENABLED is true and the
+    # opentelemetry-api package (plus an SDK/exporter of your choice) is installed
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+
+    # Admission Control Settings: per-user token buckets (requests per minute, burst) and a
+    # global cap on generations in flight. Set RATE_LIMIT_REDIS_URL (needs the redis package)
+    # to share limits across app processes instead of keeping them in memory.
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+    GENERATE_RATE_PER_MINUTE = float(os.getenv('GENERATE_RATE_PER_MINUTE', '6'))
+    GENERATE_BURST = int(os.getenv('GENERATE_BURST', '3'))
+    DEPLOY_RATE_PER_MINUTE = float(os.getenv('DEPLOY_RATE_PER_MINUTE', '4'))
+    DEPLOY_BURST = int(os.getenv('DEPLOY_BURST', '2'))
+    GENERATION_MAX_IN_FLIGHT = int(os.getenv('GENERATION_MAX_IN_FLIGHT', str(JOB_WORKERS * 2)))
+    BUSY_RETRY_AFTER_SECONDS = float(os.getenv('BUSY_RETRY_AFTER_SECONDS', '5'))
 
     # Color Themes for Portfolio
     COLOR_THEMES = {
@@ -0,0 +1,130 @@
+"""In-memory fake of the GitHub repository and Git Data APIs, served by StubServer."""
+import base64
+import hashlib
+import json
+import re
+from urllib.parse import unquote, urlsplit
+
+from utils.github_deployer import git_blob_sha
+
+
+class FakeRepo:
+    """A repository with blobs, trees and commits addressed by SHA."""
+
+    def __init__(self, owner, name, files=None, pending_polls=0, empty=False):
+        self.owner = owner
+        self.name = name
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.head = None
+        # Number of ref lookups answered 409 before the initial commit "appears"
+        self.pending_polls = pending_polls
+        if not empty:
+            self.commit(files or {'README.md': b'# ' + name.encode()}, 'Initial commit', [])
+
+    def add_blob(self, content):
+        sha = git_blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def add_tree(self, entries):
+        sha = hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest()
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def add_commit(self, tree, message, parents):
+        sha = hashlib.sha1(json.dumps([tree, message, parents, len(self.commits)]).encode()).hexdigest()
+        self.commits[sha] = {'tree': tree, 'message': message, 'parents': parents}
+        return sha
+
+    def commit(self, files, message, parents):
+        tree = self.add_tree({path: self.add_blob(content) for path, content in files.items()})
+        self.head = self.add_commit(tree, message, parents)
+
+    def files(self):
+        """Contents of every file at the branch head"""
+        tree = self.trees[self.commits[self.head]['tree']]
+        return {path: self.blobs[sha] for path, sha in tree.items()}
+
+
+class FakeGitHub:
+    """
+    StubServer handler emulating the endpoints the deployer uses.
+    Repositories are keyed by (owner, name); every request is logged as
+    "METHOD path" in calls. GET responses carry an ETag and answer a matching
+    If-None-Match with 304, which like GitHub does not use up rate limit.
+    """
+
+    def __init__(self, user='octocat', repo_init_polls=0, rate_limit=5000):
+        self.user = user
+        self.repo_init_polls = repo_init_polls
+        self.rate_limit_remaining = rate_limit
+        self.repos = {}
+        self.calls = []
+
+    def __call__(self, request):
+        status, headers, body = self._route(request)
+        if request.method == 'GET' and status == 200:
+            etag = '"%s"' % hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()
+            if request.headers.get('If-None-Match') == etag:
+                return 304, {'ETag': etag, 'X-RateLimit-Remaining': str(self.rate_limit_remaining)}, b''
+            headers = dict(headers, ETag=etag)
+        self.rate_limit_remaining -= 1
+        return status, dict(headers, **{'X-RateLimit-Remaining': str(self.rate_limit_remaining)}), body
+
+    def _route(self, request):
+        path = urlsplit(request.path).path
+        self.calls.append(f'{request.method} {path}')
+
+        if request.method == 'POST' and path == '/user/repos':
+            name = request.json()['name']
+            self.repos[(self.user, name)] = FakeRepo(self.user, name, pending_polls=self.repo_init_polls)
+            return 201, {}, {'name': name, 'default_branch': 'main'}
+
+        match = re.match(r'^/repos/([^/]+)/([^/]+)(/.*)?$', path)
+        repo = self.repos.get(match.group(1, 2)) if match else None
+        if repo is None:
+            return 404, {}, {'message': 'Not Found'}
+        rest = match.group(3) or ''
+        body = request.json() if request.body else {}
+
+        if rest == '' and request.method == 'GET':
+            return 200, {}, {'name': repo.name, 'default_branch': 'main'}
+        if rest.startswith('/contents/') and request.method == 'PUT':
+            files = repo.files() if repo.head is not None else {}
+            files[unquote(rest[len('/contents/'):])] = base64.b64decode(body['content'])
+            repo.commit(files, body['message'], [repo.head] if repo.head is not None else [])
+            return 201, {}, {'commit': {'sha': repo.head}}
+        if rest.startswith('/git/') and (repo.pending_polls or not repo.commits):
+            # Like GitHub, the Git Data API refuses to work on a repository without commits
+            repo.pending_polls = max(0, repo.pending_polls - 1)
+            return 409, {}, {'message': 'Git Repository is empty.'}
+        if rest == '/git/ref/heads/main':
+            if repo.head is None:
+                return 404, {}, {'message': 'Not Found'}
+            return 200, {}, {'ref': 'refs/heads/main', 'object': {'sha': repo.head, 'type': 'commit'}}
+        if rest.startswith('/git/commits/'):
+            commit = repo.commits[rest.rsplit('/', 1)[1]]
+            return 200, {}, {'sha': rest.rsplit('/', 1)[1], 'tree': {'sha': commit['tree']}}
+        if rest.startswith('/git/trees/') and request.method == 'GET':
+            tree = repo.trees[rest.rsplit('/', 1)[1]]
+            return 200, {}, {'tree': [{'path': path, 'mode': '100644', 'type': 'blob', 'sha': sha}
+                                      for path, sha in tree.items()]}
+        if rest == '/git/blobs':
+            return 201, {}, {'sha': repo.add_blob(base64.b64decode(body['content']))}
+        if rest == '/git/trees':
+            entries = dict(repo.trees[body['base_tree']]) if 'base_tree' in body else {}
+            entries.update({entry['path']: entry['sha'] for entry in body['tree']})
+            return 201, {}, {'sha': repo.add_tree(entries)}
+        if rest == '/git/commits':
+            return 201, {}, {'sha': repo.add_commit(body['tree'], body['message'], body['parents'])}
+        if rest == '/git/refs' and request.method == 'POST':
+            if repo.head is not None:
+                return 422, {}, {'message': 'Reference already exists'}
+            repo.head = body['sha']
+            return 201, {}, {'ref': body['ref'], 'object': {'sha': repo.head}}
+        if rest == '/git/refs/heads/main' and request.method == 'PATCH':
+            repo.head = body['sha']
+            return 200, {}, {'ref': 'refs/heads/main', 'object': {'sha': repo.head}}
+        return 404, {}, {'message': 'Not Found'}
@@ -0,0 +1,69 @@
+"""Local HTTP stub server for tests that exercise real network clients."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubRequest:
+    """A request received by the stub server."""
+
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class StubServer:
+    """
+    Serve scripted responses on localhost.
+    The handler receives a StubRequest and returns (status, headers, body);
+    body may be bytes, str, or a JSON-serialisable object.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = StubRequest(self.command, self.path, dict(self.headers), self.rfile.read(length))
+                stub.requests.append(request)
+                status, headers, body = stub.handler(request)
+
+                if not isinstance(body, (bytes, str)):
+                    body = json.dumps(body)
+                    headers = {'Content-Type': 'application/json', **headers}
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
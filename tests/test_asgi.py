@@ -0,0 +1,116 @@
+"""Tests for concurrency of the asyncio pipeline and the ASGI entry point."""
+import asyncio
+import io
+import json
+import time
+
+import docx
+from werkzeug.test import EnvironBuilder
+
+from utils.http_client import AsyncHttpClient
+from utils.pipeline import PortfolioPipeline
+from utils.portfolio_generator import PortfolioGenerator
+from tests.stub_server import StubServer
+
+THEME = {'primary': '#123456', 'secondary': '#111111', 'accent': '#222222', 'background': '#ffffff', 'text': '#333333'}
+LLM_DELAY = 0.5
+CONCURRENCY = 3
+
+
+def resume_bytes():
+    document = docx.Document()
+    for line in ("Jane Doe", "Skills", "Python, Go"):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def slow_llm(_request):
+    """Stub completion endpoint that takes LLM_DELAY seconds to answer."""
+    time.sleep(LLM_DELAY)
+    html = "<!DOCTYPE html><html><head></head><body>" + "x" * 100 + "</body></html>"
+    return 200, {}, {'choices': [{'message': {'content': html}}]}
+
+
+class TestAsyncConcurrency:
+    """Test that concurrent generations wait on the LLM together rather than in turn."""
+
+    def test_pipeline_arun_overlaps(self, tmp_path):
+        """Test that concurrent arun calls take about one LLM round trip, not one each."""
+        with StubServer(slow_llm) as server:
+            generator = PortfolioGenerator("key", server.url + "/chat/completions", "model",
+                                           async_http_client=AsyncHttpClient())
+            pipeline = PortfolioPipeline(generator, str(tmp_path), {'blue': THEME})
+            data = resume_bytes()
+
+            async def run_all():
+                return await asyncio.gather(*(pipeline.arun(data, 'blue') for _ in range(CONCURRENCY)))
+
+            started = time.monotonic()
+            results = asyncio.run(run_all())
+            elapsed = time.monotonic() - started
+
+        assert all(result['success'] for result in results)
+        assert elapsed < LLM_DELAY * 2
+
+    def test_generate_async_requests_overlap(self, tmp_path, monkeypatch):
+        """Test that /generate/async requests served over ASGI run concurrently on one shared loop."""
+        # Imported here so only this test pays for the app's startup (pools, storage, caches)
+        import app as app_module  # pylint: disable=import-outside-toplevel
+        from asgi import application  # pylint: disable=import-outside-toplevel
+
+        loops = set()
+        with StubServer(slow_llm) as server:
+            generator = PortfolioGenerator("key", server.url + "/chat/completions", "model",
+                                           async_http_client=app_module.async_http_client)
+            pipeline = PortfolioPipeline(generator, str(tmp_path), app_module.Config.COLOR_THEMES)
+
+            def create_pipeline():
+                loops.add(id(asyncio.get_running_loop()))
+                return pipeline
+            monkeypatch.setattr(app_module, '_create_pipeline', create_pipeline)
+
+            async def post(user_id):
+                client = app_module.app.test_client()
+                with client.session_transaction() as session:
+                    session['user'] = {'id': user_id, 'username': f'user{user_id}'}
+                cookie = client.get_cookie('session').value
+                builder = EnvironBuilder(method='POST', data={
+                    'resume': (io.BytesIO(resume_bytes()), 'resume.docx'),
+                    'theme': 'professional-blue',
+                    'renderer': 'llm'
+                })
+                environ = builder.get_environ()
+                body = environ['wsgi.input'].read()
+                scope = {
+                    'type': 'http', 'method': 'POST', 'path': '/generate/async', 'query_string': b'',
+                    'http_version': '1.1', 'root_path': '', 'scheme': 'http', 'server': ('localhost', 80),
+                    'headers': [(b'content-type', environ['CONTENT_TYPE'].encode('latin1')),
+                                (b'content-length', str(len(body)).encode('ascii')),
+                                (b'cookie', f'session={cookie}'.encode('latin1'))]
+                }
+                messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+                sent = []
+
+                async def receive():
+                    return messages.pop(0)
+
+                async def send(message):
+                    sent.append(message)
+
+                await application(scope, receive, send)
+                return sent[0]['status'], json.loads(b''.join(m.get('body', b'') for m in sent[1:]))
+
+            async def run_all():
+                return await asyncio.gather(*(post(index) for index in range(CONCURRENCY)))
+
+            started = time.monotonic()
+            responses = asyncio.run(run_all())
+            elapsed = time.monotonic() - started
+
+        assert [status for status, _ in responses] == [200] * CONCURRENCY
+        assert all(body['success'] for _, body in responses)
+        assert elapsed < LLM_DELAY * 2
+        # Every request ran on the shared loop, not one of its own
+        assert loops == {id(app_module.event_loop.loop)}
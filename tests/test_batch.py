@@ -0,0 +1,151 @@
+"""Tests for batch generation module."""
+import io
+import json
+import threading
+import time
+import zipfile
+
+import docx
+import pytest
+
+from utils.batch import BatchError, BatchGenerator, open_zip_items, read_directory, read_zip
+from utils.pipeline import PortfolioPipeline
+
+THEME = {'primary': '#123456', 'secondary': '#111111', 'accent': '#222222', 'background': '#ffffff', 'text': '#333333'}
+EXTENSIONS = {'pdf', 'docx'}
+
+
+def resume_bytes(name):
+    document = docx.Document()
+    document.add_paragraph(name)
+    document.add_paragraph("Skills")
+    document.add_paragraph("Python, Go")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+class SlowPipeline:
+    """Pipeline whose generations take a while and record how many overlapped."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def parse(self, source):
+        return {'has_content': True}
+
+    def generate(self, parsed_data, theme, renderer):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return {'success': True, 'html': '<html></html>', 'renderer': renderer}
+
+
+class TestBatchInput:
+    """Test reading resumes from an archive or a directory."""
+
+    def test_read_zip_keeps_only_resumes(self):
+        """Test that folders, hidden files and other formats are skipped."""
+        archive = make_zip({
+            'cohort/ann.docx': b'a',
+            'cohort/notes.txt': b'b',
+            '__MACOSX/cohort/._ann.docx': b'c',
+            'bob.PDF': b'd'
+        })
+
+        assert read_zip(archive, EXTENSIONS) == ['cohort/ann.docx', 'bob.PDF']
+
+    def test_open_zip_items_reads_members_on_demand(self, tmp_path):
+        """Test that zip items are loaders, decompressing a member only when called."""
+        path = tmp_path / 'batch.zip'
+        path.write_bytes(make_zip({'ann.docx': b'a', 'bob.pdf': b'b'}).getvalue())
+
+        with open_zip_items(str(path), ['bob.pdf', 'ann.docx']) as items:
+            assert [name for name, _ in items] == ['bob.pdf', 'ann.docx']
+            assert all(callable(load) for _, load in items)
+            assert items[1][1]() == b'a'
+
+    def test_read_zip_limits(self, tmp_path):
+        """Test that bad archives, too many resumes and oversized ones are refused."""
+        with pytest.raises(BatchError):
+            read_zip(io.BytesIO(b'not a zip'), EXTENSIONS)
+        with pytest.raises(BatchError):
+            read_zip(make_zip({'a.pdf': b'1', 'b.pdf': b'2'}), EXTENSIONS, max_items=1)
+        with pytest.raises(BatchError):
+            read_zip(make_zip({'a.pdf': b'x' * 100}), EXTENSIONS, max_item_bytes=10)
+        with pytest.raises(BatchError, match='add up'):
+            read_zip(make_zip({'a.pdf': b'x' * 60, 'b.pdf': b'y' * 60}), EXTENSIONS, max_total_bytes=100)
+
+        (tmp_path / 'b.docx').write_bytes(b'1')
+        (tmp_path / 'a.pdf').write_bytes(b'2')
+        (tmp_path / 'skip.txt').write_bytes(b'3')
+        assert [name for name, _ in read_directory(str(tmp_path), EXTENSIONS)] == ['a.pdf', 'b.docx']
+
+
+class TestBatchGenerator:
+    """Test parallel generation into a zip with a per-item report."""
+
+    def test_portfolios_and_report_stream_into_zip(self, tmp_path):
+        """Test that good resumes become portfolios and a broken one is reported, not fatal."""
+        pipeline = PortfolioPipeline(None, str(tmp_path), {'blue': THEME})
+        items = [('ann.docx', resume_bytes("Ann Lee")), ('team/ann.docx', lambda: resume_bytes("Ann Other")),
+                 ('broken.pdf', b'%PDF-not really')]
+        progress = []
+        output = str(tmp_path / 'out.zip')
+
+        report = BatchGenerator(pipeline).run(items, 'blue', output, renderer='local',
+                                              progress=lambda finished, total: progress.append((finished, total)))
+
+        assert (report['total'], report['succeeded'], report['failed']) == (3, 2, 1)
+        assert progress[-1] == (3, 3)
+        with zipfile.ZipFile(output) as archive:
+            assert sorted(archive.namelist()) == ['ann-2.html', 'ann.html', 'report.json']
+            assert json.loads(archive.read('report.json'))['items'] == report['items']
+            assert 'Ann' in archive.read('ann.html').decode('utf-8')
+        broken = next(entry for entry in report['items'] if entry['resume'] == 'broken.pdf')
+        assert broken['success'] is False and 'Error processing resume' in broken['error']
+
+    def test_generation_concurrency_is_bounded(self, tmp_path):
+        """Test that no more than max_concurrency generations run at once."""
+        pipeline = SlowPipeline()
+        items = [(f'r{index}.pdf', b'') for index in range(8)]
+        report = BatchGenerator(pipeline, parse_concurrency=4, max_concurrency=2).run(
+            items, 'blue', io.BytesIO(), renderer='llm'
+        )
+
+        assert report['succeeded'] == 8
+        assert pipeline.peak == 2
+
+    def test_each_generation_holds_an_admission_slot(self, tmp_path):
+        """Test that generations beyond the reserved slot run only on slots the server hands out."""
+        free = threading.Semaphore(1)
+
+        class ServerSlot:
+            def release(self):
+                free.release()
+
+        def acquire_slot():
+            return ServerSlot() if free.acquire(blocking=False) else None
+
+        pipeline = SlowPipeline()
+        items = [(f'r{index}.pdf', b'') for index in range(8)]
+        report = BatchGenerator(pipeline, max_concurrency=4, acquire_slot=acquire_slot,
+                                slot_poll_interval=0.01).run(items, 'blue', io.BytesIO(), renderer='llm')
+
+        assert report['succeeded'] == 8
+        assert pipeline.peak == 2
+        assert free.acquire(blocking=False)
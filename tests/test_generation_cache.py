@@ -0,0 +1,84 @@
+"""Tests for generation cache module."""
+import os
+import time
+from utils.generation_cache import GenerationCache
+from utils.portfolio_generator import PortfolioGenerator
+
+
+THEME = {'primary': '#000', 'secondary': '#111', 'accent': '#222', 'background': '#fff', 'text': '#333'}
+
+
+class TestGenerationCacheKey:
+    """Test cache key derivation."""
+
+    def test_key_is_stable(self):
+        """Test that identical inputs produce the same key."""
+        key1 = GenerationCache.make_key("resume", dict(THEME), "sonar", "prompt")
+        key2 = GenerationCache.make_key("resume", dict(reversed(list(THEME.items()))), "sonar", "prompt")
+        assert key1 == key2
+
+    def test_key_changes_with_inputs(self):
+        """Test that every input contributes to the key."""
+        base = GenerationCache.make_key("resume", THEME, "sonar", "prompt")
+        assert GenerationCache.make_key("other", THEME, "sonar", "prompt") != base
+        assert GenerationCache.make_key("resume", {**THEME, 'accent': '#999'}, "sonar", "prompt") != base
+        assert GenerationCache.make_key("resume", THEME, "sonar-pro", "prompt") != base
+        assert GenerationCache.make_key("resume", THEME, "sonar", "prompt v2") != base
+
+
+class TestGenerationCacheStorage:
+    """Test cache reads, writes and eviction."""
+
+    def test_miss_then_hit(self, tmp_path):
+        """Test that a stored entry is returned and counted."""
+        cache = GenerationCache(str(tmp_path))
+        assert cache.get('abc') is None
+        cache.set('abc', '<html></html>')
+        assert cache.get('abc') == '<html></html>'
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1}
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        """Test that entries older than the TTL are dropped."""
+        cache = GenerationCache(str(tmp_path), ttl=60)
+        cache.set('abc', '<html></html>')
+        old = time.time() - 120
+        os.utime(os.path.join(str(tmp_path), 'abc.html'), (old, old))
+
+        assert cache.get('abc') is None
+        assert cache.stats()['size'] == 0
+
+    def test_least_recently_used_entry_is_evicted(self, tmp_path):
+        """Test that the size limit evicts the least recently used entry."""
+        cache = GenerationCache(str(tmp_path), max_entries=2)
+        cache.set('a', 'A')
+        cache.set('b', 'B')
+        now = time.time()
+        os.utime(os.path.join(str(tmp_path), 'a.html'), (now - 10, now))
+        os.utime(os.path.join(str(tmp_path), 'b.html'), (now - 20, now))
+        cache.set('c', 'C')
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A'
+        assert cache.get('c') == 'C'
+        assert cache.stats()['evictions'] == 1
+
+
+class TestPortfolioGeneratorCache:
+    """Test that the generator consults the cache before calling the API."""
+
+    def test_cache_hit_skips_api_call(self, tmp_path):
+        """Test that a cached portfolio is returned without a request."""
+        class FailingClient:
+            def post(self, *args, **kwargs):
+                raise AssertionError("API should not be called")
+
+        cache = GenerationCache(str(tmp_path))
+        generator = PortfolioGenerator("key", "http://localhost", "sonar", cache=cache, http_client=FailingClient())
+        key = GenerationCache.make_key("resume", THEME, "sonar", generator.prompt_builder.system_prompt())
+        cache.set(key, "<!DOCTYPE html><html></html>")
+
+        result = generator.generate_portfolio("resume", THEME)
+
+        assert result['success'] is True
+        assert result['cached'] is True
+        assert result['html'] == "<!DOCTYPE html><html></html>"
@@ -0,0 +1,179 @@
+"""Tests for GitHub Pages deployment module."""
+import pytest
+from utils.github_deployer import GitHubClient, GitHubClientCache, GitHubError, GitHubPagesDeployer, git_blob_sha
+from utils.http_client import HttpClient
+from tests.fake_github import FakeGitHub, FakeRepo
+from tests.stub_server import StubServer
+
+
+def make_deployer(server, sleeps=None, ready_attempts=8):
+    client = GitHubClient('token', HttpClient(backoff_factor=0), server.url)
+    return GitHubPagesDeployer(client, ready_attempts=ready_attempts,
+                               sleep=sleeps.append if sleeps is not None else lambda _: None)
+
+
+class TestGitBlobSha:
+    """Test local blob hashing."""
+
+    def test_matches_git(self):
+        """Test against the SHA `git hash-object` prints for 'hello\\n'."""
+        assert git_blob_sha(b'hello\n') == 'ce013625030ba8dba906f756967f9e9ca394464a'
+
+
+class TestGitHubPagesDeployer:
+    """Test single-commit deployment against a fake GitHub API."""
+
+    def test_creates_repo_and_polls_until_ready(self):
+        """Test that a new repository is polled with backoff, then gets one commit."""
+        github = FakeGitHub(repo_init_polls=2)
+        sleeps = []
+        with StubServer(github) as server:
+            result = make_deployer(server, sleeps).deploy('octocat', 'octocat.github.io',
+                                                          {'index.html': '<html>hi</html>'}, 'Deploy')
+
+        repo = github.repos[('octocat', 'octocat.github.io')]
+        assert result['created_repo'] is True
+        assert result['status'] == 'created'
+        assert sleeps == [0.25, 0.5]
+        assert repo.files() == {'README.md': b'# octocat.github.io', 'index.html': b'<html>hi</html>'}
+        assert repo.commits[repo.head]['message'] == 'Deploy'
+        assert github.calls.count('PATCH /repos/octocat/octocat.github.io/git/refs/heads/main') == 1
+
+    def test_multiple_files_land_in_one_commit(self):
+        """Test that every changed file is written by a single commit."""
+        github = FakeGitHub()
+        github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site', {'index.html': b'old'})
+        with StubServer(github) as server:
+            result = make_deployer(server).deploy('octocat', 'site', {
+                'index.html': 'new',
+                'assets/app.css': b'body {}'
+            }, 'Deploy')
+
+        repo = github.repos[('octocat', 'site')]
+        assert result['status'] == 'updated'
+        assert result['changed'] == ['assets/app.css', 'index.html']
+        assert repo.files() == {'index.html': b'new', 'assets/app.css': b'body {}'}
+        assert len(repo.commits) == 2
+        assert github.calls.count('POST /repos/octocat/site/git/commits') == 1
+
+    def test_reports_progress(self):
+        """Test that each deployment stage is reported in order."""
+        github = FakeGitHub()
+        github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site')
+        stages = []
+        with StubServer(github) as server:
+            make_deployer(server).deploy('octocat', 'site', {'index.html': 'x'}, 'Deploy', progress=stages.append)
+
+        assert stages == ['preparing repository', 'comparing', 'uploading', 'committing']
+
+    def test_unchanged_content_skips_push(self):
+        """Test that identical content makes no writes at all."""
+        github = FakeGitHub()
+        github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site', {'index.html': b'same'})
+        with StubServer(github) as server:
+            result = make_deployer(server).deploy('octocat', 'site', {'index.html': 'same'}, 'Deploy')
+
+        assert result['status'] == 'unchanged'
+        assert result['commit_sha'] == github.repos[('octocat', 'site')].head
+        assert not [call for call in github.calls if not call.startswith('GET')]
+
+    def test_existing_empty_repo_is_seeded_through_contents_api(self):
+        """Test that an empty repository gets its first file via the Contents API, the rest via Git Data."""
+        github = FakeGitHub()
+        github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site', empty=True)
+        sleeps = []
+        with StubServer(github) as server:
+            result = make_deployer(server, sleeps).deploy('octocat', 'site', {
+                'index.html': 'x',
+                'assets/app.css': b'body {}'
+            }, 'Deploy')
+
+        repo = github.repos[('octocat', 'site')]
+        assert result['created_repo'] is False
+        assert result['status'] == 'created'
+        assert result['changed'] == ['assets/app.css', 'index.html']
+        assert sleeps == []
+        assert repo.files() == {'index.html': b'x', 'assets/app.css': b'body {}'}
+        assert github.calls.count('PUT /repos/octocat/site/contents/assets/app.css') == 1
+        assert github.calls.count('POST /repos/octocat/site/git/commits') == 1
+
+    def test_single_file_into_empty_repo_needs_one_commit(self):
+        """Test that seeding an empty repository with the only file finishes the deploy."""
+        github = FakeGitHub()
+        github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site', empty=True)
+        with StubServer(github) as server:
+            result = make_deployer(server).deploy('octocat', 'site', {'index.html': 'x'}, 'Deploy')
+
+        repo = github.repos[('octocat', 'site')]
+        assert (result['status'], result['changed']) == ('created', ['index.html'])
+        assert result['commit_sha'] == repo.head
+        assert len(repo.commits) == 1
+        assert not [call for call in github.calls if call.startswith('POST')]
+
+    def test_existing_repo_without_branch_gets_root_commit(self):
+        """Test that a missing default branch is recreated at once instead of polled for."""
+        github = FakeGitHub()
+        repo = github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site')
+        repo.head = None
+        sleeps = []
+        with StubServer(github) as server:
+            result = make_deployer(server, sleeps).deploy('octocat', 'site', {'index.html': 'x'}, 'Deploy')
+
+        assert sleeps == []
+        assert result['status'] == 'created'
+        assert repo.files() == {'index.html': b'x'}
+        assert repo.commits[repo.head]['parents'] == []
+        assert github.calls.count('POST /repos/octocat/site/git/refs') == 1
+
+    def test_gives_up_when_repo_never_becomes_ready(self):
+        """Test that polling stops after the configured attempts."""
+        github = FakeGitHub(repo_init_polls=10)
+        with StubServer(github) as server:
+            with pytest.raises(GitHubError) as excinfo:
+                make_deployer(server, ready_attempts=3).deploy('octocat', 'site', {'index.html': 'x'}, 'Deploy')
+
+        assert excinfo.value.status == 409
+        assert github.calls.count('GET /repos/octocat/site/git/ref/heads/main') == 3
+
+
+class TestGitHubClientCaching:
+    """Test metadata caching and conditional requests."""
+
+    def test_repeat_deploy_uses_cache_and_conditional_requests(self):
+        """Test that a second deploy reuses repo metadata and revalidates the ref with a free 304."""
+        github = FakeGitHub()
+        github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site', {'index.html': b'same'})
+        with StubServer(github) as server:
+            client = GitHubClient('token', HttpClient(backoff_factor=0), server.url)
+            deployer = GitHubPagesDeployer(client)
+            deployer.deploy('octocat', 'site', {'index.html': 'same'}, 'Deploy')
+            remaining = github.rate_limit_remaining
+            github.calls.clear()
+
+            result = deployer.deploy('octocat', 'site', {'index.html': 'same'}, 'Deploy')
+
+        assert result['status'] == 'unchanged'
+        assert github.calls == ['GET /repos/octocat/site/git/ref/heads/main']
+        assert client.not_modified == 1
+        assert client.stats()['rate_limit_remaining'] == remaining == github.rate_limit_remaining
+
+    def test_metadata_expires_after_ttl(self):
+        """Test that repo metadata is refetched once its TTL passes."""
+        github = FakeGitHub()
+        github.repos[('octocat', 'site')] = FakeRepo('octocat', 'site')
+        with StubServer(github) as server:
+            client = GitHubClient('token', HttpClient(backoff_factor=0), server.url, metadata_ttl=0)
+            client.get_repo('octocat', 'site')
+            client.get_repo('octocat', 'site')
+
+        assert github.calls.count('GET /repos/octocat/site') == 2
+        assert client.not_modified == 1
+
+    def test_client_cache_is_per_token(self):
+        """Test that the same token gets the same client and others do not."""
+        cache = GitHubClientCache(HttpClient(), max_clients=1)
+        first = cache.get('token-a')
+
+        assert cache.get('token-a') is first
+        assert cache.get('token-b') is not first
+        assert cache.get('token-a') is not first
@@ -0,0 +1,99 @@
+"""Tests for HTML optimizer module."""
+import json
+from utils.html_optimizer import HtmlOptimizer
+from utils.portfolio_generator import PortfolioGenerator
+from utils.theme_applier import ThemeApplier
+
+THEME = {'primary': '#123456', 'secondary': '#111111', 'accent': '#222222', 'background': '#ffffff', 'text': '#333333'}
+
+HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;700" rel="stylesheet">
+    <!-- generated styles -->
+    <style>
+        :root {
+            --primary: #2C3E50;
+        }
+        /* layout */
+        body { margin: 0 auto; font-family: 'Inter', sans-serif; }
+        nav a :hover { content: "a  {  b }"; }
+        body { margin: 0 auto; font-family: 'Inter', sans-serif; }
+        @font-face { font-family: Brand; src: url(brand.woff2); }
+    </style>
+</head>
+<body>
+    <pre>  keep   spacing </pre>
+    <p>Hello   <b>world</b></p>
+    <ul>
+%s
+    </ul>
+    <script>
+        function show() {
+            return 1;
+        }
+    </script>
+</body>
+</html>""" % '\n'.join(f'        <li>\n            Skill {i}\n        </li>' for i in range(20))
+
+
+class TestHtmlOptimizer:
+    """Test minification, CSS dedupe and font loading hints."""
+
+    def test_minifies_and_reports_savings(self):
+        """Test that whitespace and comments go and byte counts add up."""
+        result = HtmlOptimizer.optimize(HTML)
+        html = result['html']
+
+        assert result['bytes_saved'] == result['bytes_before'] - result['bytes_after'] > 0
+        assert "generated styles" not in html and "layout" not in html
+        assert "<p>Hello <b>world</b></p>" in html
+        assert "<pre>  keep   spacing </pre>" in html
+        assert "function show() {\nreturn 1;\n}" in html
+
+    def test_css_rules_are_deduplicated_without_changing_selectors(self):
+        """Test that repeated rules collapse while strings and descendant selectors survive."""
+        css = HtmlOptimizer.minify_css("a { color: red; }\nb :hover { content: 'x  y'; }\na { color: red; }")
+
+        assert css == "b :hover{content:'x  y'}a{color:red}"
+
+    def test_fonts_are_deferred_with_swap_and_preconnect(self):
+        """Test that Google Fonts no longer block render and use font-display: swap."""
+        html = HtmlOptimizer.optimize(HTML)['html']
+
+        assert '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>' in html
+        assert ('rel="preload" as="style" '
+                'href="https://fonts.googleapis.com/css2?family=Inter:wght@400;700&display=swap"') in html
+        assert '<noscript><link rel="stylesheet"' in html
+        assert '@font-face{font-display:swap;font-family:Brand' in html
+
+    def test_is_idempotent_and_keeps_theme_hook(self):
+        """Test that a second pass changes nothing and ThemeApplier still finds :root."""
+        once = HtmlOptimizer.optimize(HTML)['html']
+        assert HtmlOptimizer.optimize(once)['html'] == once
+        assert "--primary: #123456" in ThemeApplier.apply(once, THEME)
+
+
+class TestGeneratorOptimization:
+    """Test the optimisation stage after HTML cleaning."""
+
+    def test_generate_portfolio_returns_optimized_html(self):
+        """Test that optimize_html shrinks the document and reports bytes saved."""
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {'choices': [{'message': {'content': "```html\n" + HTML + "\n```"}}]}
+
+        class FakeClient:
+            def post(self, *args, **kwargs):
+                return FakeResponse()
+
+        generator = PortfolioGenerator("key", "url", "model", http_client=FakeClient(), optimize_html=True)
+        result = generator.generate_portfolio("resume", THEME)
+
+        assert result['success'] is True
+        assert result['bytes_saved'] > 0
+        assert result['html'] == HtmlOptimizer.optimize(HTML)['html']
+        assert json.dumps(result)
@@ -0,0 +1,198 @@
+"""Tests for pooled HTTP client module."""
+import asyncio
+import time
+import pytest
+import requests
+from utils.http_client import AsyncHttpClient, CircuitBreaker, CircuitOpenError, HttpClient
+from tests.stub_server import StubServer
+
+
+def scripted(*responses):
+    """Handler returning the given (status, headers, body) tuples in order, repeating the last."""
+    remaining = list(responses)
+
+    def handler(request):
+        return remaining.pop(0) if len(remaining) > 1 else remaining[0]
+    return handler
+
+
+class TestHttpClientRetries:
+    """Test retry behaviour against a local stub server."""
+
+    def test_success_without_retry(self):
+        """Test that a 200 response is returned directly."""
+        with StubServer(scripted((200, {}, {'ok': True}))) as server:
+            response = HttpClient(backoff_factor=0).get(server.url + '/')
+            assert response.json() == {'ok': True}
+            assert len(server.requests) == 1
+
+    def test_retries_server_errors(self):
+        """Test that 5xx responses are retried until success."""
+        with StubServer(scripted((503, {}, ''), (502, {}, ''), (200, {}, 'done'))) as server:
+            response = HttpClient(max_retries=3, backoff_factor=0).post(server.url + '/', json={'a': 1}, retry=True)
+            assert response.status_code == 200
+            assert len(server.requests) == 3
+            assert server.requests[-1].json() == {'a': 1}
+
+    def test_does_not_retry_post_by_default(self):
+        """Test that non-idempotent methods are sent once unless the caller opts in."""
+        with StubServer(scripted((503, {}, ''), (200, {}, 'done'))) as server:
+            client = HttpClient(max_retries=3, backoff_factor=0)
+            assert client.post(server.url + '/', json={'a': 1}).status_code == 503
+            assert client.request('PATCH', server.url + '/', json={'a': 1}).status_code == 200
+            assert client.request('PUT', server.url + '/', retry=False).status_code == 200
+            assert len(server.requests) == 3
+
+    def test_retries_post_turned_away_unprocessed(self):
+        """Test that a POST is resent after a 429 or a 503 with Retry-After, but not after a bare 503."""
+        with StubServer(scripted((429, {'Retry-After': '0'}, ''), (503, {'Retry-After': '0'}, ''),
+                                 (200, {}, 'done'), (503, {}, ''), (200, {}, 'done'))) as server:
+            client = HttpClient(max_retries=3, backoff_factor=0, failure_threshold=10)
+            assert client.post(server.url + '/', json={'a': 1}).status_code == 200
+            assert len(server.requests) == 3
+            assert client.post(server.url + '/', json={'a': 1}).status_code == 503
+            assert len(server.requests) == 4
+
+    def test_returns_last_response_when_retries_exhausted(self):
+        """Test that the final error response is returned after max_retries."""
+        with StubServer(scripted((500, {}, 'down'))) as server:
+            response = HttpClient(max_retries=2, backoff_factor=0, failure_threshold=10).get(server.url + '/')
+            assert response.status_code == 500
+            assert len(server.requests) == 3
+
+    def test_does_not_retry_client_errors(self):
+        """Test that 4xx responses other than 429 are not retried."""
+        with StubServer(scripted((404, {}, 'missing'))) as server:
+            response = HttpClient(backoff_factor=0).get(server.url + '/')
+            assert response.status_code == 404
+            assert len(server.requests) == 1
+
+    def test_honours_retry_after(self):
+        """Test that a 429 waits for the Retry-After delay."""
+        with StubServer(scripted((429, {'Retry-After': '0.3'}, ''), (200, {}, 'ok'))) as server:
+            client = HttpClient(backoff_factor=0)
+            start = time.monotonic()
+            response = client.get(server.url + '/')
+            assert response.status_code == 200
+            assert time.monotonic() - start >= 0.3
+
+    def test_reuses_pooled_connections(self):
+        """Test that keep-alive connections are reused across requests."""
+        with StubServer(scripted((200, {}, 'ok'))) as server:
+            client = HttpClient()
+            client.get(server.url + '/')
+            client.get(server.url + '/')
+            assert server.requests[0].headers.get('Connection', 'keep-alive').lower() == 'keep-alive'
+            pool = client.session.get_adapter(server.url).poolmanager.connection_from_url(server.url)
+            assert pool.num_connections == 1
+
+
+class TestCircuitBreaker:
+    """Test the circuit breaker state machine."""
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the circuit."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.allow() is True
+        breaker.record_failure()
+        assert breaker.state == 'open'
+        assert breaker.allow() is False
+
+    def test_half_open_allows_single_trial(self):
+        """Test that one trial request is allowed after the reset timeout."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.state == 'half-open'
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+        breaker.record_success()
+        assert breaker.state == 'closed'
+
+    def test_client_fails_fast_when_open(self):
+        """Test that the client stops calling a failing upstream."""
+        with StubServer(scripted((503, {}, ''))) as server:
+            client = HttpClient(max_retries=0, failure_threshold=2, reset_timeout=60)
+            client.get(server.url + '/')
+            client.get(server.url + '/')
+
+            with pytest.raises(CircuitOpenError):
+                client.get(server.url + '/')
+            assert len(server.requests) == 2
+
+    def test_trial_released_when_request_never_completes(self):
+        """Test that a half-open trial failing before any response does not lock the host out."""
+        with StubServer(scripted((200, {}, 'ok'))) as server:
+            client = HttpClient(max_retries=0, failure_threshold=1, reset_timeout=0)
+            client.breaker_for(server.url + '/').record_failure()
+
+            with pytest.raises(requests.exceptions.InvalidHeader):
+                client.get(server.url + '/', headers={'X-Bad': 'a\nb'})
+            assert client.get(server.url + '/').status_code == 200
+            assert client.breaker_for(server.url + '/').state == 'closed'
+
+    def test_circuit_open_error_is_a_request_exception(self):
+        """Test that callers handling RequestException also handle an open circuit."""
+        assert issubclass(CircuitOpenError, requests.exceptions.RequestException)
+
+
+class TestAsyncHttpClient:
+    """Test the asyncio client against a local stub server."""
+
+    def test_async_retries_server_errors(self):
+        """Test that the async client retries 5xx responses."""
+        with StubServer(scripted((503, {}, ''), (200, {}, {'ok': True}))) as server:
+            async def call():
+                client = AsyncHttpClient(backoff_factor=0)
+                response = await client.get(server.url + '/')
+                await client.aclose()
+                return response
+
+            response = asyncio.run(call())
+            assert response.json() == {'ok': True}
+            assert len(server.requests) == 2
+
+    def test_async_does_not_retry_post_by_default(self):
+        """Test that the async client also sends a POST only once unless asked to retry."""
+        with StubServer(scripted((503, {}, ''), (503, {}, ''), (200, {}, 'ok'))) as server:
+            async def call():
+                client = AsyncHttpClient(backoff_factor=0, failure_threshold=10)
+                first = await client.post(server.url + '/', json={})
+                second = await client.post(server.url + '/', json={}, retry=True)
+                await client.aclose()
+                return first, second
+
+            first, second = asyncio.run(call())
+            assert (first.status_code, second.status_code) == (503, 200)
+            assert len(server.requests) == 3
+
+    def test_async_cancelled_trial_is_released(self):
+        """Test that cancelling a half-open trial lets the next request through."""
+        def handler(request):
+            time.sleep(0.3)
+            return 200, {}, 'ok'
+
+        with StubServer(handler) as server:
+            async def call():
+                client = AsyncHttpClient(max_retries=0, failure_threshold=1, reset_timeout=0)
+                client.breaker_for(server.url + '/').record_failure()
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.get(server.url + '/'), 0.05)
+                response = await client.get(server.url + '/')
+                await client.aclose()
+                return response
+
+            assert asyncio.run(call()).status_code == 200
+
+    def test_async_concurrent_requests_share_one_loop(self):
+        """Test that many requests can be in flight on a single event loop."""
+        with StubServer(scripted((200, {}, 'ok'))) as server:
+            async def call():
+                client = AsyncHttpClient(pool_size=5)
+                responses = await asyncio.gather(*(client.get(server.url + '/') for _ in range(20)))
+                await client.aclose()
+                return responses
+
+            responses = asyncio.run(call())
+            assert all(response.status_code == 200 for response in responses)
+            assert len(server.requests) == 20
@@ -0,0 +1,128 @@
+"""Tests for background job queue module."""
+import threading
+import time
+import pytest
+from utils.job_queue import JobQueue, QueueFullError
+
+
+def wait_for(job, timeout=5):
+    """Block until the job finishes or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("Job did not finish in time")
+
+
+class TestJobQueue:
+    """Test job submission and status tracking."""
+
+    def test_submit_returns_queued_job(self):
+        """Test that submit returns immediately with a job id."""
+        queue = JobQueue(max_workers=1)
+        job = queue.submit('user-1', 'generate', lambda job: {'success': True})
+
+        assert job.id
+        assert queue.get(job.id) is job
+        wait_for(job)
+        queue.shutdown()
+
+    def test_job_completes_with_result(self):
+        """Test that a successful job stores its result."""
+        queue = JobQueue(max_workers=1)
+
+        def work(job, value):
+            job.set_stage('generating')
+            return {'success': True, 'value': value}
+
+        job = wait_for(queue.submit('user-1', 'generate', work, 42))
+
+        assert job.status == 'completed'
+        assert job.stage == 'generating'
+        assert job.result['value'] == 42
+        queue.shutdown()
+
+    def test_job_fails_on_error_result(self):
+        """Test that a result with success False marks the job failed."""
+        queue = JobQueue(max_workers=1)
+        job = wait_for(queue.submit('user-1', 'generate', lambda job: {'success': False, 'error': 'boom'}))
+
+        assert job.status == 'failed'
+        assert job.error == 'boom'
+        queue.shutdown()
+
+    def test_job_fails_on_exception(self):
+        """Test that an exception in the job function marks the job failed."""
+        queue = JobQueue(max_workers=1)
+
+        def work(job):
+            raise RuntimeError('parser crashed')
+
+        job = wait_for(queue.submit('user-1', 'generate', work))
+
+        assert job.status == 'failed'
+        assert 'parser crashed' in job.error
+        queue.shutdown()
+
+    def test_get_restricts_to_owner(self):
+        """Test that other users cannot see a job."""
+        queue = JobQueue(max_workers=1)
+        job = wait_for(queue.submit('user-1', 'generate', lambda job: {'success': True}))
+
+        assert queue.get(job.id, owner='user-1') is job
+        assert queue.get(job.id, owner='user-2') is None
+        assert queue.get('missing') is None
+        queue.shutdown()
+
+    def test_submit_rejects_when_full(self):
+        """Test that the queue refuses work beyond max_pending."""
+        queue = JobQueue(max_workers=1, max_pending=1)
+        release = threading.Event()
+        job = queue.submit('user-1', 'generate', lambda job: release.wait(5))
+
+        with pytest.raises(QueueFullError):
+            queue.submit('user-1', 'generate', lambda job: None)
+
+        release.set()
+        wait_for(job)
+        queue.shutdown()
+
+    def test_submit_once_coalesces_in_flight_duplicates(self):
+        """Test that a duplicate key joins the unfinished job instead of running again."""
+        queue = JobQueue(max_workers=2)
+        release = threading.Event()
+        calls = []
+
+        def work(job):
+            calls.append(job.id)
+            release.wait(5)
+            return {'success': True}
+
+        job = queue.submit_once('user-1', 'deploy', 'hash-a', work)
+        assert queue.submit_once('user-1', 'deploy', 'hash-a', work) is job
+        other_user = queue.submit_once('user-2', 'deploy', 'hash-a', work)
+        other_content = queue.submit_once('user-1', 'deploy', 'hash-b', work)
+        assert len({job.id, other_user.id, other_content.id}) == 3
+
+        release.set()
+        for submitted in (job, other_user, other_content):
+            wait_for(submitted)
+        assert len(calls) == 3
+
+        # Once finished, the same key runs again
+        rerun = wait_for(queue.submit_once('user-1', 'deploy', 'hash-a', work))
+        assert rerun is not job
+        queue.shutdown()
+
+    def test_to_dict_contains_status_fields(self):
+        """Test the serialised job status."""
+        queue = JobQueue(max_workers=1)
+        job = wait_for(queue.submit('user-1', 'generate', lambda job: {'success': True}))
+        data = job.to_dict()
+
+        assert data['id'] == job.id
+        assert data['kind'] == 'generate'
+        assert data['status'] == 'completed'
+        assert 'owner' not in data
+        queue.shutdown()
@@ -0,0 +1,195 @@
+"""Tests for LLM backend routing and hedging module."""
+import asyncio
+import time
+import pytest
+from utils.http_client import AsyncHttpClient, CircuitOpenError, HttpClient
+from utils.llm_router import LatencyTracker, LlmBackend, LlmRouter
+from tests.stub_server import StubServer
+
+
+def completion(name, delay=0.0):
+    """Handler answering with a completion naming the backend after a delay."""
+    def handler(request):
+        time.sleep(delay)
+        return 200, {}, {'choices': [{'message': {'content': name}}], 'model': request.json()['model']}
+    return handler
+
+
+def failing(status):
+    """Handler answering every request with an error status at once."""
+    return lambda request: (status, {}, {'error': 'unavailable'})
+
+
+def backend(name, server):
+    return LlmBackend(name, server.url + '/chat/completions', f'{name}-key', f'{name}-model')
+
+
+class TestLatencyTracker:
+    """Test the latency window."""
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles over the window."""
+        tracker = LatencyTracker(window=10)
+        assert tracker.percentile(95) is None
+        for seconds in range(1, 21):
+            tracker.record(seconds)
+
+        assert len(tracker) == 10
+        assert tracker.percentile(50) == 15
+        assert tracker.percentile(95) == 20
+
+
+class TestLlmRouterRouting:
+    """Test backend ranking."""
+
+    def test_unmeasured_backends_keep_configured_order(self):
+        """Test that the first configured backend is primary before any latency is known."""
+        with StubServer(completion('a')) as a, StubServer(completion('b')) as b:
+            router = LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0))
+            chosen, response = router.post({'messages': []}, timeout=5)
+
+            assert chosen.name == 'a'
+            assert response.json()['model'] == 'a-model'
+            assert a.requests[0].headers['Authorization'] == 'Bearer a-key'
+            assert not b.requests
+
+    def test_routes_to_fastest_backend(self):
+        """Test that the backend with the lower median latency becomes primary."""
+        with StubServer(completion('a')) as a, StubServer(completion('b')) as b:
+            slow, fast = backend('a', a), backend('b', b)
+            for _ in range(5):
+                slow.latency.record(3.0)
+                fast.latency.record(0.5)
+            router = LlmRouter([slow, fast], HttpClient(backoff_factor=0))
+
+            assert [item.name for item in router.ranked()] == ['b', 'a']
+            assert router.post({'messages': []}, timeout=5)[0].name == 'b'
+
+    def test_skips_backend_with_open_circuit(self):
+        """Test that a backend whose breaker is open is not used."""
+        with StubServer(completion('a')) as a, StubServer(completion('b')) as b:
+            client = HttpClient(backoff_factor=0, failure_threshold=1)
+            router = LlmRouter([backend('a', a), backend('b', b)], client)
+            client.breaker_for(a.url).record_failure()
+
+            assert router.post({'messages': []}, timeout=5)[0].name == 'b'
+            assert not a.requests
+
+            client.breaker_for(b.url).record_failure()
+            with pytest.raises(CircuitOpenError):
+                router.post({'messages': []}, timeout=5)
+
+    def test_async_uses_async_client_breaker(self):
+        """Test that apost skips a backend whose breaker is open in the async client, not the sync one."""
+        with StubServer(completion('a')) as a, StubServer(completion('b')) as b:
+            async_client = AsyncHttpClient(backoff_factor=0, failure_threshold=1)
+            router = LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0), async_client)
+            async_client.breaker_for(a.url).record_failure()
+
+            chosen, _ = asyncio.run(router.apost({'messages': []}, timeout=5))
+            assert chosen.name == 'b'
+            assert not a.requests
+            assert [item.name for item in router.ranked()] == ['b', 'a']
+            assert [item.name for item in router.ranked(async_client)] == ['b']
+
+
+class TestLlmRouterHedging:
+    """Test hedged requests against slow stub backends."""
+
+    def test_hedge_wins_when_primary_is_slow(self):
+        """Test that a slow primary is hedged and the faster answer returned."""
+        with StubServer(completion('a', delay=1.0)) as a, StubServer(completion('b')) as b:
+            router = LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0),
+                               default_hedge_delay=0.1)
+            start = time.monotonic()
+            chosen, response = router.post({'messages': []}, timeout=5)
+
+            assert chosen.name == 'b'
+            assert response.json()['choices'][0]['message']['content'] == 'b'
+            assert time.monotonic() - start < 0.9
+            assert router.hedges == 1
+            assert router.hedge_wins == 1
+
+    def test_fast_primary_is_not_hedged(self):
+        """Test that no second request is sent when the primary answers in time."""
+        with StubServer(completion('a')) as a, StubServer(completion('b')) as b:
+            router = LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0),
+                               default_hedge_delay=1.0)
+            assert router.post({'messages': []}, timeout=5)[0].name == 'a'
+            assert router.hedges == 0
+            assert not b.requests
+            assert len(router.backends[0].latency) == 1
+
+    def test_hedge_delay_follows_p95(self):
+        """Test that the hedge threshold tracks the p95 latency, floored at the minimum."""
+        with StubServer(completion('a')) as a:
+            primary = backend('a', a)
+            router = LlmRouter([primary], HttpClient(), min_hedge_delay=0.5, default_hedge_delay=30, min_samples=3)
+            assert router.hedge_delay(primary) == 30
+
+            for seconds in (0.1, 0.2, 0.3):
+                primary.latency.record(seconds)
+            assert router.hedge_delay(primary) == 0.5
+
+            primary.latency.record(4.0)
+            assert router.hedge_delay(primary) == 4.0
+
+    def test_async_hedge_cancels_slow_primary(self):
+        """Test that the async path returns the hedge and cancels the loser."""
+        with StubServer(completion('a', delay=1.0)) as a, StubServer(completion('b')) as b:
+            router = LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0),
+                               AsyncHttpClient(backoff_factor=0), default_hedge_delay=0.1)
+
+            async def run():
+                start = time.monotonic()
+                result = await router.apost({'messages': []}, timeout=5)
+                return result, time.monotonic() - start
+
+            (chosen, response), elapsed = asyncio.run(run())
+            assert chosen.name == 'b'
+            assert response.json()['model'] == 'b-model'
+            assert elapsed < 0.9
+            assert router.hedge_wins == 1
+
+    def test_cancelled_trial_lets_backend_recover(self):
+        """Test that a half-open backend losing the hedge is tried again, and skipped while its trial is out."""
+        with StubServer(completion('a', delay=1.0)) as a, StubServer(completion('b')) as b:
+            async_client = AsyncHttpClient(backoff_factor=0, failure_threshold=1, reset_timeout=0)
+            router = LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0),
+                               async_client, default_hedge_delay=0.1)
+            async_client.breaker_for(a.url).record_failure()
+
+            chosen, _ = asyncio.run(router.apost({'messages': []}, timeout=5))
+            assert chosen.name == 'b'
+            assert [item.name for item in router.ranked(async_client)] == ['b', 'a']
+
+            assert async_client.breaker_for(a.url).allow() is True
+            assert [item.name for item in router.ranked(async_client)] == ['b']
+
+    def test_fast_failure_fails_over(self):
+        """Test that a primary erroring before the hedge delay is followed at once by the next backend."""
+        with StubServer(failing(503)) as a, StubServer(completion('b')) as b:
+            def make_router():
+                return LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0),
+                                 AsyncHttpClient(backoff_factor=0), default_hedge_delay=5)
+            router, async_router = make_router(), make_router()
+            start = time.monotonic()
+            chosen, response = router.post({'messages': []}, timeout=5)
+            async_chosen, _ = asyncio.run(async_router.apost({'messages': []}, timeout=5))
+
+            assert (chosen.name, async_chosen.name) == ('b', 'b')
+            assert response.status_code == 200
+            assert time.monotonic() - start < 2
+            assert (router.failovers, async_router.failovers, router.hedges) == (1, 1, 0)
+            assert len(a.requests) == 2
+
+    def test_client_errors_do_not_fail_over(self):
+        """Test that a 4xx other than 429 is returned as is: another backend would refuse it too."""
+        with StubServer(failing(400)) as a, StubServer(completion('b')) as b:
+            router = LlmRouter([backend('a', a), backend('b', b)], HttpClient(backoff_factor=0),
+                               default_hedge_delay=5)
+            chosen, response = router.post({'messages': []}, timeout=5)
+
+            assert (chosen.name, response.status_code) == ('a', 400)
+            assert router.failovers == 0
+            assert not b.requests
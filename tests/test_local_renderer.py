@@ -0,0 +1,153 @@
+"""Tests for local template renderer module."""
+from utils.local_renderer import LocalRenderer
+from utils.pipeline import PortfolioPipeline
+from utils.resume_parser import ResumeParser
+from utils.theme_applier import ThemeApplier
+
+THEME = {'primary': '#123456', 'secondary': '#111111', 'accent': '#222222', 'background': '#ffffff', 'text': '#333333'}
+
+RESUME_TEXT = """Jane Doe
+Backend Engineer
+
+Summary
+Builds reliable <services>.
+
+Experience
+Senior Engineer
+Acme Corp, 2019 - 2023
+• Led migration to Go
+• Cut latency 40%
+
+Skills
+Python, Go
+• Kubernetes
+"""
+
+
+def parsed(text=RESUME_TEXT):
+    return {
+        'filtered_text': text,
+        'sections': ResumeParser.extract_sections(text),
+        'prompt_text': text,
+        'has_content': True
+    }
+
+
+class TestLocalRenderer:
+    """Test building the page from resume sections."""
+
+    def test_build_context_structures_sections(self):
+        """Test that intro, entries and skills are extracted."""
+        context = LocalRenderer().build_context(ResumeParser.extract_sections(RESUME_TEXT), RESUME_TEXT, THEME)
+
+        assert context['name'] == "Jane Doe"
+        assert context['headline'] == "Backend Engineer"
+        sections = {section['id']: section for section in context['sections']}
+        assert sections['experience']['entries'] == [{
+            'title': "Senior Engineer",
+            'subtitle': "Acme Corp, 2019 - 2023",
+            'details': ["Led migration to Go", "Cut latency 40%"]
+        }]
+        assert sections['skills']['skills'] == ["Python", "Go", "Kubernetes"]
+
+    def test_scrubbed_lines_keep_their_other_text(self):
+        """Test that PII placeholders are cut out of a line, and only placeholder-only lines dropped."""
+        text = ("Jane Doe\nBackend Engineer | [EMAIL REMOVED] | [PHONE NUMBER REMOVED] | Boston\n"
+                "Email: [EMAIL REMOVED]\n\nExperience\nSenior Engineer\nAcme Corp, [ADDRESS REMOVED], 2019 - 2023\n"
+                "• Led migration to Go\n")
+        context = LocalRenderer().build_context(ResumeParser.extract_sections(text), text, THEME)
+
+        assert context['headline'] == "Backend Engineer | Boston"
+        assert "REMOVED" not in str(context)
+        experience = next(section for section in context['sections'] if section['id'] == 'experience')
+        assert experience['entries'] == [{
+            'title': "Senior Engineer",
+            'subtitle': "Acme Corp, 2019 - 2023",
+            'details': ["Led migration to Go"]
+        }]
+
+    def test_render_escapes_and_declares_theme(self):
+        """Test that resume text is escaped and colours live in :root."""
+        html = LocalRenderer().render(ResumeParser.extract_sections(RESUME_TEXT), RESUME_TEXT, THEME)
+
+        assert html.startswith("<!DOCTYPE html>")
+        assert "&lt;services&gt;" in html
+        assert "--primary: #123456" in html
+        assert "IntersectionObserver" in html
+        assert "--primary: #abcdef" in ThemeApplier.apply(html, dict(THEME, primary='#abcdef'))
+
+    def test_render_without_headers_uses_text(self):
+        """Test that a resume without section headers still renders."""
+        text = "Jane Doe\nEngineer\nLikes building things."
+        html = LocalRenderer().render(ResumeParser.extract_sections(text), text, THEME)
+        assert "Jane Doe" in html
+        assert "Likes building things." in html
+
+
+class FailingGenerator:
+    def generate_portfolio(self, *args, **kwargs):
+        return {'success': False, 'error': 'Portfolio generation timed out. Please try again.', 'html': None}
+
+    def save_portfolio(self, html_content, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        return True
+
+
+class FakeParser:
+    @staticmethod
+    def parse(file_path):
+        return parsed()
+
+
+class TestPipelineRenderers:
+    """Test renderer selection and fallback in the pipeline."""
+
+    def test_local_renderer_skips_llm(self, tmp_path):
+        """Test that renderer='local' never calls the generator."""
+        class ExplodingGenerator(FailingGenerator):
+            def generate_portfolio(self, *args, **kwargs):
+                raise AssertionError("LLM should not be called")
+
+        pipeline = PortfolioPipeline(ExplodingGenerator(), str(tmp_path), {'blue': THEME}, parser=FakeParser)
+        result = pipeline.run("resume.pdf", 'blue', renderer='local')
+
+        assert result['success'] is True
+        assert result['renderer'] == 'local'
+        assert "Jane Doe" in (tmp_path / result['filename']).read_text(encoding='utf-8')
+
+    def test_fallback_renders_locally_when_llm_fails(self, tmp_path):
+        """Test that a failed generation is rendered locally when fallback is on."""
+        pipeline = PortfolioPipeline(FailingGenerator(), str(tmp_path), {'blue': THEME},
+                                     parser=FakeParser, fallback=True)
+        result = pipeline.run("resume.pdf", 'blue')
+
+        assert result['success'] is True
+        assert result['renderer'] == 'local'
+
+    def test_failure_reported_without_fallback(self, tmp_path):
+        """Test that the LLM error is returned when fallback is off."""
+        pipeline = PortfolioPipeline(FailingGenerator(), str(tmp_path), {'blue': THEME}, parser=FakeParser)
+        result = pipeline.run("resume.pdf", 'blue')
+
+        assert result['success'] is False
+        assert "timed out" in result['error']
+
+    def test_structured_renderer_renders_model_content(self, tmp_path):
+        """Test that renderer='structured' renders the model's JSON content server-side."""
+        class ContentGenerator(FailingGenerator):
+            def generate_content(self, resume_content, progress=None):
+                return {'success': True, 'content': {
+                    'name': 'Jane Model', 'title': 'Engineer', 'summary': 'Hi.', 'projects': [],
+                    'experience': [{'role': 'Lead', 'company': 'Acme', 'dates': '2020', 'highlights': ['Shipped']}],
+                    'skills': ['Go'], 'education': []
+                }, 'error': None, 'cached': False, 'prompt_tokens': 99}
+
+        pipeline = PortfolioPipeline(ContentGenerator(), str(tmp_path), {'blue': THEME}, parser=FakeParser)
+        result = pipeline.run("resume.pdf", 'blue', renderer='structured')
+
+        html = (tmp_path / result['filename']).read_text(encoding='utf-8')
+        assert result['renderer'] == 'structured'
+        assert result['prompt_tokens'] == 99
+        assert "Jane Model" in html
+        assert "Acme · 2020" in html
@@ -0,0 +1,144 @@
+"""Tests for metrics module."""
+import io
+
+import docx
+import pytest
+
+from utils.http_client import HttpClient
+from utils.metrics import Metrics, configure_default_metrics, default_metrics
+from utils.pipeline import PortfolioPipeline
+from utils.portfolio_generator import PortfolioGenerator
+from tests.stub_server import StubServer
+
+THEME = {'primary': '#123456', 'secondary': '#111111', 'accent': '#222222', 'background': '#ffffff', 'text': '#333333'}
+
+
+@pytest.fixture
+def registry():
+    """Fresh default registry for the duration of a test."""
+    previous = default_metrics()
+    metrics = Metrics()
+    configure_default_metrics(metrics)
+    yield metrics
+    configure_default_metrics(previous)
+
+
+class FakeTracer:
+    """Tracer stand-in recording the spans it is asked to open."""
+
+    def __init__(self):
+        self.spans = []
+
+    def start_as_current_span(self, name, attributes=None):
+        tracer = self
+
+        class Span:
+            def __enter__(self):
+                tracer.spans.append([name, attributes, 'open'])
+                return self
+
+            def __exit__(self, exc_type, exc, tb):
+                tracer.spans[-1][2] = 'error' if exc_type else 'ok'
+        return Span()
+
+
+class TestMetricsRegistry:
+    """Test metric types, stages and the text exposition format."""
+
+    def test_render_counters_and_histograms(self):
+        """Test that samples render with escaped labels and cumulative buckets."""
+        metrics = Metrics(namespace='app')
+        metrics.counter('requests_total', 'Requests', ('path',)).inc(2, path='/a"b')
+        latency = metrics.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            latency.observe(value)
+
+        text = metrics.render()
+
+        assert 'app_requests_total{path="/a\\"b"} 2' in text
+        assert 'app_latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'app_latency_seconds_bucket{le="1"} 2' in text
+        assert 'app_latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'app_latency_seconds_count 3' in text
+        assert '# TYPE app_latency_seconds histogram' in text
+        with pytest.raises(ValueError):
+            metrics.gauge('requests_total', 'Requests', ('path',))
+        metrics.gauge('jobs', 'Jobs')
+        with pytest.raises(ValueError):
+            metrics.counter('jobs', 'Jobs')
+
+    def test_stage_times_errors_and_spans(self):
+        """Test that stages are timed, failures counted and spans closed with the outcome."""
+        metrics = Metrics()
+        metrics.tracer = FakeTracer()
+
+        with metrics.stage('parse', renderer='local'):
+            pass
+        with pytest.raises(RuntimeError):
+            with metrics.stage('save'):
+                raise RuntimeError('disk full')
+
+        assert metrics.stage_seconds.count(stage='parse') == 1
+        assert metrics.stage_errors.value(stage='save') == 1
+        assert metrics.tracer.spans == [['portfolio.parse', {'renderer': 'local'}, 'ok'],
+                                        ['portfolio.save', {}, 'error']]
+
+    def test_disabled_records_nothing(self):
+        """Test that a disabled registry hands out a no-op stage and ignores observations."""
+        metrics = Metrics(enabled=False, tracing=True)
+
+        with metrics.stage('parse'):
+            pass
+        metrics.observe_tokens({'prompt_tokens': 10})
+
+        assert metrics.tracer is None
+        assert metrics.stage_seconds.count(stage='parse') == 0
+        assert metrics.llm_tokens.value(kind='prompt') == 0
+
+    def test_failing_collector_does_not_break_scrape(self):
+        """Test that collectors refresh values and one failing collector is skipped."""
+        metrics = Metrics()
+        metrics.add_collector(lambda m: m.gauge('jobs_pending', 'Jobs').set(3))
+        metrics.add_collector(lambda m: 1 / 0)
+
+        assert 'portfolio_jobs_pending 3' in metrics.render()
+
+
+class TestInstrumentation:
+    """Test that the hot paths report to the default registry."""
+
+    def test_upstream_statuses_and_tokens(self, registry):
+        """Test that HTTP attempts are counted by status and LLM usage by token kind."""
+        html = "<!DOCTYPE html><html><head></head><body>" + "x" * 100 + "</body></html>"
+        completion = {'choices': [{'message': {'content': html}}],
+                      'usage': {'prompt_tokens': 120, 'completion_tokens': 80}}
+        responses = [(503, {}, ''), (200, {}, completion)]
+
+        with StubServer(lambda request: responses.pop(0)) as server:
+            generator = PortfolioGenerator("key", server.url + "/chat/completions", "model",
+                                           http_client=HttpClient(backoff_factor=0))
+            # Completions are POSTs and not retried, so the 503 fails the first call
+            assert generator.generate_portfolio("resume", THEME)['success'] is False
+            assert generator.generate_portfolio("resume", THEME)['success'] is True
+            host = server.url.split('//', 1)[1]
+
+        assert registry.upstream_responses.value(host=host, status='503') == 1
+        assert registry.upstream_responses.value(host=host, status='200') == 1
+        assert registry.llm_tokens.value(kind='prompt') == 120
+        assert registry.llm_tokens.value(kind='completion') == 80
+        assert registry.stage_seconds.count(stage='llm_request') == 2
+        assert registry.stage_seconds.count(stage='html_validate') == 1
+
+    def test_pipeline_stages(self, registry, tmp_path):
+        """Test that a run times parsing (with the parser's own split), generation and saving."""
+        document = docx.Document()
+        for line in ("Jane Doe", "Skills", "Python, Go"):
+            document.add_paragraph(line)
+        buffer = io.BytesIO()
+        document.save(buffer)
+
+        pipeline = PortfolioPipeline(PortfolioGenerator("key", "url", "model"), str(tmp_path), {'blue': THEME})
+        assert pipeline.run(buffer.getvalue(), 'blue', renderer='local')['success'] is True
+
+        for stage in ('parse', 'extract', 'pii_filter', 'generate', 'save'):
+            assert registry.stage_seconds.count(stage=stage) == 1
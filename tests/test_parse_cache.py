@@ -0,0 +1,85 @@
+"""Tests for parse cache module."""
+import asyncio
+import io
+import json
+import os
+
+import docx
+
+from utils.parse_cache import ParseCache
+from utils.resume_parser import ResumeParser
+from utils.storage import LocalStorage
+
+RESUME_TEXT = "Jane Doe\nSkills\nPython, Go\nExperience\nAcme Corp"
+
+
+def resume_bytes(text=RESUME_TEXT):
+    document = docx.Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class CountingParser:
+    """ResumeParser stand-in that records how often it really parses."""
+
+    def __init__(self, **options):
+        self.calls = 0
+        self.options = options
+
+    def parse(self, source):
+        self.calls += 1
+        return ResumeParser.parse(source, **self.options)
+
+
+class TestParseCache:
+    """Test memory and disk tiers, keys and metrics."""
+
+    def test_repeat_upload_skips_parsing(self):
+        """Test that the same bytes in any form parse once and the hit rate is reported."""
+        parser = CountingParser(prompt_sections=['skills'])
+        cache = ParseCache(parser, prompt_sections=['skills'])
+        data = resume_bytes()
+
+        first = cache.parse(data)
+        second = cache.parse(io.BytesIO(data))
+        third = cache.parse(memoryview(data))
+
+        assert parser.calls == 1
+        assert second['filtered_text'] == first['filtered_text']
+        assert second['prompt_text'] == first['prompt_text'] == "SKILLS\nPython, Go"
+        assert second['raw_text'] is None and third['cached'] is True
+        assert cache.stats() == {'memory_hits': 2, 'disk_hits': 0, 'misses': 1, 'hit_rate': 2 / 3, 'size': 1}
+
+    def test_disk_tier_survives_restart_without_raw_text(self, tmp_path):
+        """Test that a new cache finds results on disk, which hold no raw text."""
+        data = resume_bytes("Jane Doe\nCall 555-123-4567")
+        ParseCache(CountingParser(), disk=LocalStorage(str(tmp_path))).parse(data)
+
+        stored = [name for name in os.listdir(tmp_path) if name.endswith('.json')]
+        with open(tmp_path / stored[0], encoding='utf-8') as f:
+            entry = json.load(f)
+        assert set(entry) == {'filtered_text', 'sections', 'truncated'}
+        assert "555-123-4567" not in json.dumps(entry)
+
+        parser = CountingParser()
+        restarted = ParseCache(parser, disk=LocalStorage(str(tmp_path)))
+        assert asyncio.run(restarted.aparse(data))['has_content'] is True
+        assert parser.calls == 0
+        assert restarted.stats()['disk_hits'] == 1
+
+    def test_lru_bound_and_fingerprint(self):
+        """Test that the memory tier is bounded and settings changes miss."""
+        parser = CountingParser()
+        cache = ParseCache(parser, max_entries=1)
+        first, second = resume_bytes("First"), resume_bytes("Second")
+
+        cache.parse(first)
+        cache.parse(second)
+        cache.parse(first)
+        assert parser.calls == 3
+        assert cache.stats()['size'] == 1
+
+        assert ParseCache(fingerprint='a').make_key(first) != ParseCache(fingerprint='b').make_key(first)
@@ -0,0 +1,173 @@
+"""Tests for process-pool resume parsing module."""
+import asyncio
+import io
+import os
+import threading
+import time
+import docx
+import pytest
+from utils.parser_pool import ParserPool, ParseTimeoutError
+
+
+def slow_parse(file_path):
+    """Parse function that never finishes in time."""
+    time.sleep(30)
+
+
+def worker_pid(file_path):
+    """Parse function reporting which worker process ran it."""
+    return os.getpid()
+
+
+def timed_parse(payload):
+    """Parse function sleeping for the number of seconds in the payload, then reporting its worker."""
+    time.sleep(float(payload))
+    return os.getpid()
+
+
+def allocate(file_path):
+    """Parse function that exceeds the worker memory cap."""
+    return len(bytearray(256 * 1024 * 1024))
+
+
+@pytest.fixture
+def resume_docx(tmp_path):
+    """A small DOCX resume on disk."""
+    document = docx.Document()
+    document.add_paragraph("Jane Doe")
+    document.add_paragraph("Experience")
+    document.add_paragraph("Engineer at Example Corp, call 555-123-4567")
+    path = tmp_path / "resume.docx"
+    document.save(str(path))
+    return str(path)
+
+
+class TestParserPool:
+    """Test parsing in worker processes."""
+
+    def test_parse_in_worker_process(self, resume_docx):
+        """Test that a worker returns the usual parse result."""
+        pool = ParserPool(max_workers=1)
+        try:
+            result = pool.parse(resume_docx)
+        finally:
+            pool.shutdown()
+
+        assert result['has_content'] is True
+        assert "Engineer at Example Corp" in result['filtered_text']
+        assert "555-123-4567" not in result['filtered_text']
+
+    def test_parse_from_memory(self, resume_docx):
+        """Test that bytes, memoryviews and streams reach the worker without a file on disk."""
+        with open(resume_docx, 'rb') as f:
+            data = f.read()
+        pool = ParserPool(max_workers=1)
+        try:
+            results = [pool.parse(source) for source in (data, memoryview(data), io.BytesIO(data))]
+        finally:
+            pool.shutdown()
+
+        assert all("Engineer at Example Corp" in result['filtered_text'] for result in results)
+
+    def test_timeout_kills_worker_and_pool_recovers(self, resume_docx):
+        """Test that a stuck document fails fast and later documents still parse."""
+        pool = ParserPool(max_workers=1, timeout=0.5, parse_func=slow_parse)
+        try:
+            start = time.monotonic()
+            with pytest.raises(ParseTimeoutError):
+                pool.parse(resume_docx)
+            assert time.monotonic() - start < 10
+
+            pool.parse_func = worker_pid
+            assert pool.parse(resume_docx) != os.getpid()
+        finally:
+            pool.shutdown()
+
+    def test_memory_limit_fails_document(self, resume_docx):
+        """Test that a document exceeding the memory cap fails in isolation."""
+        pool = ParserPool(max_workers=1, memory_limit_mb=128, parse_func=allocate)
+        try:
+            with pytest.raises(MemoryError):
+                pool.parse(resume_docx)
+        finally:
+            pool.shutdown()
+
+    def test_workers_are_recycled(self, resume_docx):
+        """Test that a worker is replaced after max_tasks_per_child documents."""
+        pool = ParserPool(max_workers=1, max_tasks_per_child=1, parse_func=worker_pid)
+        try:
+            first = pool.parse(resume_docx)
+            second = pool.parse(resume_docx)
+        finally:
+            pool.shutdown()
+
+        assert first != second
+
+    def test_timeout_counts_only_execution(self):
+        """Test that waiting for a busy worker does not count against a document's timeout."""
+        pool = ParserPool(max_workers=1, timeout=1.0, parse_func=timed_parse)
+        results = []
+        try:
+            threads = [threading.Thread(target=lambda: results.append(pool.parse(b'0.6'))) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            pool.shutdown()
+
+        # 1.8s of work through one worker, yet no document ran for longer than its 1s budget
+        assert len(results) == 3
+
+    def test_timeout_kills_only_the_stuck_worker(self):
+        """Test that a parse running alongside a stuck one finishes on its own worker."""
+        pool = ParserPool(max_workers=2, timeout=1.0, parse_func=timed_parse)
+        outcomes = {}
+        try:
+            # Start both workers up front so spawning does not skew the timings
+            warm = [threading.Thread(target=pool.parse, args=(b'0.2',)) for _ in range(2)]
+            for thread in warm:
+                thread.start()
+            for thread in warm:
+                thread.join()
+
+            def run(name, payload):
+                try:
+                    outcomes[name] = pool.parse(payload)
+                except ParseTimeoutError as e:
+                    outcomes[name] = e
+
+            stuck = threading.Thread(target=run, args=('stuck', b'30'))
+            stuck.start()
+            time.sleep(0.5)
+            # Still running when the stuck document's worker is killed at the 1s mark
+            run('healthy', b'0.8')
+            stuck.join()
+        finally:
+            pool.shutdown()
+
+        assert isinstance(outcomes['stuck'], ParseTimeoutError)
+        assert isinstance(outcomes['healthy'], int)
+
+    def test_cancelled_aparse_returns_its_worker(self):
+        """Test that an aparse cancelled while waiting for a worker does not keep the worker it gets."""
+        pool = ParserPool(max_workers=1, timeout=5.0, parse_func=timed_parse)
+        busy = threading.Thread(target=pool.parse, args=(b'0.5',))
+
+        async def run():
+            waiting = asyncio.ensure_future(pool.aparse(b'0'))
+            await asyncio.sleep(0.1)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            # The abandoned acquisition gets the worker once the busy parse ends, then gives it back
+            return await asyncio.wait_for(pool.aparse(b'0'), timeout=10)
+
+        try:
+            pool.parse(b'0')
+            busy.start()
+            time.sleep(0.1)
+            assert isinstance(asyncio.run(run()), int)
+            busy.join()
+        finally:
+            pool.shutdown()
@@ -0,0 +1,53 @@
+"""Tests for single-pass PII scrubber module."""
+import time
+import pytest
+from utils.pii_scrubber import PiiRule, PiiScrubber
+
+
+class TestPiiScrubberDefaults:
+    """Test the default phone/address/zip rules."""
+
+    def test_scrubs_all_default_kinds_in_one_pass(self):
+        """Test that phone numbers, addresses and zip codes are all replaced."""
+        text = "Call 555-123-4567, 42 Oak Avenue, Springfield 12345"
+        scrubbed = PiiScrubber().scrub(text)
+        assert scrubbed == "Call [PHONE NUMBER REMOVED], [ADDRESS REMOVED], Springfield [ZIP REMOVED]"
+
+    def test_address_does_not_span_lines(self):
+        """Test that an address match cannot run across a line break."""
+        text = "2016 - 2019\nSenior product at Example 54 Inc"
+        assert PiiScrubber().scrub(text) == text
+
+    def test_address_needs_whole_word_suffix(self):
+        """Test that a suffix inside a longer word is not treated as a street type."""
+        text = "2019 Senior product manager"
+        assert PiiScrubber().scrub(text) == text
+
+    def test_long_line_is_linear(self):
+        """Test that a long run of words after a number does not backtrack."""
+        line = "1 " + "a " * 50000
+        start = time.monotonic()
+        assert PiiScrubber().scrub(line) == line
+        assert time.monotonic() - start < 1.0
+
+
+class TestPiiScrubberRules:
+    """Test optional and custom rules."""
+
+    def test_with_rules_adds_optional_rules(self):
+        """Test that named optional rules are applied alongside the defaults."""
+        scrubber = PiiScrubber.with_rules(['email', 'national_id', 'url_token'])
+        text = "jane@example.com 123-45-6789 https://x.io/cv?token=abc 555-123-4567"
+        assert scrubber.scrub(text) == (
+            "[EMAIL REMOVED] [NATIONAL ID REMOVED] https://x.io/cv?[TOKEN REMOVED] [PHONE NUMBER REMOVED]"
+        )
+
+    def test_with_rules_rejects_unknown_names(self):
+        """Test that an unknown rule name raises ValueError."""
+        with pytest.raises(ValueError):
+            PiiScrubber.with_rules(['passport'])
+
+    def test_custom_rule_without_first_chars(self):
+        """Test that rules without first_chars still match."""
+        scrubber = PiiScrubber([PiiRule('badge', r'ID-\d+', lambda text: text[:3] + '***')])
+        assert scrubber.scrub("badge ID-991") == "badge ID-***"
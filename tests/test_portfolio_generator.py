@@ -1,6 +1,10 @@
 """Tests for portfolio generator module."""
-import pytest
-from utils.portfolio_generator import PortfolioGenerator
+import asyncio
+import json
+from utils.http_client import AsyncHttpClient
+from utils.portfolio_generator import PortfolioGenerator, HtmlStreamCleaner
+from utils.prompt_builder import PromptBuilder
+from tests.stub_server import StubServer
 
 
 class TestPortfolioGeneratorInitialization:
@@ -25,3 +29,152 @@ class TestPortfolioGeneratorInitialization:
         assert generator.api_key is not None
         assert generator.api_url is not None
         assert generator.model is not None
+
+
+class TestHtmlStreamCleaner:
+    """Test incremental cleaning of streamed HTML."""
+
+    def feed_all(self, chunks):
+        cleaner = HtmlStreamCleaner()
+        output = ''.join(cleaner.feed(chunk) for chunk in chunks) + cleaner.close()
+        return cleaner, output
+
+    def test_matches_batch_cleaning(self):
+        """Test that streamed output equals _clean_html_response on the whole text."""
+        raw = "Here you go:\n<!DOCTYPE html><html><head></head><body>" + "x" * 100 + "</body></html>\nEnjoy!"
+        generator = PortfolioGenerator("key", "url", "model")
+
+        for size in (1, 3, 7, 50):
+            chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+            _, output = self.feed_all(chunks)
+            assert output == generator._clean_html_response(raw)
+
+    def test_validates_incrementally(self):
+        """Test that required markers split across chunks are detected."""
+        raw = "<!DOCTYPE html><html><head></head><body>" + "y" * 60 + "</body></html>"
+        cleaner, _ = self.feed_all([raw[i:i + 4] for i in range(0, len(raw), 4)])
+        assert cleaner.is_valid() is True
+
+    def test_short_incomplete_html_is_invalid(self):
+        """Test that a truncated document fails validation."""
+        cleaner, _ = self.feed_all(["<!DOCTYPE html><html><head>"])
+        assert cleaner.is_valid() is False
+
+
+class FakeStreamResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class TestPortfolioGeneratorStreaming:
+    """Test streaming generation."""
+
+    def test_stream_portfolio_writes_file_and_yields_chunks(self, tmp_path):
+        """Test that chunks are forwarded and the file is written."""
+        html = "<!DOCTYPE html><html><head></head><body>" + "z" * 80 + "</body></html>"
+        lines = [
+            "data: " + json.dumps({'choices': [{'delta': {'content': html[i:i + 20]}}]})
+            for i in range(0, len(html), 20)
+        ] + ["", "data: " + json.dumps({'choices': [], 'usage': {'prompt_tokens': 1234}}), "data: [DONE]"]
+
+        class FakeClient:
+            def post(self, *args, **kwargs):
+                return FakeStreamResponse(lines)
+
+        target = tmp_path / "portfolio.html"
+        theme = {'primary': '#000', 'secondary': '#111', 'accent': '#222', 'background': '#fff', 'text': '#333'}
+
+        generator = PortfolioGenerator("key", "url", "model", http_client=FakeClient())
+        events = list(generator.stream_portfolio("resume", theme, str(target)))
+
+        chunks = ''.join(payload for kind, payload in events if kind == 'chunk')
+        assert chunks == html
+        assert events[-1] == ('result', {
+            'success': True, 'error': None, 'cached': False, 'prompt_tokens': 1234, 'bytes_saved': 0
+        })
+        assert target.read_text(encoding='utf-8') == html
+        assert not (tmp_path / "portfolio.html.part").exists()
+
+
+class TestPortfolioGeneratorAsync:
+    """Test the asyncio generation path against a local stub server."""
+
+    def test_agenerate_portfolio_returns_cleaned_html(self):
+        """Test that the async path cleans and validates the completion."""
+        html = "<!DOCTYPE html><html><head></head><body>" + "a" * 80 + "</body></html>"
+        completion = {'choices': [{'message': {'content': "```html\n" + html + "\n```"}}]}
+        theme = {'primary': '#000', 'secondary': '#111', 'accent': '#222', 'background': '#fff', 'text': '#333'}
+
+        with StubServer(lambda request: (200, {}, completion)) as server:
+            generator = PortfolioGenerator("key", server.url + "/chat/completions", "model",
+                                           async_http_client=AsyncHttpClient())
+            result = asyncio.run(generator.agenerate_portfolio("resume", theme))
+
+        assert result['success'] is True
+        assert result['html'] == html
+        assert server.requests[0].json()['model'] == "model"
+        assert result['prompt_tokens'] == PromptBuilder().build("resume", theme)['prompt_tokens']
+
+
+class TestPortfolioGeneratorStructured:
+    """Test structured JSON content generation."""
+
+    def test_generate_content_validates_and_requests_schema(self):
+        """Test that JSON content is validated and a small schema-bound completion is requested."""
+        reply = json.dumps({'name': 'Jane', 'title': 'Engineer', 'summary': 'Hi.', 'experience': [],
+                            'skills': ['Go'], 'education': []})
+        payloads = []
+
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {'choices': [{'message': {'content': reply}}], 'usage': {'prompt_tokens': 321}}
+
+        class FakeClient:
+            def post(self, url, json=None, **kwargs):
+                payloads.append(json)
+                return FakeResponse()
+
+        result = PortfolioGenerator("key", "url", "model", http_client=FakeClient()).generate_content("resume")
+
+        assert result['success'] is True
+        assert result['content']['skills'] == ['Go']
+        assert result['prompt_tokens'] == 321
+        assert payloads[0]['max_tokens'] == PortfolioGenerator.CONTENT_MAX_TOKENS
+        assert payloads[0]['response_format']['type'] == 'json_schema'
+        assert payloads[0]['response_format']['json_schema']['name'] == 'portfolio'
+        assert payloads[0]['response_format']['json_schema']['strict'] is True
+
+    def test_generate_content_rejects_invalid_output(self):
+        """Test that output failing the schema is reported as an error."""
+        class FakeResponse:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {'choices': [{'message': {'content': '{"title": "x"}'}}]}
+
+        class FakeClient:
+            def post(self, *args, **kwargs):
+                return FakeResponse()
+
+        result = PortfolioGenerator("key", "url", "model", http_client=FakeClient()).generate_content("resume")
+
+        assert result['success'] is False
+        assert 'failed validation' in result['error']
@@ -0,0 +1,80 @@
+"""Tests for structured portfolio content schema module."""
+import pytest
+from utils.portfolio_schema import (STRICT_PORTFOLIO_SCHEMA, PortfolioSchemaError, parse_portfolio_content,
+                                    validate_portfolio_content)
+
+VALID = {
+    'name': ' Jane Doe ',
+    'title': 'Backend Engineer',
+    'summary': 'Builds reliable services.',
+    'experience': [{'role': 'Engineer', 'company': 'Acme', 'dates': '2019 - 2023',
+                    'highlights': ['Led migration', '']}],
+    'skills': ['Python', 'Go'],
+    'education': [{'degree': 'BSc Computer Science'}]
+}
+
+
+class TestValidatePortfolioContent:
+    """Test schema validation and normalisation."""
+
+    def test_valid_content_is_normalised(self):
+        """Test that strings are stripped, empties dropped and optional fields filled."""
+        content = validate_portfolio_content(dict(VALID, extra='ignored'))
+
+        assert content['name'] == 'Jane Doe'
+        assert content['experience'][0]['highlights'] == ['Led migration']
+        assert content['education'][0] == {'degree': 'BSc Computer Science', 'institution': '', 'dates': ''}
+        assert content['projects'] == []
+        assert 'extra' not in content
+
+    def test_missing_required_field(self):
+        """Test that a missing top-level field is reported by path."""
+        data = dict(VALID)
+        del data['skills']
+        with pytest.raises(PortfolioSchemaError, match='skills: missing'):
+            validate_portfolio_content(data)
+
+    def test_wrong_nested_type(self):
+        """Test that a wrongly typed nested value is reported by path."""
+        data = dict(VALID, experience=[{'role': 'Engineer', 'highlights': 'not a list'}])
+        with pytest.raises(PortfolioSchemaError, match=r'experience\[0\]\.highlights: expected an array'):
+            validate_portfolio_content(data)
+
+    def test_empty_name_rejected(self):
+        """Test that minLength is enforced."""
+        with pytest.raises(PortfolioSchemaError, match='name: must not be empty'):
+            validate_portfolio_content(dict(VALID, name='  '))
+
+
+class TestStrictSchema:
+    """Test the strict-mode schema sent to the API."""
+
+    def test_every_object_is_closed_and_fully_required(self):
+        """Test that all properties are required, extras forbidden and minLength dropped at every level."""
+        education = STRICT_PORTFOLIO_SCHEMA['properties']['education']['items']
+
+        assert STRICT_PORTFOLIO_SCHEMA['required'] == list(STRICT_PORTFOLIO_SCHEMA['properties'])
+        assert STRICT_PORTFOLIO_SCHEMA['additionalProperties'] is False
+        assert education['required'] == ['degree', 'institution', 'dates']
+        assert education['additionalProperties'] is False
+        assert 'minLength' not in STRICT_PORTFOLIO_SCHEMA['properties']['name']
+
+    def test_strict_reply_with_empty_optionals_validates(self):
+        """Test that the empty values strict mode returns for absent fields pass local validation."""
+        reply = dict(VALID, projects=[], education=[{'degree': 'BSc', 'institution': '', 'dates': ''}])
+        assert validate_portfolio_content(reply)['education'][0]['institution'] == ''
+
+
+class TestParsePortfolioContent:
+    """Test parsing the model's raw reply."""
+
+    def test_accepts_fenced_json(self):
+        """Test that a ```json fence around the object is tolerated."""
+        text = ('```json\n{"name": "A", "title": "", "summary": "", "experience": [], "skills": [], "education": []}'
+                '\n```')
+        assert parse_portfolio_content(text)['name'] == 'A'
+
+    def test_rejects_invalid_json(self):
+        """Test that non-JSON output raises PortfolioSchemaError."""
+        with pytest.raises(PortfolioSchemaError, match='not valid JSON'):
+            parse_portfolio_content('<!DOCTYPE html>')
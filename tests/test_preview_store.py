@@ -0,0 +1,92 @@
+"""Tests for preview store module."""
+import gzip
+import os
+from utils.preview_store import PreviewStore, accepts, precompress
+
+HTML = b'<!DOCTYPE html><html><body>' + b'<p>portfolio</p>' * 200 + b'</body></html>'
+
+
+def saved(tmp_path, content=HTML):
+    path = str(tmp_path / 'portfolio.html')
+    with open(path, 'wb') as f:
+        f.write(content)
+    precompress(path)
+    return path
+
+
+class TestPrecompress:
+    """Test compressed siblings written at save time."""
+
+    def test_writes_gzip_sibling(self, tmp_path):
+        """Test that the .gz sibling decompresses to the original."""
+        path = saved(tmp_path)
+        with open(path + '.gz', 'rb') as f:
+            assert gzip.decompress(f.read()) == HTML
+        assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    def test_accept_encoding_parsing(self):
+        """Test that q=0 refuses a coding and * accepts any."""
+        assert accepts('gzip, deflate, br', 'br')
+        assert not accepts('gzip;q=0, deflate', 'gzip')
+        assert accepts('*', 'gzip')
+        assert not accepts('', 'gzip')
+
+    def test_malformed_q_refuses_coding(self):
+        """Test that an unparseable weight counts as not accepted rather than raising."""
+        assert not accepts('br;q=high, gzip', 'br')
+        assert accepts('br;q=high, gzip', 'gzip')
+        assert accepts('br;q=0.5', 'br')
+
+
+class TestPreviewStore:
+    """Test representation selection and the hot-file LRU."""
+
+    def test_serves_compressed_from_disk_then_memory(self, tmp_path):
+        """Test that a cold file is sent from disk and promoted on the next request."""
+        path = saved(tmp_path)
+        store = PreviewStore(promote_after=2)
+
+        first = store.get(path, 'gzip, deflate')
+        assert first.encoding == 'gzip'
+        assert first.file_path == path + '.gz'
+        assert first.body is None
+
+        second = store.get(path, 'gzip')
+        assert gzip.decompress(second.body) == HTML
+        assert second.etag == first.etag
+
+        third = store.get(path, '')
+        assert third.body == HTML
+        assert third.encoding is None
+        assert third.etag != first.etag
+        assert store.hits == 1
+
+    def test_etag_changes_when_file_is_replaced(self, tmp_path):
+        """Test that a rewritten file is not served from a stale cache entry."""
+        path = saved(tmp_path)
+        store = PreviewStore(promote_after=1)
+        before = store.get(path)
+
+        replacement = str(tmp_path / 'new.html')
+        with open(replacement, 'wb') as f:
+            f.write(b'<html>changed</html>')
+        os.replace(replacement, path)
+
+        after = store.get(path, 'gzip')
+        assert after.body == b'<html>changed</html>'
+        assert after.encoding is None  # the .gz sibling is older than the file
+        assert after.etag != before.etag
+
+    def test_missing_file_and_eviction(self, tmp_path):
+        """Test that missing files return None and the LRU respects its byte budget."""
+        store = PreviewStore(max_bytes=len(HTML) * 2, promote_after=1)
+        assert store.get(str(tmp_path / 'missing.html')) is None
+
+        first = saved(tmp_path)
+        other = str(tmp_path / 'other.html')
+        with open(other, 'wb') as f:
+            f.write(HTML)
+        store.get(first)
+        store.get(other)
+
+        assert list(store._entries) == [other]
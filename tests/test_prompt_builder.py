@@ -0,0 +1,80 @@
+"""Tests for prompt builder module."""
+from utils.prompt_builder import PromptBuilder
+
+THEME = {'primary': '#000', 'secondary': '#111', 'accent': '#222', 'background': '#fff', 'text': '#333'}
+
+
+class TestPromptBuilderCompaction:
+    """Test resume compaction."""
+
+    def test_compact_collapses_whitespace_only(self):
+        """Test that runs of spaces and blank lines collapse while repeated content lines stay."""
+        text = "Jane   Doe\n\n\n\nEngineer\t\tat  Acme\nResponsibilities:\nEngineer at Beta\nResponsibilities:\n\n"
+        assert PromptBuilder.compact(text) == (
+            "Jane Doe\n\nEngineer at Acme\nResponsibilities:\nEngineer at Beta\nResponsibilities:"
+        )
+        paged = "Jane Doe\nEngineer\n\f\nPage 2\nSkills"
+        assert PromptBuilder.compact(paged) == "Jane Doe\nEngineer\nPage 2\nSkills"
+
+    def test_drop_running_headers_only_at_page_edges(self):
+        """Test that headers and footers repeated on every page go, and repeats inside a page stay."""
+        text = "\n\f\n".join(
+            f"Jane Doe - Resume\nEngineer\nResponsibilities:\nBuilt things\nPage {page} of 3"
+            for page in (1, 2, 3)
+        )
+        kept = PromptBuilder.drop_running_headers(text).split("\n")
+
+        assert kept.count("Jane Doe - Resume") == 1
+        assert kept.count("Page 1 of 3") == 1
+        assert "Page 2 of 3" not in kept and "Page 3 of 3" not in kept
+        assert kept.count("Responsibilities:") == 3
+        assert PromptBuilder.drop_running_headers("A\nA\nA") == "A\nA\nA"
+
+
+class TestPromptBuilderBudget:
+    """Test fitting the resume into the token budget."""
+
+    def test_short_resume_is_untouched(self):
+        """Test that a resume within budget is sent whole."""
+        prompt = PromptBuilder(token_budget=8000).build("Jane Doe\nEngineer", THEME)
+        assert prompt['resume'] == "Jane Doe\nEngineer"
+        assert prompt['trimmed'] is False
+        assert "Jane Doe\nEngineer" in prompt['messages'][1]['content']
+
+    def test_running_headers_dropped_only_when_over_budget(self):
+        """Test that page headers survive within budget and are the first thing cut over it."""
+        resume = "\n\f\n".join(
+            "Jane Doe - Resume\n" + "\n".join(f"Role {page}{i} " + "x" * 60 for i in range(10))
+            for page in range(1, 4)
+        )
+        builder = PromptBuilder(token_budget=None)
+        fixed = builder.build("", THEME)['prompt_tokens']
+
+        assert builder.build(resume, THEME)['resume'].count("Jane Doe - Resume") == 3
+
+        compacted = PromptBuilder.compact(resume)
+        over_budget = PromptBuilder(token_budget=fixed + builder.estimate_tokens(compacted) - 5)
+        prompt = over_budget.build(resume, THEME)
+        assert prompt['resume'].count("Jane Doe - Resume") == 1
+        assert all(f"Role {page}9 " in prompt['resume'] for page in range(1, 4))
+        assert prompt['trimmed'] is False
+
+    def test_long_resume_is_trimmed_to_budget(self):
+        """Test that the whole prompt stays within the budget."""
+        resume = "\n".join(f"Line {i} " + "x" * 60 for i in range(2000))
+        builder = PromptBuilder(token_budget=3000)
+        prompt = builder.build(resume, THEME)
+
+        assert prompt['trimmed'] is True
+        assert prompt['resume'].endswith("\n[...]")
+        assert prompt['prompt_tokens'] <= 3000
+        assert prompt['prompt_tokens'] == sum(
+            builder.estimate_tokens(message['content']) for message in prompt['messages']
+        )
+
+    def test_no_budget_keeps_everything(self):
+        """Test that a budget of None disables trimming."""
+        resume = "x" * 100000
+        prompt = PromptBuilder(token_budget=None).build(resume, THEME)
+        assert prompt['resume'] == resume
+        assert prompt['trimmed'] is False
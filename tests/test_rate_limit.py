@@ -0,0 +1,81 @@
+"""Tests for rate limiting and admission control module."""
+import time
+import pytest
+from utils.rate_limit import MemoryRateLimitBackend, RateLimiter, RateLimitExceeded
+
+
+class TestMemoryRateLimitBackend:
+    """Test in-process token buckets and counters."""
+
+    def test_burst_then_wait(self):
+        """Test that a full bucket allows a burst and then reports the wait."""
+        backend = MemoryRateLimitBackend()
+        assert [backend.take('k', rate=1.0, burst=2) for _ in range(2)] == [0.0, 0.0]
+
+        wait = backend.take('k', rate=1.0, burst=2)
+        assert 0.9 < wait <= 1.0
+
+    def test_tokens_refill(self):
+        """Test that tokens come back at the configured rate."""
+        backend = MemoryRateLimitBackend()
+        backend.take('k', rate=20.0, burst=1)
+        assert backend.take('k', rate=20.0, burst=1) > 0
+        time.sleep(0.1)
+        assert backend.take('k', rate=20.0, burst=1) == 0.0
+
+    def test_slot_limit_and_release(self):
+        """Test that acquire stops at the limit and release frees that slot."""
+        backend = MemoryRateLimitBackend()
+        first, second = backend.acquire('slots', 2, 60), backend.acquire('slots', 2, 60)
+        assert first and second and first != second
+        assert backend.acquire('slots', 2, 60) is None
+
+        backend.release('slots', first)
+        backend.release('slots', first)
+        assert backend.count('slots') == 1
+        assert backend.acquire('slots', 2, 60)
+
+    def test_slots_expire_individually(self):
+        """Test that each slot lapses ttl after its own acquire, however many follow it."""
+        backend = MemoryRateLimitBackend()
+        backend.acquire('slots', 2, 0.1)
+        time.sleep(0.06)
+        backend.acquire('slots', 2, 0.1)
+        time.sleep(0.06)
+
+        assert backend.count('slots') == 1
+        assert backend.acquire('slots', 2, 0.1)
+        assert backend.acquire('slots', 2, 0.1) is None
+
+
+class TestRateLimiter:
+    """Test per-user limits and the global in-flight cap."""
+
+    def test_limits_are_per_user_and_action(self):
+        """Test that one user's exhausted bucket does not affect others."""
+        limiter = RateLimiter(limits={'generate': (60, 1)})
+        limiter.check('alice', 'generate')
+
+        with pytest.raises(RateLimitExceeded) as excinfo:
+            limiter.check('alice', 'generate')
+        assert excinfo.value.status == 429
+        assert excinfo.value.retry_after_header == '1'
+
+        limiter.check('bob', 'generate')
+        limiter.check('alice', 'unlimited')
+
+    def test_in_flight_cap_returns_503(self):
+        """Test that slots are capped globally and can be released once."""
+        limiter = RateLimiter(max_in_flight=1, busy_retry_after=7)
+        slot = limiter.acquire()
+
+        with pytest.raises(RateLimitExceeded) as excinfo:
+            limiter.acquire()
+        assert excinfo.value.status == 503
+        assert excinfo.value.retry_after_header == '7'
+
+        slot.release()
+        slot.release()
+        assert limiter.in_flight() == 0
+        limiter.acquire()
+        assert limiter.in_flight() == 1
@@ -1,6 +1,9 @@
 """Tests for resume parser module."""
+import io
+import docx
+import PyPDF2
 import pytest
-from utils.resume_parser import ResumeParser
+from utils.resume_parser import PAGE_BREAK, ResumeParser
 
 
 class TestResumeParserFilters:
@@ -41,3 +44,191 @@ class TestResumeParserFilters:
         text = "Some resume text"
         filtered = ResumeParser.filter_personal_data(text)
         assert isinstance(filtered, str)
+
+
+class TestResumeParserIncrementalExtraction:
+    """Test page-incremental extraction and budgets."""
+
+    def test_iter_pdf_pages_stops_at_page_budget(self, tmp_path):
+        """Test that PDF extraction stops after max_pages."""
+        writer = PyPDF2.PdfWriter()
+        for _ in range(5):
+            writer.add_blank_page(width=612, height=792)
+        path = tmp_path / "resume.pdf"
+        with open(path, 'wb') as f:
+            writer.write(f)
+
+        assert len(list(ResumeParser.iter_pdf_pages(str(path), max_pages=2))) == 2
+        pages = list(ResumeParser.iter_pdf_pages(str(path)))
+        assert len(pages) == 5
+        # Pages are told apart by a page-break line, so running headers can be recognised later
+        assert not pages[0].startswith(PAGE_BREAK)
+        assert all(page.startswith(PAGE_BREAK + "\n") for page in pages[1:])
+
+    def test_parse_stops_at_character_budget(self, tmp_path):
+        """Test that parsing truncates once max_chars is reached."""
+        document = docx.Document()
+        for i in range(100):
+            document.add_paragraph(f"Paragraph {i} " + "x" * 50)
+        path = tmp_path / "resume.docx"
+        document.save(str(path))
+
+        parsed = ResumeParser.parse(str(path), max_chars=500)
+
+        assert 400 < len(parsed['raw_text']) <= 500
+        assert parsed['truncated'] is True
+        assert "Paragraph 99" not in parsed['filtered_text']
+        # The budget ends at a line break, never inside a paragraph
+        assert all(line.endswith("x" * 50) for line in parsed['raw_text'].split("\n"))
+
+    def test_parse_budget_does_not_split_a_phone_number(self, tmp_path):
+        """Test that a phone number straddling the character budget is dropped, not half kept."""
+        document = docx.Document()
+        document.add_paragraph("Jane Doe")
+        document.add_paragraph("Call 555-123-4567")
+        path = tmp_path / "resume.docx"
+        document.save(str(path))
+
+        parsed = ResumeParser.parse(str(path), max_chars=len("Jane Doe\nCall 555-12"))
+
+        assert parsed['raw_text'] == "Jane Doe"
+        assert "555" not in parsed['filtered_text']
+
+    def test_parse_filters_matches_across_chunks(self, tmp_path):
+        """Test that a phone number split over two paragraphs is still removed."""
+        document = docx.Document()
+        document.add_paragraph("Call 555")
+        document.add_paragraph("123-4567")
+        path = tmp_path / "resume.docx"
+        document.save(str(path))
+
+        parsed = ResumeParser.parse(str(path))
+
+        assert "4567" not in parsed['filtered_text']
+
+    def test_parse_filters_each_chunk(self, tmp_path):
+        """Test that personal data is removed from every paragraph."""
+        document = docx.Document()
+        document.add_paragraph("Jane Doe")
+        document.add_paragraph("Call 555-123-4567")
+        document.add_paragraph("Lives at 123 Main Street")
+        path = tmp_path / "resume.docx"
+        document.save(str(path))
+
+        parsed = ResumeParser.parse(str(path))
+
+        assert parsed['filtered_text'].split("\n")[0] == "Jane Doe"
+        assert "555-123-4567" not in parsed['filtered_text']
+        assert "123 Main Street" not in parsed['filtered_text']
+        assert parsed['truncated'] is False
+        assert parsed['raw_text'] == "Jane Doe\nCall 555-123-4567\nLives at 123 Main Street"
+
+
+class TestResumeParserInMemory:
+    """Test parsing documents that were never written to disk."""
+
+    def test_parse_bytes_and_memoryview_by_signature(self, tmp_path):
+        """Test that unnamed in-memory documents are recognised from their first bytes."""
+        document = docx.Document()
+        document.add_paragraph("Jane Doe")
+        document.add_paragraph("Call 555-123-4567")
+        buffer = io.BytesIO()
+        document.save(buffer)
+        data = buffer.getvalue()
+
+        for source in (data, memoryview(data), io.BytesIO(data)):
+            parsed = ResumeParser.parse(source)
+            assert parsed['raw_text'] == "Jane Doe\nCall 555-123-4567"
+            assert "555-123-4567" not in parsed['filtered_text']
+
+        writer = PyPDF2.PdfWriter()
+        writer.add_blank_page(width=612, height=792)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        assert ResumeParser.detect_format(buffer.getvalue()) == 'pdf'
+
+    def test_named_and_one_way_streams(self):
+        """Test that a stream's file name decides the format and unseekable streams are buffered."""
+        class OneWayStream:
+            def __init__(self, data):
+                self._buffer = io.BytesIO(data)
+
+            def read(self, *args):
+                return self._buffer.read(*args)
+
+            def seekable(self):
+                return False
+
+        document = docx.Document()
+        document.add_paragraph("Jane Doe")
+        buffer = io.BytesIO()
+        document.save(buffer)
+        buffer.filename = "resume.DOCX"
+
+        assert ResumeParser.detect_format(buffer) == 'docx'
+        assert ResumeParser.parse(OneWayStream(buffer.getvalue()))['raw_text'] == "Jane Doe"
+        with pytest.raises(ValueError):
+            ResumeParser.parse(b"plain text is not a resume")
+
+
+RESUME_TEXT = """Jane Doe
+Backend Engineer
+
+Professional Summary
+Builds reliable services.
+
+WORK EXPERIENCE:
+Acme Corp - gained experience with Python
+Beta Inc
+
+Skills
+Python, Go
+
+Awards
+Hackathon winner
+"""
+
+
+class TestResumeParserSections:
+    """Test single-scan section segmentation and selection."""
+
+    def test_extract_sections_returns_spans(self):
+        """Test that each section has offsets and its body text."""
+        sections = ResumeParser.extract_sections(RESUME_TEXT)
+
+        assert list(sections) == ['intro', 'summary', 'experience', 'skills', 'achievements']
+        assert sections['intro']['text'] == "Jane Doe\nBackend Engineer"
+        assert sections['experience']['text'] == "Acme Corp - gained experience with Python\nBeta Inc"
+        assert RESUME_TEXT[sections['skills']['start']:sections['skills']['end']].startswith("Skills\n")
+        assert sections['skills']['end'] == sections['achievements']['start']
+        assert sections['achievements']['end'] == len(RESUME_TEXT)
+
+    def test_extract_sections_ignores_words_inside_lines(self):
+        """Test that header words within a sentence do not start a section."""
+        sections = ResumeParser.extract_sections("I have experience and skills in education.")
+        assert sections == {}
+
+    def test_select_sections_filters_and_truncates(self):
+        """Test that only chosen sections are kept and long ones are cut."""
+        sections = ResumeParser.extract_sections(RESUME_TEXT)
+        text = ResumeParser.select_sections(RESUME_TEXT, sections, ['intro', 'experience'], max_section_chars=45)
+
+        assert text == "Jane Doe\nBackend Engineer\n\nEXPERIENCE\nAcme Corp - gained experience with Python\n[...]"
+
+    def test_select_sections_falls_back_to_full_text(self):
+        """Test that text without recognised headers is sent unchanged."""
+        text = "Just a paragraph about me."
+        assert ResumeParser.select_sections(text, ResumeParser.extract_sections(text)) == text
+
+    def test_parse_returns_prompt_text(self, tmp_path):
+        """Test that parse exposes the section-selected prompt text."""
+        document = docx.Document()
+        for line in RESUME_TEXT.strip().split("\n"):
+            document.add_paragraph(line)
+        path = tmp_path / "resume.docx"
+        document.save(str(path))
+
+        parsed = ResumeParser.parse(str(path), prompt_sections=['skills'])
+
+        assert parsed['prompt_text'] == "SKILLS\nPython, Go"
+        assert parsed['sections']['skills']['text'] == "Python, Go"
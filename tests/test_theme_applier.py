@@ -0,0 +1,80 @@
+"""Tests for theme applier module."""
+from config import Config
+from utils.theme_applier import ThemeApplier
+
+
+BLUE = Config.COLOR_THEMES['professional-blue']
+PURPLE = Config.COLOR_THEMES['elegant-purple']
+
+HTML = """<!DOCTYPE html><html><head><style>
+:root {--primary: #2C3E50; --secondary: #3498DB; --accent: #1ABC9C;}
+nav {background: var(--primary);}
+.skill {border-left: 4px solid #1abc9c;}
+</style></head><body><p style="color: #3498DB">Hi</p></body></html>"""
+
+
+class TestThemeApplierApply:
+    """Test applying a theme to a portfolio."""
+
+    def test_apply_rewrites_root_variables(self):
+        """Test that the :root custom properties take the new colours."""
+        themed = ThemeApplier.apply(HTML, PURPLE)
+        assert f"--primary: {PURPLE['primary']}" in themed
+        assert f"--secondary: {PURPLE['secondary']}" in themed
+        assert f"--accent: {PURPLE['accent']}" in themed
+
+    def test_apply_adds_missing_variables(self):
+        """Test that variables missing from :root are appended."""
+        themed = ThemeApplier.apply(HTML, PURPLE)
+        assert f"--background: {PURPLE['background']}" in themed
+        assert f"--text: {PURPLE['text']}" in themed
+
+    def test_apply_injects_root_when_absent(self):
+        """Test that a :root block is injected before </head> if missing."""
+        html = "<html><head><title>x</title></head><body></body></html>"
+        themed = ThemeApplier.apply(html, PURPLE)
+        assert themed.index(':root') < themed.index('</head>')
+        assert f"--primary: {PURPLE['primary']}" in themed
+
+    def test_apply_handles_minified_root(self):
+        """Test that a compact :root declaration is rewritten."""
+        html = "<style>:root{--primary:#000;--secondary:#111}</style>"
+        themed = ThemeApplier.apply(html, PURPLE)
+        assert "#000" not in themed
+        assert f"--primary: {PURPLE['primary']}" in themed
+
+
+class TestThemeApplierTemplatize:
+    """Test converting literal theme colours to variables."""
+
+    def test_templatize_replaces_literal_colours_in_styles(self):
+        """Test that hard-coded theme colours become var() references."""
+        html = ThemeApplier.templatize(HTML, BLUE)
+        style = html[html.index('<style>'):html.index('</style>')]
+        assert "solid var(--accent)" in style
+        assert "#1abc9c" not in style
+
+    def test_templatize_keeps_root_declarations(self):
+        """Test that the :root block keeps concrete values."""
+        html = ThemeApplier.templatize(HTML, BLUE)
+        assert f"--primary: {BLUE['primary']}" in html
+
+    def test_templatize_resolves_shared_colours_by_property(self):
+        """Test that body text follows --text although professional-blue gives primary the same colour."""
+        html = ("<html><head><style>:root {--primary: #2C3E50;}\n"
+                "nav {background: #2C3E50; border-bottom: 2px solid #2c3e50;}\n"
+                "body {color: #2C3E50; background-color: #ECF0F1;}\n"
+                "</style></head><body><nav></nav><p>Hi</p></body></html>")
+        themed = ThemeApplier.apply(ThemeApplier.templatize(html, BLUE), PURPLE)
+
+        assert "nav {background: var(--primary); border-bottom: 2px solid var(--primary);}" in themed
+        assert "body {color: var(--text); background-color: var(--background);}" in themed
+        assert f"--text: {PURPLE['text']}" in themed
+        assert f"--primary: {PURPLE['primary']}" in themed
+
+    def test_render_variants_produces_one_per_theme(self):
+        """Test that every configured theme gets a variant."""
+        variants = ThemeApplier.render_variants(ThemeApplier.templatize(HTML, BLUE), Config.COLOR_THEMES)
+        assert set(variants) == set(Config.COLOR_THEMES)
+        for name, html in variants.items():
+            assert f"--accent: {Config.COLOR_THEMES[name]['accent']}" in html
@@ -0,0 +1,194 @@
+import functools
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from utils.pipeline import PortfolioPipeline
+from utils.resume_parser import ResumeSource
+
+
+# A resume, or a callable loading it when the batch gets to it
+BatchSource = Union[ResumeSource, Callable[[], ResumeSource]]
+
+
+class BatchError(ValueError):
+    """Raised when a batch upload cannot be read (not a zip, too many or too large resumes)."""
+
+
+def _is_resume(name: str, extensions: Iterable[str]) -> bool:
+    base = os.path.basename(name)
+    return not base.startswith('.') and '.' in base and base.rsplit('.', 1)[1].lower() in extensions
+
+
+def read_zip(file: Union[str, BinaryIO], extensions: Iterable[str], max_items: int = 200,
+             max_item_bytes: int = 16 * 1024 * 1024, max_total_bytes: int = 256 * 1024 * 1024) -> List[str]:
+    """
+    Names of every resume in a zip archive, skipping folders, hidden files
+    and other extensions. Sizes - of each resume and of all of them together -
+    are checked against the archive's directory; nothing is decompressed
+    (zipfile never inflates a member past its declared size).
+    """
+    try:
+        with zipfile.ZipFile(file) as archive:
+            members = [info for info in archive.infolist()
+                       if not info.is_dir() and _is_resume(info.filename, extensions)]
+    except zipfile.BadZipFile:
+        raise BatchError('The upload is not a valid zip archive') from None
+
+    if not members:
+        raise BatchError('The archive contains no PDF or DOCX resumes')
+    if len(members) > max_items:
+        raise BatchError(f'The archive holds {len(members)} resumes; the limit is {max_items}')
+    too_large = [info.filename for info in members if info.file_size > max_item_bytes]
+    if too_large:
+        raise BatchError(f'Resume too large: {too_large[0]}')
+    if sum(info.file_size for info in members) > max_total_bytes:
+        raise BatchError(f'The resumes add up to more than {max_total_bytes // (1024 * 1024)} MB uncompressed')
+    return [info.filename for info in members]
+
+
+@contextmanager
+def open_zip_items(path: str, names: List[str]) -> Iterator[List[Tuple[str, Callable[[], bytes]]]]:
+    """
+    Batch items for resumes in the zip archive at path. Each member is
+    decompressed only when its turn to be parsed comes, so a batch holds
+    about as many resumes in memory as it parses at once.
+    """
+    with zipfile.ZipFile(path) as archive:
+        yield [(name, functools.partial(archive.read, name)) for name in names]
+
+
+def read_directory(path: str, extensions: Iterable[str]) -> List[Tuple[str, str]]:
+    """(name, path) of every resume directly inside a directory, in name order"""
+    return [(name, os.path.join(path, name)) for name in sorted(os.listdir(path))
+            if os.path.isfile(os.path.join(path, name)) and _is_resume(name, extensions)]
+
+
+class BatchGenerator:
+    """
+    Turn many resumes into portfolios in one run.
+    Every resume is parsed as soon as a parse slot is free (with a ParserPool
+    the parses spread over its worker processes) and generated with at most
+    max_concurrency LLM calls in flight. Portfolios are written into the
+    output zip as they finish, followed by report.json with one entry per
+    resume, so a failed resume never fails the batch.
+
+    With acquire_slot, each generation also holds a server-wide admission
+    slot: one of the reserved_slots the caller already holds, else one from
+    acquire_slot() (returning an object with release(), or None when all
+    are busy, in which case the generation waits and asks again).
+    """
+
+    REPORT_NAME = 'report.json'
+
+    def __init__(self, pipeline: PortfolioPipeline, parse_concurrency: int = 4, max_concurrency: int = 4,
+                 acquire_slot: Optional[Callable[[], Any]] = None, reserved_slots: int = 1,
+                 slot_poll_interval: float = 0.5):
+        self.pipeline = pipeline
+        self.parse_concurrency = parse_concurrency
+        self.max_concurrency = max_concurrency
+        self.acquire_slot = acquire_slot
+        self.slot_poll_interval = slot_poll_interval
+        self._generation_slots = threading.Semaphore(max_concurrency)
+        self._reserved_slots = threading.Semaphore(reserved_slots)
+
+    def _admit(self) -> Callable[[], None]:
+        """Wait for an admission slot for one generation; returns its release function"""
+        if self.acquire_slot is None:
+            return lambda: None
+        if self._reserved_slots.acquire(blocking=False):
+            return self._reserved_slots.release
+        while True:
+            slot = self.acquire_slot()
+            if slot is not None:
+                return slot.release
+            if self._reserved_slots.acquire(timeout=self.slot_poll_interval):
+                return self._reserved_slots.release
+
+    @staticmethod
+    def _output_name(name: str, taken: set) -> str:
+        """Unique archive name for a resume's portfolio, derived from its file name"""
+        stem = re.sub(r'[^A-Za-z0-9._-]+', '_', os.path.splitext(os.path.basename(name))[0]).strip('._') or 'resume'
+        candidate = f'{stem}.html'
+        counter = 2
+        while candidate in taken:
+            candidate = f'{stem}-{counter}.html'
+            counter += 1
+        taken.add(candidate)
+        return candidate
+
+    def _process(self, source: BatchSource, theme: str, renderer: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            if callable(source):
+                source = source()
+            parsed_data = self.pipeline.parse(source)
+            if not parsed_data['has_content']:
+                return {'success': False, 'error': 'Unable to extract content from resume.'}
+
+            with self._generation_slots:
+                release = self._admit()
+                try:
+                    result = self.pipeline.generate(parsed_data, theme, renderer)
+                finally:
+                    release()
+        except Exception as e:
+            return {'success': False, 'error': f'Error processing resume: {str(e)}'}
+        result['seconds'] = round(time.monotonic() - started, 3)
+        return result
+
+    def run(self, items: List[Tuple[str, BatchSource]], theme: str, output: Union[str, BinaryIO],
+            renderer: str = 'llm', progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Generate a portfolio for each (name, source) item into the zip at
+        output and return the report, which the zip also contains. A source
+        may also be a callable returning one, to load it only when needed.
+        progress, if given, is called with (finished, total) after each item.
+        """
+        progress = progress or (lambda finished, total: None)
+        started = time.monotonic()
+        entries = []
+        taken = {self.REPORT_NAME}
+
+        workers = self.parse_concurrency + self.max_concurrency
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor, \
+                zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            futures = {executor.submit(self._process, source, theme, renderer): name for name, source in items}
+
+            for future in as_completed(futures):
+                name = futures[future]
+                result = future.result()
+                entry = {'resume': name, 'success': result['success']}
+
+                if result['success']:
+                    entry['portfolio'] = self._output_name(name, taken)
+                    archive.writestr(entry['portfolio'], result['html'])
+                    entry.update({key: result.get(key) for key in
+                                  ('renderer', 'cached', 'prompt_tokens', 'fallback_reason', 'seconds')
+                                  if result.get(key) is not None})
+                else:
+                    entry['error'] = result.get('error', 'Failed to generate portfolio')
+
+                entries.append(entry)
+                progress(len(entries), len(items))
+
+            entries.sort(key=lambda entry: entry['resume'])
+            succeeded = sum(1 for entry in entries if entry['success'])
+            report = {
+                'theme': theme,
+                'renderer': renderer,
+                'total': len(entries),
+                'succeeded': succeeded,
+                'failed': len(entries) - succeeded,
+                'seconds': round(time.monotonic() - started, 3),
+                'items': entries
+            }
+            archive.writestr(self.REPORT_NAME, json.dumps(report, indent=2))
+
+        return report
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, List, Optional
+
+
+class EventLoopThread:
+    """
+    One long-lived asyncio event loop running on a daemon thread.
+    Sync callers (Flask views in server worker threads) hand coroutines to
+    it with run(), so concurrent requests await the network side by side on
+    the same loop - and share the connection pools kept per loop, such as
+    AsyncHttpClient's - instead of each spinning up a loop of its own.
+    Coroutines registered with add_closer run on the loop at shutdown.
+    """
+
+    def __init__(self, name: str = 'event-loop'):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closers: List[Callable[[], Awaitable]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The loop, started on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coroutine: Awaitable, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and block the calling thread until it returns"""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('EventLoopThread.run() called from its own loop; await the coroutine instead')
+        # The task runs in a copy of the caller's context, so Flask's request context carries over
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+    def add_closer(self, closer: Callable[[], Awaitable]):
+        """Await closer() on the loop when it shuts down (e.g. AsyncHttpClient.aclose)"""
+        with self._lock:
+            self._closers.append(closer)
+
+    async def _close(self):
+        for closer in self._closers:
+            try:
+                await closer()
+            except Exception as e:
+                print(f"Error closing event loop resource: {str(e)}")
+
+    def shutdown(self, timeout: float = 5.0):
+        """Run the closers, then stop and close the loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
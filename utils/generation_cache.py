@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+
+class GenerationCache:
+    """
+    Persistent on-disk cache of generated portfolio HTML.
+    Entries are keyed by the content that determines the LLM output, expire
+    after a TTL and are evicted least-recently-used once the cache is full.
+    """
+
+    SUFFIX = '.html'
+
+    def __init__(self, cache_dir: str, max_entries: int = 500, ttl: int = 7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(resume_text: str, color_theme: Dict[str, str], model: str, system_prompt: str) -> str:
+        """Hash everything that influences the generated HTML into one cache key"""
+        parts = [
+            hashlib.sha256(resume_text.encode('utf-8')).hexdigest(),
+            json.dumps(color_theme, sort_keys=True),
+            model,
+            hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()
+        ]
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached HTML for key, or None on a miss or expired entry"""
+        path = self._path(key)
+        try:
+            # mtime records when the entry was written (TTL), atime when it was last used (LRU)
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                html_content = f.read()
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return html_content
+
+    def set(self, key: str, html_content: str):
+        """Store HTML for key atomically, then enforce the size limit"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(html_content)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def set_from_file(self, key: str, file_path: str):
+        """Store an already-written portfolio without loading it into memory"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then least-recently-used ones above max_entries"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                self._remove(path)
+            else:
+                entries.append((stat.st_atime, path))
+
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            self._remove(path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        size = sum(1 for name in os.listdir(self.cache_dir) if name.endswith(self.SUFFIX))
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': size
+            }
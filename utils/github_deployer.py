@@ -0,0 +1,304 @@
+import base64
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import quote, urlencode
+
+from utils.http_client import HttpClient, default_client
+from utils.metrics import default_metrics
+
+
+class GitHubError(Exception):
+    """Raised when the GitHub API answers with an unexpected status."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class GitHubClient:
+    """
+    Minimal GitHub REST client for one access token, on the shared HttpClient.
+    GET responses are kept in a small LRU cache: entries younger than the
+    caller's max_age are served without a request, older ones are revalidated
+    with If-None-Match, and a 304 (which GitHub does not count against the
+    rate limit) reuses the cached body.
+    """
+
+    def __init__(self, token: str, http_client: Optional[HttpClient] = None,
+                 api_url: str = 'https://api.github.com', timeout: float = 30,
+                 metadata_ttl: float = 60, max_cache_entries: int = 256):
+        self.token = token
+        self.http_client = http_client or default_client()
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.metadata_ttl = metadata_ttl
+        self.max_cache_entries = max_cache_entries
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+        self.rate_limit_remaining = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_headers(self) -> Dict[str, str]:
+        return {
+            'Authorization': f'token {self.token}',
+            'Accept': 'application/vnd.github+json'
+        }
+
+    def _send(self, method: str, path: str, headers: Optional[Dict[str, str]] = None, **kwargs):
+        response = self.http_client.request(
+            method,
+            self.api_url + path,
+            headers={**self._get_headers(), **(headers or {})},
+            timeout=self.timeout,
+            **kwargs
+        )
+        with self._lock:
+            self.requests += 1
+            if 'X-RateLimit-Remaining' in response.headers:
+                self.rate_limit_remaining = int(response.headers['X-RateLimit-Remaining'])
+        return response
+
+    @staticmethod
+    def _decode(response, method: str, path: str, expected) -> Dict[str, Any]:
+        if response.status_code not in expected:
+            try:
+                message = response.json().get('message', response.reason)
+            except ValueError:
+                message = response.reason
+            raise GitHubError(f'{method} {path} returned {response.status_code}: {message}', response.status_code)
+        return response.json() if response.content else {}
+
+    def request(self, method: str, path: str, expected=(200,), **kwargs) -> Dict[str, Any]:
+        """Call the API and return the decoded JSON body, raising GitHubError on any other status"""
+        return self._decode(self._send(method, path, **kwargs), method, path, expected)
+
+    def get(self, path: str, params: Optional[Dict[str, str]] = None, max_age: float = 0) -> Dict[str, Any]:
+        key = path + ('?' + urlencode(sorted(params.items())) if params else '')
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                if time.monotonic() - entry['fetched'] < max_age:
+                    self.cache_hits += 1
+                    return entry['body']
+
+        headers = {'If-None-Match': entry['etag']} if entry is not None and entry['etag'] else None
+        response = self._send('GET', path, headers=headers, params=params)
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                self.not_modified += 1
+                entry['fetched'] = time.monotonic()
+            return entry['body']
+
+        body = self._decode(response, 'GET', path, (200,))
+        etag = response.headers.get('ETag')
+        if etag or max_age:
+            self.remember(key, body, etag)
+        return body
+
+    def remember(self, key: str, body: Dict[str, Any], etag: Optional[str] = None):
+        """Store a response body (e.g. a resource this client just created) in the GET cache"""
+        with self._lock:
+            self._cache[key] = {'body': body, 'etag': etag, 'fetched': time.monotonic()}
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
+    def post(self, path: str, json: Dict[str, Any], expected=(201,), retry: Optional[bool] = None) -> Dict[str, Any]:
+        """POSTs are not retried unless retry=True (safe where the result does not depend on how often it runs)"""
+        return self.request('POST', path, expected=expected, json=json, retry=retry)
+
+    def patch(self, path: str, json: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request('PATCH', path, json=json)
+
+    def put(self, path: str, json: Dict[str, Any], expected=(200, 201)) -> Dict[str, Any]:
+        return self.request('PUT', path, expected=expected, json=json)
+
+    def get_repo(self, owner: str, repo_name: str) -> Dict[str, Any]:
+        """Repository metadata, reused for metadata_ttl seconds"""
+        return self.get(f'/repos/{owner}/{repo_name}', max_age=self.metadata_ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'cache_hits': self.cache_hits,
+                'rate_limit_remaining': self.rate_limit_remaining
+            }
+
+
+class GitHubClientCache:
+    """One GitHubClient per access token, so repeat deploys in a session share its response cache."""
+
+    def __init__(self, http_client: Optional[HttpClient] = None, api_url: str = 'https://api.github.com',
+                 timeout: float = 30, metadata_ttl: float = 60, max_clients: int = 256):
+        self.http_client = http_client
+        self.api_url = api_url
+        self.timeout = timeout
+        self.metadata_ttl = metadata_ttl
+        self.max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> GitHubClient:
+        key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = GitHubClient(token, self.http_client, self.api_url, self.timeout, self.metadata_ttl)
+                self._clients[key] = client
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            return client
+
+
+def git_blob_sha(content: bytes) -> str:
+    """SHA git assigns to a blob with this content"""
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+class GitHubPagesDeployer:
+    """
+    Publish a static site to a GitHub Pages repository in one commit.
+    Uses the Git Data API (blobs, tree, commit, ref) so any number of files
+    land in a single commit; uploads only blobs whose SHA changed and skips
+    the commit entirely when nothing did. A freshly created repository is
+    polled with exponential backoff until its branch exists. An existing
+    empty repository is seeded with one file through the Contents API (the
+    Git Data API refuses empty repositories), and an existing one without
+    the default branch gets it back as a new root commit.
+    Each phase (prepare, compare, upload, commit) is timed as a stage.
+    """
+
+    def __init__(self, client: GitHubClient, ready_attempts: int = 8, ready_backoff: float = 0.25,
+                 max_ready_delay: float = 4.0, sleep: Callable[[float], None] = time.sleep):
+        self.client = client
+        self.ready_attempts = ready_attempts
+        self.ready_backoff = ready_backoff
+        self.max_ready_delay = max_ready_delay
+        self.sleep = sleep
+
+    def _get_or_create_repo(self, owner: str, repo_name: str, description: str) -> Tuple[Dict[str, Any], bool]:
+        try:
+            return self.client.get_repo(owner, repo_name), False
+        except GitHubError as e:
+            if e.status != 404:
+                raise
+
+        repo = self.client.post('/user/repos', {
+            'name': repo_name,
+            'description': description,
+            'homepage': f'https://{repo_name}',
+            'has_issues': False,
+            'has_wiki': False,
+            'has_projects': False,
+            'auto_init': True
+        })
+        self.client.remember(f'/repos/{owner}/{repo_name}', repo)
+        return repo, True
+
+    def _wait_for_branch(self, repo_path: str, branch: str, created_repo: bool) -> str:
+        """Head commit SHA of branch, polling while a repository this deploy created is still initialising"""
+        for attempt in range(self.ready_attempts):
+            try:
+                return self.client.get(f'{repo_path}/git/ref/heads/{branch}')['object']['sha']
+            except GitHubError as e:
+                # 404 until the initial commit exists, 409 while the repository is empty; only a
+                # repository that is initialising gets past that by itself, so an existing one fails fast
+                if not created_repo or e.status not in (404, 409) or attempt == self.ready_attempts - 1:
+                    raise
+            self.sleep(min(self.max_ready_delay, self.ready_backoff * (2 ** attempt)))
+        raise GitHubError(f'{repo_path} has no {branch} branch')
+
+    def _seed(self, repo_path: str, path: str, data: bytes, message: str) -> str:
+        """
+        First commit of an empty repository, holding one file. The Git Data
+        API answers 409 on a repository without commits; the Contents API does not.
+        """
+        result = self.client.put(f'{repo_path}/contents/{quote(path)}', {
+            'message': message,
+            'content': base64.b64encode(data).decode('ascii')
+        })
+        return result['commit']['sha']
+
+    def deploy(self, owner: str, repo_name: str, files: Dict[str, Union[str, bytes]], message: str,
+               description: str = 'Personal portfolio website generated by Resume to Portfolio',
+               progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Commit files (path -> content) to the repository's default branch,
+        creating the repository if needed. Returns {'status': 'created' |
+        'updated' | 'unchanged', 'created_repo', 'commit_sha', 'changed'}.
+        """
+        progress = progress or (lambda stage: None)
+        contents = {path: data.encode('utf-8') if isinstance(data, str) else data for path, data in files.items()}
+        metrics = default_metrics()
+        progress('preparing repository')
+        with metrics.stage('github_prepare'):
+            repo, created_repo = self._get_or_create_repo(owner, repo_name, description)
+            repo_path = f'/repos/{owner}/{repo_name}'
+            branch = repo.get('default_branch') or 'main'
+            seeded = []
+            try:
+                head_sha = self._wait_for_branch(repo_path, branch, created_repo)
+            except GitHubError as e:
+                if created_repo or e.status not in (404, 409):
+                    raise
+                head_sha = None
+                if e.status == 409:
+                    # Empty: commit one file through the Contents API, then the rest as usual
+                    seeded = [min(contents)]
+                    head_sha = self._seed(repo_path, seeded[0], contents[seeded[0]], message)
+
+        progress('comparing')
+        with metrics.stage('github_compare'):
+            base_tree = None
+            existing = {}
+            if head_sha is not None:
+                # Commits and trees are addressed by SHA and never change, so cached copies are always valid
+                base_tree = self.client.get(f'{repo_path}/git/commits/{head_sha}', max_age=math.inf)['tree']['sha']
+                tree_entries = self.client.get(f'{repo_path}/git/trees/{base_tree}', params={'recursive': '1'},
+                                               max_age=math.inf)['tree']
+                existing = {entry['path']: entry['sha'] for entry in tree_entries if entry['type'] == 'blob'}
+            changed = sorted(path for path, data in contents.items() if existing.get(path) != git_blob_sha(data))
+
+        if not changed:
+            status = 'created' if seeded else 'unchanged'
+            return {'status': status, 'created_repo': created_repo, 'commit_sha': head_sha, 'changed': seeded}
+
+        progress('uploading')
+        tree = []
+        with metrics.stage('github_upload'):
+            for path in changed:
+                # Blobs and trees are addressed by their content, so sending one twice creates nothing new
+                blob = self.client.post(f'{repo_path}/git/blobs', {
+                    'content': base64.b64encode(contents[path]).decode('ascii'),
+                    'encoding': 'base64'
+                }, retry=True)
+                tree.append({'path': path, 'mode': '100644', 'type': 'blob', 'sha': blob['sha']})
+
+        progress('committing')
+        with metrics.stage('github_commit'):
+            tree_body = {'tree': tree} if base_tree is None else {'base_tree': base_tree, 'tree': tree}
+            new_tree = self.client.post(f'{repo_path}/git/trees', tree_body, retry=True)
+            # A missing branch (say, a renamed default branch) starts again from a root commit
+            commit = self.client.post(f'{repo_path}/git/commits', {
+                'message': message,
+                'tree': new_tree['sha'],
+                'parents': [head_sha] if head_sha is not None else []
+            })
+            if head_sha is None:
+                self.client.post(f'{repo_path}/git/refs', {'ref': f'refs/heads/{branch}', 'sha': commit['sha']})
+            else:
+                self.client.patch(f'{repo_path}/git/refs/heads/{branch}', {'sha': commit['sha']})
+
+        status = 'updated' if not seeded and any(path in existing for path in changed) else 'created'
+        return {'status': status, 'created_repo': created_repo, 'commit_sha': commit['sha'],
+                'changed': sorted(seeded + changed)}
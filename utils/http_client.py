@@ -0,0 +1,338 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import default_metrics
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without contacting the upstream while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast once an upstream keeps failing.
+    Opens after failure_threshold consecutive failures, lets a single trial
+    request through after reset_timeout, and closes again on success.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def available(self) -> bool:
+        """Whether allow() would let a request through now, without claiming the half-open trial"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            return time.monotonic() - self.opened_at >= self.reset_timeout and not self._trial_in_flight
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """End a half-open trial that produced no outcome (cancelled, bad request), so another may run"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class _RetryPolicy:
+    """Retry, backoff and circuit-breaker settings shared by the sync and async clients."""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # Sending these twice has the same effect as sending them once; other methods are only resent
+    # after an answer saying the request was not processed (429, or 503 with Retry-After), or on request
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+    FAILURE_STATUSES = {500, 502, 503, 504}
+
+    def __init__(self, pool_size: int = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 max_backoff: float = 30.0, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        """Circuit breaker shared by every request to the URL's host"""
+        host = urlsplit(str(url)).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def _check_breaker(self, breaker: CircuitBreaker, url: str):
+        if not breaker.allow():
+            raise CircuitOpenError(f'Circuit open for {urlsplit(str(url)).netloc}; upstream is unavailable')
+
+    def _record_status(self, breaker: CircuitBreaker, status_code: int):
+        if status_code in self.FAILURE_STATUSES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    @staticmethod
+    def _observe(url: str, status, started: float):
+        """Report one attempt's status code (or error kind) and latency to the metrics registry"""
+        default_metrics().observe_upstream(urlsplit(str(url)).netloc, status, time.perf_counter() - started)
+
+    def _idempotent(self, method: str, retry: Optional[bool]) -> bool:
+        """Whether any failed attempt may be resent: idempotent methods, unless the caller decides"""
+        return method.upper() in self.IDEMPOTENT_METHODS if retry is None else retry
+
+    def _should_retry(self, response, idempotent: bool) -> bool:
+        if response.status_code not in self.RETRY_STATUSES:
+            return False
+        # 429, and 503 with Retry-After, mean the request was turned away unprocessed
+        return (idempotent or response.status_code == 429
+                or (response.status_code == 503 and 'Retry-After' in response.headers))
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def _retry_delay(self, attempt: int, headers) -> float:
+        """Delay requested by a Retry-After header (seconds or HTTP date), else jittered backoff"""
+        value = headers.get('Retry-After')
+        if value:
+            try:
+                delay = float(value)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(value).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    return self._backoff(attempt)
+            return min(max(delay, 0.0), self.max_backoff)
+        return self._backoff(attempt)
+
+
+class HttpClient(_RetryPolicy):
+    """
+    Pooled HTTP client shared by the LLM and GitHub integrations.
+    Keeps connections alive across requests, retries 429/5xx responses and
+    connection errors with jittered exponential backoff (honouring
+    Retry-After), and trips a per-host circuit breaker when an upstream is down.
+    Only idempotent methods are retried by default: a POST that timed out or
+    failed may still have been carried out, so it is resent only after a
+    429 or a 503 with Retry-After (which say it was not), or with
+    retry=True where sending it again is safe; retry=False never resends.
+    """
+
+    def __init__(self, pool_size: int = 10, **kwargs):
+        super().__init__(pool_size=pool_size, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Send a request with retries. Returns the final response (which may
+        still be an error status once retries are exhausted) or raises the
+        last connection error. retry overrides the idempotent-methods default.
+        """
+        breaker = self.breaker_for(url)
+        idempotent = self._idempotent(method, retry)
+        last_attempt = 0 if retry is False else self.max_retries
+
+        for attempt in range(last_attempt + 1):
+            self._check_breaker(breaker, url)
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.Timeout:
+                breaker.record_failure()
+                self._observe(url, 'timeout', started)
+                raise
+            except requests.exceptions.ConnectionError:
+                breaker.record_failure()
+                self._observe(url, 'error', started)
+                if not idempotent or attempt == last_attempt:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                # Not the upstream's doing, but a half-open trial must not stay claimed forever
+                breaker.release_trial()
+                raise
+
+            self._record_status(breaker, response.status_code)
+            self._observe(url, response.status_code, started)
+
+            if attempt == last_attempt or not self._should_retry(response, idempotent):
+                return response
+
+            response.close()
+            time.sleep(self._retry_delay(attempt, response.headers))
+
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+
+class AsyncHttpClient(_RetryPolicy):
+    """
+    asyncio counterpart of HttpClient built on httpx.
+    One pooled httpx.AsyncClient is kept per event loop, so a single loop
+    can hold many in-flight requests without a thread each. Connections are
+    only reused within a loop, so run requests on one long-lived loop (see
+    EventLoopThread) and await aclose() on it before it stops; clients left
+    behind by loops that have since closed are dropped on the next request.
+    """
+
+    def __init__(self, pool_size: int = 10, **kwargs):
+        super().__init__(pool_size=pool_size, **kwargs)
+        self._clients = weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            for closed in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed]
+            client = self._clients.get(loop)
+            if client is None:
+                limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                client = httpx.AsyncClient(limits=limits)
+                self._clients[loop] = client
+            return client
+
+    async def request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request with the same retry and circuit-breaker rules as HttpClient.request"""
+        breaker = self.breaker_for(url)
+        client = self._client()
+        idempotent = self._idempotent(method, retry)
+        last_attempt = 0 if retry is False else self.max_retries
+
+        for attempt in range(last_attempt + 1):
+            self._check_breaker(breaker, url)
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TimeoutException:
+                breaker.record_failure()
+                self._observe(url, 'timeout', started)
+                raise
+            except httpx.TransportError:
+                breaker.record_failure()
+                self._observe(url, 'error', started)
+                if not idempotent or attempt == last_attempt:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                # Cancelled (say, a hedge that lost) or refused locally: free a half-open trial
+                breaker.release_trial()
+                raise
+
+            self._record_status(breaker, response.status_code)
+            self._observe(url, response.status_code, started)
+
+            if attempt == last_attempt or not self._should_retry(response, idempotent):
+                return response
+
+            await response.aclose()
+            await asyncio.sleep(self._retry_delay(attempt, response.headers))
+
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self):
+        """Close the pooled client belonging to the running loop"""
+        with self._clients_lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_default_client = None
+_default_async_client = None
+_default_client_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """Process-wide shared client, created on first use"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def configure_default_client(client: HttpClient):
+    """Replace the shared client (e.g. with one built from Config)"""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+
+
+def default_async_client() -> AsyncHttpClient:
+    """Process-wide shared async client, created on first use"""
+    global _default_async_client
+    with _default_client_lock:
+        if _default_async_client is None:
+            _default_async_client = AsyncHttpClient()
+        return _default_async_client
+
+
+def configure_default_async_client(client: AsyncHttpClient):
+    """Replace the shared async client (e.g. with one built from Config)"""
+    global _default_async_client
+    with _default_client_lock:
+        _default_async_client = client
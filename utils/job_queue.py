@@ -0,0 +1,142 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds the maximum number of pending jobs."""
+
+
+class Job:
+    """State of a single background job."""
+
+    def __init__(self, owner, kind: str, key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.kind = kind
+        self.key = key
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def set_stage(self, stage: str):
+        """Record pipeline progress (parsing, generating, validating, saved...)"""
+        with self._lock:
+            self.stage = stage
+            self.updated_at = time.time()
+
+    def finish(self, status: str, result=None, error: Optional[str] = None):
+        """Move the job to a new status (running, completed or failed)"""
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.updated_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'stage': self.stage,
+                'error': self.error,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at
+            }
+
+
+class JobQueue:
+    """
+    Run jobs on a bounded worker pool and keep their state for polling.
+    Job functions receive the Job as first argument and return a result dict
+    in the usual {'success': ..., 'error': ...} shape.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, retention: int = 3600):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        # Re-entrant so submit_once can look up and register under one lock
+        self._lock = threading.RLock()
+
+    def submit(self, owner, kind: str, func: Callable, *args, **kwargs) -> Job:
+        """Enqueue func(job, *args, **kwargs) and return the new Job immediately"""
+        job = self._register(owner, kind)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def submit_once(self, owner, kind: str, key: str, func: Callable, *args, **kwargs) -> Job:
+        """
+        Like submit, but idempotent per (owner, kind, key): while a matching
+        job is unfinished, duplicates return that job instead of running again.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if (job.owner, job.kind, job.key) == (owner, kind, key) and not job.finished:
+                    return job
+            job = self._register(owner, kind, key)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def track(self, owner, kind: str) -> Job:
+        """Register a job whose work runs elsewhere (e.g. in a streaming response)"""
+        job = self._register(owner, kind)
+        job.finish('running')
+        return job
+
+    def _register(self, owner, kind: str, key: Optional[str] = None) -> Job:
+        with self._lock:
+            self._prune()
+            if self.pending_count() >= self.max_pending:
+                raise QueueFullError('Too many jobs in progress. Please try again shortly.')
+            job = Job(owner, kind, key)
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str, owner=None) -> Optional[Job]:
+        """Look up a job, optionally restricted to the owner that submitted it"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def pending_count(self) -> int:
+        return sum(1 for job in list(self._jobs.values()) if not job.finished)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _run(job: Job, func: Callable, args, kwargs):
+        job.finish('running')
+        try:
+            result = func(job, *args, **kwargs)
+        except Exception as e:
+            job.finish('failed', error=str(e))
+            return
+
+        if isinstance(result, dict) and not result.get('success', True):
+            job.finish('failed', result=result, error=result.get('error'))
+        else:
+            job.finish('completed', result=result)
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,288 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import httpx
+import requests
+
+from utils.http_client import AsyncHttpClient, CircuitOpenError, HttpClient
+
+
+def _is_success(response) -> bool:
+    try:
+        response.raise_for_status()
+    except (requests.exceptions.HTTPError, httpx.HTTPStatusError):
+        return False
+    return True
+
+
+def _backend_failed(outcome) -> bool:
+    """Whether a finished request failed because of the backend (error, 429 or 5xx), not the request itself"""
+    if outcome.exception() is not None:
+        return True
+    status = outcome.result().status_code
+    return status == 429 or status >= 500
+
+
+class LatencyTracker:
+    """Sliding window of recent request latencies for one backend."""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None before any sample"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[max(0, math.ceil(percent / 100 * len(samples)) - 1)]
+
+
+class LlmBackend:
+    """One OpenAI-compatible chat completions endpoint."""
+
+    def __init__(self, name: str, api_url: str, api_key: str, model: str, window: int = 100):
+        self.name = name
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = model
+        self.latency = LatencyTracker(window)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(payload, model=self.model)
+
+
+class LlmRouter:
+    """
+    Send chat completions to the fastest healthy backend, hedging slow calls.
+    Backends are ranked by median latency (unmeasured ones keep their
+    configured order, after measured ones). Once a request has run longer
+    than the primary's p95 latency, the same request is sent to the next
+    backend and whichever answers first wins. An async loser is cancelled;
+    a sync loser cannot be interrupted mid-request, so its response is
+    closed as soon as it arrives. A primary that fails before the hedge
+    delay (connection error, 429 or 5xx) fails over to the next backend at
+    once. A backend whose circuit breaker is open - in the client that would
+    send the request - or whose half-open trial is in flight is skipped; a
+    cancelled loser hands its trial back, so the backend is tried again.
+    """
+
+    def __init__(self, backends: List[LlmBackend], http_client: HttpClient,
+                 async_http_client: Optional[AsyncHttpClient] = None, hedge: bool = True,
+                 hedge_percentile: float = 95, min_hedge_delay: float = 2.0,
+                 default_hedge_delay: float = 30.0, min_samples: int = 5, max_workers: int = 32):
+        if not backends:
+            raise ValueError('At least one LLM backend is required')
+        self.backends = backends
+        self.http_client = http_client
+        self.async_http_client = async_http_client
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _healthy(self, backend: LlmBackend, client: Union[HttpClient, AsyncHttpClient, None] = None) -> bool:
+        # A half-open backend whose one trial request is already out would be refused as well
+        return (client or self.http_client).breaker_for(backend.api_url).available()
+
+    def ranked(self, client: Union[HttpClient, AsyncHttpClient, None] = None) -> List[LlmBackend]:
+        """Backends healthy in client (the sync client by default), fastest first"""
+        if len(self.backends) == 1:
+            # Nothing to route between; the client's own breaker still fails fast
+            return list(self.backends)
+
+        def sort_key(item):
+            index, backend = item
+            median = backend.latency.percentile(50)
+            return (median is None, median or 0.0, index)
+
+        ranked = [backend for _, backend in sorted(enumerate(self.backends), key=sort_key)]
+        return [backend for backend in ranked if self._healthy(backend, client)]
+
+    def hedge_delay(self, backend: LlmBackend) -> float:
+        """How long to wait on a backend before sending the hedged request"""
+        if len(backend.latency) < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, backend.latency.percentile(self.hedge_percentile))
+
+    def _pick(self, client: Union[HttpClient, AsyncHttpClient, None] = None) -> Tuple[LlmBackend, LlmBackend]:
+        backends = self.ranked(client)
+        if not backends:
+            raise CircuitOpenError('No healthy LLM backend is available')
+        # With a single backend the hedge goes to the same endpoint, dodging a slow instance
+        return backends[0], backends[1] if len(backends) > 1 else backends[0]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm-hedge')
+            return self._executor
+
+    def _send(self, backend: LlmBackend, payload: Dict[str, Any], timeout: float, stream: bool):
+        start = time.monotonic()
+        kwargs = {'stream': True} if stream else {}
+        response = self.http_client.post(
+            backend.api_url,
+            headers=backend.headers(),
+            json=backend.payload(payload),
+            timeout=timeout,
+            **kwargs
+        )
+        # Streamed responses return at the headers, so they say nothing about full latency
+        if not stream and _is_success(response):
+            backend.latency.record(time.monotonic() - start)
+        return response
+
+    async def _asend(self, backend: LlmBackend, payload: Dict[str, Any], timeout: float):
+        start = time.monotonic()
+        response = await self.async_http_client.post(
+            backend.api_url,
+            headers=backend.headers(),
+            json=backend.payload(payload),
+            timeout=timeout
+        )
+        if _is_success(response):
+            backend.latency.record(time.monotonic() - start)
+        return response
+
+    @staticmethod
+    def _close_when_done(future):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def post(self, payload: Dict[str, Any], timeout: float, stream: bool = False):
+        """
+        Send the completion request; returns (backend, response) for the
+        first successful answer, else the last error response, else raises
+        the last exception. Streaming requests go to the fastest backend
+        without hedging.
+        """
+        primary, secondary = self._pick()
+        if stream or not self.hedge:
+            return primary, self._send(primary, payload, timeout, stream)
+
+        executor = self._get_executor()
+        futures = {executor.submit(self._send, primary, payload, timeout, False): primary}
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+        hedge_future = None
+        if not done:
+            with self._lock:
+                self.hedges += 1
+            hedge_future = executor.submit(self._send, secondary, payload, timeout, False)
+            futures[hedge_future] = secondary
+        elif secondary is not primary and _backend_failed(next(iter(done))):
+            with self._lock:
+                self.failovers += 1
+            futures[executor.submit(self._send, secondary, payload, timeout, False)] = secondary
+
+        pending = set(futures)
+        last_response = None
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+
+                if _is_success(response):
+                    for loser in pending:
+                        loser.cancel()
+                        loser.add_done_callback(self._close_when_done)
+                    if future is hedge_future:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return futures[future], response
+                last_response = (futures[future], response)
+
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    async def apost(self, payload: Dict[str, Any], timeout: float):
+        """Async counterpart of post; the losing request is cancelled"""
+        primary, secondary = self._pick(self.async_http_client)
+        if not self.hedge:
+            return primary, await self._asend(primary, payload, timeout)
+
+        tasks = {asyncio.ensure_future(self._asend(primary, payload, timeout)): primary}
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary))
+        hedge_task = None
+        if not done:
+            with self._lock:
+                self.hedges += 1
+            hedge_task = asyncio.ensure_future(self._asend(secondary, payload, timeout))
+            tasks[hedge_task] = secondary
+        elif secondary is not primary and _backend_failed(next(iter(done))):
+            with self._lock:
+                self.failovers += 1
+            tasks[asyncio.ensure_future(self._asend(secondary, payload, timeout))] = secondary
+
+        pending = set(tasks)
+        last_response = None
+        last_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    response = task.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+
+                if _is_success(response):
+                    for loser in pending:
+                        loser.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    if task is hedge_task:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return tasks[task], response
+                last_response = (tasks[task], response)
+
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'failovers': self.failovers,
+            'backends': [{
+                'name': backend.name,
+                'healthy': self._healthy(backend),
+                'samples': len(backend.latency),
+                'p50': backend.latency.percentile(50),
+                'p95': backend.latency.percentile(95)
+            } for backend in self.backends]
+        }
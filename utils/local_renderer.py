@@ -0,0 +1,222 @@
+import datetime
+import os
+import re
+from typing import Any, Dict, List
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from utils.resume_parser import PAGE_BREAK
+
+TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+
+class LocalRenderer:
+    """
+    Render a Directive-style portfolio from resume sections with Jinja.
+    Needs no network and runs in milliseconds, so it serves both as an
+    explicit "fast" mode and as the fallback when the LLM fails or times out.
+    Output declares its colours in :root like the LLM's, so ThemeApplier
+    works on it unchanged. The same template also renders the structured
+    JSON content the LLM returns in hybrid mode.
+    """
+
+    # Section name -> (nav/heading title, layout kind), in page order
+    SECTION_LAYOUT = {
+        'summary': ('About', 'paragraphs'),
+        'experience': ('Experience', 'entries'),
+        'skills': ('Skills', 'skills'),
+        'projects': ('Projects', 'entries'),
+        'education': ('Education', 'entries'),
+        'certifications': ('Certifications', 'entries'),
+        'achievements': ('Achievements', 'entries')
+    }
+
+    BULLET_PATTERN = re.compile(r'^[•\-*▪●◦‣–]\s*')
+    SKILL_SPLIT_PATTERN = re.compile(r'[,;|•\n]')
+    # A scrubber placeholder with the label in front of it ("Email: [EMAIL REMOVED]")
+    PLACEHOLDER_PATTERN = re.compile(r'(?:\b[A-Za-z-]+:\s*)?\[[A-Z ]+ REMOVED\]')
+    SEPARATOR_RUN_PATTERN = re.compile(r'\s*([,;|·])[\s,;|·]*')
+    MAX_SKILLS = 24
+    MAX_SKILL_LENGTH = 40
+
+    def __init__(self, template_folder: str = TEMPLATE_FOLDER, template_name: str = 'portfolio/directive.html'):
+        self.env = Environment(
+            loader=FileSystemLoader(template_folder),
+            autoescape=select_autoescape(['html']),
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        self.template_name = template_name
+
+    @classmethod
+    def _scrub_placeholders(cls, line: str) -> str:
+        """The line without scrubber placeholders and the separators they leave dangling"""
+        line = cls.PLACEHOLDER_PATTERN.sub('', line)
+        line = cls.SEPARATOR_RUN_PATTERN.sub(lambda match: f'{match.group(1)} ' if match.group(1) in ',;'
+                                             else f' {match.group(1)} ', line)
+        return line.strip().lstrip(',;|·').rstrip(',;|· ').strip()
+
+    @classmethod
+    def _lines(cls, text: str) -> List[str]:
+        lines = []
+        for line in text.split("\n"):
+            # Page breaks are not blank lines
+            if line == PAGE_BREAK:
+                continue
+            if 'REMOVED]' in line:
+                line = cls._scrub_placeholders(line)
+                # Nothing but placeholders: drop the line rather than turn it into a paragraph break
+                if not re.search(r'\w', line):
+                    continue
+            lines.append(line.strip())
+        return lines
+
+    @classmethod
+    def _paragraphs(cls, text: str) -> List[str]:
+        paragraphs, current = [], []
+        for line in cls._lines(text) + ['']:
+            if line:
+                current.append(cls.BULLET_PATTERN.sub('', line))
+            elif current:
+                paragraphs.append(' '.join(current))
+                current = []
+        return paragraphs
+
+    @classmethod
+    def _skills(cls, text: str) -> List[str]:
+        skills = []
+        for item in cls.SKILL_SPLIT_PATTERN.split("\n".join(cls._lines(text))):
+            item = cls.BULLET_PATTERN.sub('', item.strip()).strip()
+            if item and len(item) <= cls.MAX_SKILL_LENGTH and item not in skills:
+                skills.append(item)
+        return skills[:cls.MAX_SKILLS]
+
+    @classmethod
+    def _entries(cls, text: str) -> List[Dict[str, Any]]:
+        """
+        Group lines into entries: a plain line starts an entry, the next plain
+        line is its subtitle (company, dates), bullets and further lines are
+        details; a blank line always closes the entry
+        """
+        entries = []
+        current = None
+
+        for line in cls._lines(text):
+            if not line:
+                current = None
+                continue
+
+            bullet = cls.BULLET_PATTERN.match(line) is not None
+            line = cls.BULLET_PATTERN.sub('', line)
+
+            if current is None or (not bullet and current['details']):
+                current = {'title': '' if bullet else line, 'subtitle': '', 'details': [line] if bullet else []}
+                entries.append(current)
+            elif not bullet and not current['subtitle']:
+                current['subtitle'] = line
+            else:
+                current['details'].append(line)
+
+        return entries
+
+    def build_context(self, sections: Dict[str, Dict[str, Any]], text: str,
+                      color_theme: Dict[str, str]) -> Dict[str, Any]:
+        """Template variables from ResumeParser.extract_sections output (or the raw text if it had no headers)"""
+        intro = sections['intro']['text'] if 'intro' in sections else ('' if sections else text)
+        intro_lines = [line for line in self._lines(intro) if line]
+        name = intro_lines[0] if intro_lines else 'Portfolio'
+        headline = intro_lines[1] if len(intro_lines) > 1 else ''
+
+        page_sections = []
+        for section_name, (title, kind) in self.SECTION_LAYOUT.items():
+            if section_name in sections:
+                body = sections[section_name]['text']
+            elif section_name == 'summary' and not sections:
+                body = "\n".join(intro_lines[2:])
+            else:
+                continue
+
+            section = {'id': section_name, 'title': title, 'kind': kind}
+            if kind == 'paragraphs':
+                section['paragraphs'] = self._paragraphs(body)
+            elif kind == 'skills':
+                section['skills'] = self._skills(body)
+            else:
+                section['entries'] = self._entries(body)
+
+            if section.get('paragraphs') or section.get('skills') or section.get('entries'):
+                page_sections.append(section)
+
+        return {
+            'name': name,
+            'headline': headline,
+            'sections': page_sections,
+            'theme': color_theme,
+            'year': datetime.date.today().year
+        }
+
+    def build_content_context(self, content: Dict[str, Any], color_theme: Dict[str, str]) -> Dict[str, Any]:
+        """Template variables from validated structured content (see utils/portfolio_schema.py)"""
+        sections = []
+
+        if content['summary']:
+            sections.append({'id': 'summary', 'title': 'About', 'kind': 'paragraphs',
+                             'paragraphs': [p.strip() for p in content['summary'].split("\n\n") if p.strip()]})
+        if content['experience']:
+            sections.append({'id': 'experience', 'title': 'Experience', 'kind': 'entries', 'entries': [{
+                'title': job['role'],
+                'subtitle': ' · '.join(part for part in (job['company'], job['dates']) if part),
+                'details': job['highlights']
+            } for job in content['experience']]})
+        if content['skills']:
+            sections.append({'id': 'skills', 'title': 'Skills', 'kind': 'skills',
+                             'skills': content['skills'][:self.MAX_SKILLS]})
+        if content['projects']:
+            sections.append({'id': 'projects', 'title': 'Projects', 'kind': 'entries', 'entries': [{
+                'title': project['name'],
+                'subtitle': '',
+                'details': [project['description']] if project['description'] else []
+            } for project in content['projects']]})
+        if content['education']:
+            sections.append({'id': 'education', 'title': 'Education', 'kind': 'entries', 'entries': [{
+                'title': school['degree'],
+                'subtitle': ' · '.join(part for part in (school['institution'], school['dates']) if part),
+                'details': []
+            } for school in content['education']]})
+
+        return {
+            'name': content['name'],
+            'headline': content['title'],
+            'sections': sections,
+            'theme': color_theme,
+            'year': datetime.date.today().year
+        }
+
+    def render(self, sections: Dict[str, Dict[str, Any]], text: str, color_theme: Dict[str, str]) -> str:
+        return self.env.get_template(self.template_name).render(**self.build_context(sections, text, color_theme))
+
+    def render_content(self, content: Dict[str, Any], color_theme: Dict[str, str]) -> str:
+        return self.env.get_template(self.template_name).render(**self.build_content_context(content, color_theme))
+
+    def render_portfolio(self, parsed_data: Dict[str, Any], color_theme: Dict[str, str]) -> Dict[str, Any]:
+        """Same result shape as PortfolioGenerator.generate_portfolio"""
+        return self._result(self.render, parsed_data['sections'], parsed_data['filtered_text'], color_theme)
+
+    def render_content_portfolio(self, content: Dict[str, Any], color_theme: Dict[str, str]) -> Dict[str, Any]:
+        """Render model-extracted structured content; same result shape as render_portfolio"""
+        return self._result(self.render_content, content, color_theme)
+
+    @staticmethod
+    def _result(render, *args) -> Dict[str, Any]:
+        try:
+            html_content = render(*args)
+        except Exception as e:
+            return {'success': False, 'error': f'Local rendering failed: {str(e)}', 'html': None}
+
+        return {
+            'success': True,
+            'html': html_content,
+            'error': None,
+            'cached': False,
+            'prompt_tokens': 0
+        }
@@ -0,0 +1,298 @@
+import bisect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from opentelemetry import trace
+except ImportError:  # Optional: without it stages are timed but no spans are emitted
+    trace = None
+
+# Seconds; spans sub-millisecond cleanup steps up to multi-minute LLM generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return '{' + pairs + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """A named family of samples, one per combination of label values."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[Tuple[str, List[Tuple[str, str]], float]]:
+        with self._lock:
+            return [(self.name, list(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(f'{name}{_format_labels(labels)} {_format_value(value)}'
+                     for name, labels, value in self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic total"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        """Mirror a total counted elsewhere (e.g. a cache's own hit counter)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    """Value that goes up and down, such as a queue depth"""
+
+    kind = 'gauge'
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets, with their count and sum"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), then count and sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[1] if state else 0
+
+    def _samples(self) -> List[Tuple[str, List[Tuple[str, str]], float]]:
+        samples = []
+        with self._lock:
+            for key, (counts, count, total) in self._values.items():
+                labels = list(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    samples.append((f'{self.name}_bucket', labels + [('le', _format_value(bound))], cumulative))
+                samples.append((f'{self.name}_count', labels, count))
+                samples.append((f'{self.name}_sum', labels, total))
+        return samples
+
+
+class _Stage:
+    """Context manager timing one stage into the stage histogram, inside a span when tracing"""
+
+    __slots__ = ('metrics', 'name', 'attributes', 'started', 'span')
+
+    def __init__(self, metrics: 'Metrics', name: str, attributes: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.attributes = attributes
+        self.started = 0.0
+        self.span = None
+
+    def __enter__(self):
+        if self.metrics.tracer is not None:
+            self.span = self.metrics.tracer.start_as_current_span(
+                f'{self.metrics.namespace}.{self.name}', attributes=self.attributes
+            )
+            self.span.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe_stage(self.name, time.perf_counter() - self.started, failed=exc_type is not None)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+        return False
+
+
+class _NullStage:
+    """Stage that records nothing, for when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Metrics:
+    """
+    In-process metrics registry rendered in the Prometheus text format.
+    Hot paths time their stages with `with metrics.stage('llm_request'):`,
+    which costs two clock reads and a locked bucket increment; with
+    tracing enabled (and opentelemetry installed) each stage is also an
+    OpenTelemetry span, nested under whatever span is current. Disabled,
+    stage() hands back a shared no-op context manager.
+    Values that other components already count (cache hits, queue depth)
+    are copied in by collectors registered with add_collector, which run
+    on every scrape. Each process keeps its own registry, so under a
+    multi-process server every worker is scraped separately.
+    """
+
+    def __init__(self, enabled: bool = True, tracing: bool = False, namespace: str = 'portfolio'):
+        self.enabled = enabled
+        self.namespace = namespace
+        self.tracer = trace.get_tracer(namespace) if enabled and tracing and trace is not None else None
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[['Metrics'], None]] = []
+        self._lock = threading.Lock()
+
+        self.stage_seconds = self.histogram('stage_seconds', 'Time spent in each pipeline stage', ('stage',))
+        self.stage_errors = self.counter('stage_errors_total', 'Stages that ended with an exception', ('stage',))
+        self.llm_tokens = self.counter('llm_tokens_total', 'LLM tokens reported by the API', ('kind',))
+        self.upstream_responses = self.counter(
+            'upstream_responses_total', 'Upstream HTTP attempts by host and status code (or error kind)',
+            ('host', 'status')
+        )
+        self.upstream_seconds = self.histogram('upstream_request_seconds', 'Upstream HTTP attempt latency',
+                                               ('host',))
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Tuple[str, ...], **kwargs) -> _Metric:
+        name = f'{self.namespace}_{name}'
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+                return metric
+            # Exact type match on purpose: Gauge subclasses Counter, yet a gauge must not pass for a counter
+            same_type = type(metric) is cls  # pylint: disable=unidiomatic-typecheck
+            if not same_type or metric.labelnames != tuple(labelnames):
+                raise ValueError(f'{name} is already registered with a different type or labels')
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Counter registered under the namespace, created on first use"""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        """Gauge registered under the namespace, created on first use"""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Histogram registered under the namespace, created on first use"""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def stage(self, name: str, **attributes):
+        """Context manager timing a stage (and tracing it as a span when enabled)"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, attributes)
+
+    def observe_stage(self, name: str, seconds: float, failed: bool = False):
+        """Record a stage timed elsewhere, e.g. inside a parser worker process"""
+        if not self.enabled:
+            return
+        self.stage_seconds.observe(seconds, stage=name)
+        if failed:
+            self.stage_errors.inc(stage=name)
+
+    def observe_tokens(self, usage: Optional[Dict[str, Any]]):
+        """Count the prompt and completion tokens of an OpenAI-style usage block"""
+        if not self.enabled or not usage:
+            return
+        for kind in ('prompt', 'completion'):
+            tokens = usage.get(f'{kind}_tokens')
+            if tokens:
+                self.llm_tokens.inc(tokens, kind=kind)
+
+    def observe_upstream(self, host: str, status, seconds: float):
+        """Record one upstream HTTP attempt; status is the response code or an error kind"""
+        if not self.enabled:
+            return
+        self.upstream_responses.inc(host=host, status=status)
+        self.upstream_seconds.observe(seconds, host=host)
+
+    def add_collector(self, collector: Callable[['Metrics'], None]):
+        """Run collector(metrics) before every render to refresh values kept elsewhere"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                # One unreachable source (say, Redis) must not take the whole scrape down
+                print(f"Error collecting metrics: {str(e)}")
+
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+_default_metrics = Metrics()
+_default_metrics_lock = threading.Lock()
+
+
+def default_metrics() -> Metrics:
+    """Process-wide registry the instrumented components report to"""
+    with _default_metrics_lock:
+        return _default_metrics
+
+
+def configure_default_metrics(metrics: Metrics):
+    """Replace the shared registry (e.g. with one built from Config)"""
+    global _default_metrics
+    with _default_metrics_lock:
+        _default_metrics = metrics
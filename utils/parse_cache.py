@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils.resume_parser import ResumeParser, ResumeSource
+from utils.storage import LocalStorage
+
+
+class ParseCache:
+    """
+    Parser wrapper that remembers parse results by the SHA-256 of the document.
+    Re-submitting the same resume (say, to try another theme) skips text
+    extraction and PII filtering. Results live in an in-memory LRU and,
+    when a LocalStorage is given, in JSON files on disk that survive
+    restarts and are shared by processes on the host.
+    Only the PII-filtered text, its sections and the truncation flag are
+    stored - never raw_text, which a cache hit returns as None. prompt_text
+    is rebuilt from the cached sections on every hit.
+    fingerprint should change whenever extraction settings (page and
+    character budgets, PII rules) do, so old results are not reused.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, parser=ResumeParser, max_entries: int = 128, disk: Optional[LocalStorage] = None,
+                 fingerprint: str = '', prompt_sections: Optional[List[str]] = None,
+                 max_section_chars: Optional[int] = None):
+        self.parser = parser
+        self.max_entries = max_entries
+        self.disk = disk
+        self.fingerprint = fingerprint
+        self.prompt_sections = prompt_sections
+        self.max_section_chars = max_section_chars
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, source: ResumeSource) -> str:
+        """SHA-256 of the document's bytes, read in chunks, salted with the settings fingerprint"""
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8') + b'\0')
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            digest.update(source)
+            return digest.hexdigest()
+
+        with ResumeParser.open_source(source) as file:
+            for chunk in iter(lambda: file.read(self.CHUNK_SIZE), b''):
+                digest.update(chunk)
+            if not isinstance(source, str):
+                file.seek(0)
+        return digest.hexdigest()
+
+    def _result(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'raw_text': None,
+            'filtered_text': entry['filtered_text'],
+            'sections': entry['sections'],
+            'prompt_text': ResumeParser.select_sections(
+                entry['filtered_text'], entry['sections'], self.prompt_sections, self.max_section_chars
+            ),
+            'has_content': bool(entry['filtered_text'].strip()),
+            'truncated': entry['truncated'],
+            'cached': True
+        }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached parse result for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._result(entry)
+
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, entry)
+        return self._result(entry)
+
+    def set(self, key: str, parsed_data: Dict[str, Any]):
+        """Store the cacheable part of a parse result"""
+        entry = {
+            'filtered_text': parsed_data['filtered_text'],
+            'sections': parsed_data['sections'],
+            'truncated': parsed_data.get('truncated', False)
+        }
+        self._remember(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.save(key + '.json', json.dumps(entry).encode('utf-8'))
+            except OSError as e:
+                print(f"Error caching parsed resume: {str(e)}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.disk.local_path(key + '.json') if self.disk is not None else None
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # Entries in use are kept: collection expires and evicts by modification time
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    @staticmethod
+    def _rewindable(source: ResumeSource) -> ResumeSource:
+        """A one-way stream is read into memory so it can be both hashed and parsed"""
+        if hasattr(source, 'read') and not source.seekable():
+            return source.read()
+        return source
+
+    def parse(self, source: ResumeSource) -> Dict[str, Any]:
+        """Same result shape as ResumeParser.parse, served from the cache when the document was seen before"""
+        source = self._rewindable(source)
+        key = self.make_key(source)
+        parsed_data = self.get(key)
+        if parsed_data is None:
+            parsed_data = self.parser.parse(source)
+            self.set(key, parsed_data)
+        return parsed_data
+
+    async def aparse(self, source: ResumeSource) -> Dict[str, Any]:
+        """Async counterpart of parse, awaiting the wrapped parser's aparse when it has one"""
+        source = self._rewindable(source)
+        key = self.make_key(source)
+        parsed_data = self.get(key)
+        if parsed_data is None:
+            if hasattr(self.parser, 'aparse'):
+                parsed_data = await self.parser.aparse(source)
+            else:
+                parsed_data = await asyncio.get_running_loop().run_in_executor(None, self.parser.parse, source)
+            self.set(key, parsed_data)
+        return parsed_data
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit rate and current size"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'size': len(self._entries)
+            }
@@ -0,0 +1,231 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List
+
+from utils.resume_parser import ResumeParser, ResumeSource
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class ParseTimeoutError(Exception):
+    """Raised when a document takes longer than the per-document timeout to parse."""
+
+
+def _limit_memory(memory_limit_mb: int):
+    """Cap the worker's address space so runaway documents fail with MemoryError"""
+    if resource is None or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(conn, memory_limit_mb: int):
+    """Worker process loop: announce readiness, then parse (func, payload) tasks until told to stop"""
+    _limit_memory(memory_limit_mb)
+    conn.send('ready')
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, payload = task
+        try:
+            result = (True, func(payload))
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            # Including MemoryError from the address-space cap: the document fails, the worker lives on
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            conn.send((False, RuntimeError(f'Unpicklable parse result: {str(e)}')))
+
+
+class _Worker:
+    """One spawned worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, memory_limit_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+        # Startup (interpreter spawn and imports) is not part of any document's time budget
+        self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ParserPool:
+    """
+    Parse resumes in a bounded pool of worker processes.
+    Keeps PyPDF2/python-docx work off the web worker's GIL; workers run
+    under a memory cap and are recycled after max_tasks_per_child documents.
+    Each document is handed to an idle worker of its own, and its timeout
+    counts only the time that worker spends on it - not the wait for a free
+    worker - so a stuck document kills just its own worker while other
+    parses carry on. Documents held in memory are handed to workers as
+    bytes, so they never touch the disk.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 30.0, memory_limit_mb: int = 512,
+                 max_tasks_per_child: int = 50,
+                 parse_func: Callable[[ResumeSource], Dict[str, Any]] = ResumeParser.parse):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_child = max_tasks_per_child
+        self.parse_func = parse_func
+        # Workers are spawned: forking a threaded web server is unsafe
+        self._context = multiprocessing.get_context('spawn')
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> _Worker:
+        """An idle worker, starting one if none is idle; blocks while all max_workers are busy"""
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return _Worker(self._context, self.memory_limit_mb)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, worker: _Worker, healthy: bool):
+        """Return a worker to the pool, or retire it when it failed or has done its share of documents"""
+        if healthy:
+            worker.tasks += 1
+        try:
+            if not healthy:
+                worker.kill()
+            elif worker.tasks >= self.max_tasks_per_child:
+                worker.stop()
+            else:
+                with self._lock:
+                    self._idle.append(worker)
+        finally:
+            self._slots.release()
+
+    def _return_unused(self, acquiring):
+        """Done callback of an acquisition its caller gave up on: put the worker back untouched"""
+        if acquiring.cancelled() or acquiring.exception() is not None:
+            return
+        with self._lock:
+            self._idle.append(acquiring.result())
+        self._slots.release()
+
+    def _timeout_error(self) -> ParseTimeoutError:
+        return ParseTimeoutError(f'Resume parsing took longer than {self.timeout:g} seconds')
+
+    @staticmethod
+    def _payload(source: ResumeSource):
+        """Worker arguments are pickled, which memoryviews and open streams cannot be: send their bytes"""
+        if isinstance(source, memoryview):
+            return source.tobytes()
+        if hasattr(source, 'read'):
+            with ResumeParser.open_source(source) as file:
+                return file.read()
+        return source
+
+    def parse(self, source: ResumeSource) -> Dict[str, Any]:
+        """Parse a resume in a worker process, same result shape as ResumeParser.parse"""
+        payload = self._payload(source)
+        # A worker that dies mid-parse (say, killed by the OOM killer) is replaced and the document retried once
+        for attempt in range(2):
+            worker = self._acquire()
+            healthy = False
+            try:
+                worker.conn.send((self.parse_func, payload))
+                if not worker.conn.poll(self.timeout):
+                    raise self._timeout_error()
+                ok, value = worker.conn.recv()
+                healthy = True
+            except (EOFError, OSError):
+                if attempt == 1:
+                    raise BrokenProcessPool('A resume parser worker died while parsing') from None
+                continue
+            finally:
+                self._release(worker, healthy)
+            if not ok:
+                raise value
+            return value
+        return None
+
+    async def _wait_readable(self, worker: _Worker) -> bool:
+        """Wait up to timeout for the worker's answer on the event loop, without a thread"""
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = worker.conn.fileno()
+        try:
+            loop.add_reader(fd, lambda: readable.done() or readable.set_result(True))
+        except NotImplementedError:  # e.g. the Windows proactor loop: wait on a thread instead
+            return await loop.run_in_executor(None, worker.conn.poll, self.timeout)
+        try:
+            return await asyncio.wait_for(readable, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+
+    async def aparse(self, source: ResumeSource) -> Dict[str, Any]:
+        """
+        Await a parse without tying up a thread while the worker process runs
+        (a thread is only held while waiting for a free or freshly started worker)
+        """
+        loop = asyncio.get_running_loop()
+        payload = self._payload(source)
+        for attempt in range(2):
+            acquiring = loop.run_in_executor(None, self._acquire)
+            try:
+                worker = await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # The thread still takes a worker once one is free; it must not leak with the cancelled task
+                acquiring.add_done_callback(self._return_unused)
+                raise
+            healthy = False
+            try:
+                worker.conn.send((self.parse_func, payload))
+                if not await self._wait_readable(worker):
+                    raise self._timeout_error()
+                ok, value = worker.conn.recv()
+                healthy = True
+            except (EOFError, OSError):
+                if attempt == 1:
+                    raise BrokenProcessPool('A resume parser worker died while parsing') from None
+                continue
+            finally:
+                self._release(worker, healthy)
+            if not ok:
+                raise value
+            return value
+        return None
+
+    def shutdown(self):
+        """Stop the idle workers; busy ones rejoin the pool when their parse ends, and new ones start on demand"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
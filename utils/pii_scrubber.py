@@ -0,0 +1,98 @@
+import re
+from typing import Callable, Dict, Iterable, List, Union
+
+
+def _strip_url_query(url: str) -> str:
+    return url.split('?', 1)[0] + '?[TOKEN REMOVED]'
+
+
+class PiiRule:
+    """
+    One kind of personal data to remove.
+    The pattern must only use non-capturing groups; the replacement is a
+    fixed string or a callable taking the matched text. first_chars is a
+    character-class body covering every character a match can start with,
+    used to skip positions where no rule can match.
+    """
+
+    def __init__(self, name: str, pattern: str, replacement: Union[str, Callable[[str], str]],
+                 first_chars: str = None):
+        self.name = name
+        self.pattern = pattern
+        self.replacement = replacement
+        self.first_chars = first_chars
+
+
+# Every repeat is bounded and adjacent repeats never share characters, so no rule
+# can backtrack catastrophically on long lines (possessive quantifiers would need
+# Python 3.11).
+PHONE_RULE = PiiRule(
+    'phone',
+    r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
+    '[PHONE NUMBER REMOVED]',
+    first_chars=r'\d+('
+)
+ADDRESS_RULE = PiiRule(
+    'address',
+    r'(?i:\b\d{1,6}[ \t]{1,4}(?:[A-Za-z]{1,30}[ \t]{1,4}){1,6}?'
+    r'(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Way|Court|Ct|Circle|Cir|Place|Pl)\b)',
+    '[ADDRESS REMOVED]',
+    first_chars=r'\d'
+)
+ZIP_RULE = PiiRule('zip', r'\b\d{5}(?:-\d{4})?\b', '[ZIP REMOVED]', first_chars=r'\d')
+EMAIL_RULE = PiiRule(
+    'email',
+    r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){1,8}\b',
+    '[EMAIL REMOVED]',
+    first_chars=r'A-Za-z0-9._%+\-'
+)
+URL_TOKEN_RULE = PiiRule(
+    'url_token',
+    r'(?i:https?://[^\s?#]{1,2048}\?[^\s#]{0,2048}?(?:token|key|sig|signature|auth|session)[^\s#]{0,2048})',
+    _strip_url_query,
+    first_chars='hH'
+)
+NATIONAL_ID_RULE = PiiRule('national_id', r'\b\d{3}-\d{2}-\d{4}\b', '[NATIONAL ID REMOVED]', first_chars=r'\d')
+
+DEFAULT_RULES = [PHONE_RULE, ADDRESS_RULE, ZIP_RULE]
+OPTIONAL_RULES = {rule.name: rule for rule in (EMAIL_RULE, URL_TOKEN_RULE, NATIONAL_ID_RULE)}
+
+
+class PiiScrubber:
+    """
+    Remove personal data in a single pass.
+    All rules are compiled into one alternation of named groups; each match
+    is dispatched to its rule's replacement. Earlier rules win when several
+    match at the same position, so more specific rules should come first.
+    When every rule declares its first characters, the alternation is guarded
+    by a lookahead so positions no rule can start at are skipped cheaply.
+    """
+
+    def __init__(self, rules: Iterable[PiiRule] = None):
+        self.rules: List[PiiRule] = list(DEFAULT_RULES if rules is None else rules)
+        self._replacements: Dict[str, Union[str, Callable[[str], str]]] = {
+            rule.name: rule.replacement for rule in self.rules
+        }
+        pattern = '|'.join(f'(?P<{rule.name}>{rule.pattern})' for rule in self.rules)
+        if self.rules and all(rule.first_chars for rule in self.rules):
+            first_chars = ''.join(rule.first_chars for rule in self.rules)
+            pattern = f'(?=[{first_chars}])(?:{pattern})'
+        self._regex = re.compile(pattern)
+
+    @classmethod
+    def with_rules(cls, names: Iterable[str]) -> 'PiiScrubber':
+        """Default rules plus the named optional ones (email, url_token, national_id)"""
+        extra = []
+        for name in names:
+            if name not in OPTIONAL_RULES:
+                raise ValueError(f"Unknown PII rule: {name}")
+            extra.append(OPTIONAL_RULES[name])
+        # Specific patterns go first so e.g. SSNs are not mistaken for phone fragments
+        return cls(extra + DEFAULT_RULES)
+
+    def _replace(self, match: re.Match) -> str:
+        replacement = self._replacements[match.lastgroup]
+        return replacement if isinstance(replacement, str) else replacement(match.group())
+
+    def scrub(self, text: str) -> str:
+        return self._regex.sub(self._replace, text)
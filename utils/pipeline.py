@@ -0,0 +1,215 @@
+import asyncio
+import uuid
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional, Union
+
+from utils.local_renderer import LocalRenderer
+from utils.metrics import default_metrics
+from utils.resume_parser import ResumeParser, ResumeSource
+from utils.portfolio_generator import PortfolioGenerator
+from utils.storage import LocalStorage, Storage, StorageError
+from utils.theme_applier import ThemeApplier
+
+RENDERERS = ('llm', 'structured', 'local')
+
+
+class PortfolioPipeline:
+    """
+    Run the parse -> generate -> validate -> save pipeline for one resume.
+    The portfolio is generated once and saved in every theme, so switching
+    theme afterwards needs no further LLM call.
+    Progress is reported through an optional callback taking the stage name.
+    The parser is anything with a ResumeParser-style parse(source), such as
+    a ParserPool; if it also has an async aparse(), arun() awaits that.
+    renderer picks how the page is built: 'llm' (the model writes the HTML),
+    'structured' (the model returns JSON content that the LocalRenderer
+    turns into HTML) or 'local' (no model at all). With fallback enabled, a
+    failed LLM generation is rendered locally.
+    Portfolios are written to a Storage; a folder path means a LocalStorage there.
+    Each stage (parse, generate, save) is timed into the default metrics registry.
+    """
+
+    def __init__(self, generator: PortfolioGenerator, storage: Union[Storage, str], themes: Dict[str, Dict[str, str]],
+                 parser=ResumeParser, local_renderer: Optional[LocalRenderer] = None, fallback: bool = False):
+        self.generator = generator
+        self.storage = LocalStorage(storage) if isinstance(storage, str) else storage
+        self.themes = themes
+        self.parser = parser
+        self.local_renderer = local_renderer or LocalRenderer()
+        self.fallback = fallback
+
+    @staticmethod
+    def _observe_parse(parsed_data: Dict[str, Any]):
+        """Report the extraction and PII filtering times measured by the parser (absent on cache hits)"""
+        metrics = default_metrics()
+        for stage, seconds in (parsed_data.get('timings') or {}).items():
+            metrics.observe_stage(stage, seconds)
+
+    def parse(self, source: ResumeSource) -> Dict[str, Any]:
+        """Parse a resume with the configured parser, timing the stage"""
+        with default_metrics().stage('parse'):
+            parsed_data = self.parser.parse(source)
+        self._observe_parse(parsed_data)
+        return parsed_data
+
+    async def aparse(self, source: ResumeSource, executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """Async counterpart of parse, awaiting the parser's aparse when it has one"""
+        with default_metrics().stage('parse'):
+            if hasattr(self.parser, 'aparse'):
+                parsed_data = await self.parser.aparse(source)
+            else:
+                parsed_data = await asyncio.get_running_loop().run_in_executor(executor, self.parser.parse, source)
+        self._observe_parse(parsed_data)
+        return parsed_data
+
+    def apply_fallback(self, result: Dict[str, Any], parsed_data: Dict[str, Any], theme: str,
+                       renderer: str) -> Dict[str, Any]:
+        """Fall back to local rendering if the LLM failed, then report which renderer produced the page"""
+        if renderer != 'local' and not result['success'] and self.fallback:
+            fallback_reason = result.get('error')
+            result = self.local_renderer.render_portfolio(parsed_data, self.themes[theme])
+            result['fallback_reason'] = fallback_reason
+            renderer = 'local'
+
+        result['renderer'] = renderer
+        return result
+
+    def _render_content(self, result: Dict[str, Any], theme: str) -> Dict[str, Any]:
+        """Turn a generate_content result into an HTML result"""
+        if not result['success']:
+            return result
+        rendered = self.local_renderer.render_content_portfolio(result['content'], self.themes[theme])
+        rendered['prompt_tokens'] = result.get('prompt_tokens')
+        rendered['cached'] = result.get('cached', False)
+        return rendered
+
+    def generate(self, parsed_data: Dict[str, Any], theme: str, renderer: str = 'llm',
+                 progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Build the portfolio HTML for parsed resume data with the chosen renderer"""
+        with default_metrics().stage('generate', renderer=renderer):
+            if renderer == 'local':
+                result = self.local_renderer.render_portfolio(parsed_data, self.themes[theme])
+            elif renderer == 'structured':
+                result = self._render_content(
+                    self.generator.generate_content(parsed_data['prompt_text'], progress=progress), theme
+                )
+            else:
+                result = self.generator.generate_portfolio(
+                    parsed_data['prompt_text'], self.themes[theme], progress=progress
+                )
+        return self.apply_fallback(result, parsed_data, theme, renderer)
+
+    async def agenerate(self, parsed_data: Dict[str, Any], theme: str, renderer: str = 'llm',
+                        progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Async counterpart of generate"""
+        with default_metrics().stage('generate', renderer=renderer):
+            if renderer == 'local':
+                result = self.local_renderer.render_portfolio(parsed_data, self.themes[theme])
+            elif renderer == 'structured':
+                result = self._render_content(
+                    await self.generator.agenerate_content(parsed_data['prompt_text'], progress=progress), theme
+                )
+            else:
+                result = await self.generator.agenerate_portfolio(
+                    parsed_data['prompt_text'], self.themes[theme], progress=progress
+                )
+        return self.apply_fallback(result, parsed_data, theme, renderer)
+
+    def run(self, source: ResumeSource, theme: str,
+            progress: Optional[Callable[[str], None]] = None, renderer: str = 'llm') -> Dict[str, Any]:
+        progress = progress or (lambda stage: None)
+
+        try:
+            progress('parsing')
+            parsed_data = self.parse(source)
+
+            if not parsed_data['has_content']:
+                return {'success': False, 'error': 'Unable to extract content from resume.'}
+
+            progress('generating')
+            result = self.generate(parsed_data, theme, renderer, progress)
+
+            if not result['success']:
+                return {
+                    'success': False,
+                    'error': result.get('error', 'Failed to generate portfolio')
+                }
+
+            saved = self._save_variants(result['html'], theme)
+            if saved['success']:
+                saved['prompt_tokens'] = result.get('prompt_tokens')
+                saved['bytes_saved'] = result.get('bytes_saved', 0)
+                saved['renderer'] = result['renderer']
+                progress('saved')
+            return saved
+
+        except Exception as e:
+            return {'success': False, 'error': f'Error processing resume: {str(e)}'}
+
+    async def arun(self, source: ResumeSource, theme: str,
+                   progress: Optional[Callable[[str], None]] = None,
+                   executor: Optional[Executor] = None, renderer: str = 'llm') -> Dict[str, Any]:
+        """
+        Async counterpart of run: parsing and file writes are offloaded (to the
+        parser's worker processes or the given executor) while the LLM call is
+        awaited on the event loop
+        """
+        progress = progress or (lambda stage: None)
+        loop = asyncio.get_running_loop()
+
+        try:
+            progress('parsing')
+            parsed_data = await self.aparse(source, executor)
+
+            if not parsed_data['has_content']:
+                return {'success': False, 'error': 'Unable to extract content from resume.'}
+
+            progress('generating')
+            result = await self.agenerate(parsed_data, theme, renderer, progress)
+
+            if not result['success']:
+                return {
+                    'success': False,
+                    'error': result.get('error', 'Failed to generate portfolio')
+                }
+
+            saved = await loop.run_in_executor(None, self._save_variants, result['html'], theme)
+            if saved['success']:
+                saved['prompt_tokens'] = result.get('prompt_tokens')
+                saved['bytes_saved'] = result.get('bytes_saved', 0)
+                saved['renderer'] = result['renderer']
+                progress('saved')
+            return saved
+
+        except Exception as e:
+            return {'success': False, 'error': f'Error processing resume: {str(e)}'}
+
+    def _save_variants(self, html_content: str, theme: str) -> Dict[str, Any]:
+        """Save the portfolio once per theme and report the selected theme's file"""
+        with default_metrics().stage('save'):
+            return self._write_variants(html_content, theme)
+
+    def _write_variants(self, html_content: str, theme: str) -> Dict[str, Any]:
+        html_content = ThemeApplier.templatize(html_content, self.themes[theme])
+        portfolio_id = uuid.uuid4()
+        variants = {}
+
+        for variant_theme, variant_html in ThemeApplier.render_variants(html_content, self.themes).items():
+            variant_filename = f"{portfolio_id}_{variant_theme}_portfolio.html"
+
+            if not self.generator.save_portfolio(variant_html, self.storage.path(variant_filename)):
+                return {'success': False, 'error': 'Failed to save portfolio'}
+            try:
+                self.storage.commit(variant_filename)
+            except StorageError as e:
+                return {'success': False, 'error': f'Failed to store portfolio: {str(e)}'}
+
+            variants[variant_theme] = variant_filename
+
+        return {
+            'success': True,
+            'filename': variants[theme],
+            'path': self.storage.path(variants[theme]),
+            'variants': variants,
+            'error': None
+        }
@@ -1,232 +1,375 @@
 ﻿import json
-from typing import Dict
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
+import httpx
 import requests
 
+from utils.generation_cache import GenerationCache
+from utils.html_optimizer import HtmlOptimizer
+from utils.http_client import AsyncHttpClient, HttpClient, default_async_client, default_client
+from utils.llm_router import LlmBackend, LlmRouter
+from utils.metrics import default_metrics
+from utils.portfolio_schema import STRICT_PORTFOLIO_SCHEMA, PortfolioSchemaError, parse_portfolio_content
+from utils.preview_store import precompress
+from utils.prompt_builder import PromptBuilder
+from utils.storage import write_atomic
 
-class PortfolioGenerator:
-    """Generate portfolio from resume content using Perplexity API."""
 
-    def __init__(self, api_key: str, api_url: str, model: str):
+class PortfolioGenerator:
+    """
+    Generate portfolio from resume content using Perplexity API.
+    generate_portfolio asks for a full HTML document; generate_content asks
+    only for structured JSON content, which the server renders itself.
+    """
+
+    HTML_MAX_TOKENS = 6000
+    CONTENT_MAX_TOKENS = 1500
+
+    def __init__(self, api_key: str, api_url: str, model: str, cache: Optional[GenerationCache] = None,
+                 http_client: Optional[HttpClient] = None, async_http_client: Optional[AsyncHttpClient] = None,
+                 prompt_builder: Optional[PromptBuilder] = None, timeout: float = 120,
+                 router: Optional[LlmRouter] = None, optimize_html: bool = False):
         self.api_key = api_key
         self.api_url = api_url
         self.model = model
-
-    def _get_system_prompt(self) -> str:
-        return """Create a professional portfolio website inspired by HTML5 UP's 'Directive' template.
-
-OUTPUT: Start with <!DOCTYPE html> immediately. NO text before/after HTML. NO markdown blocks.
-
-DIRECTIVE STYLE:
-1. FONT: <link href="https://fonts.googleapis.com/css2?family=Source+Sans+Pro:wght@300;400;600;700;900&display=swap" rel="stylesheet">
-   - font-family: 'Source Sans Pro', sans-serif
-   - CRITICAL COLOR CONTRAST: Body text MUST be #2c2c2c on light backgrounds (white, #f5f5f5), and white (#ffffff) on dark backgrounds (var(--primary))
-   - Body: font-size: clamp(16px, 2.5vw, 18px); font-weight: 400; line-height: 1.7; color: #2c2c2c
-   - Headings on light backgrounds: color: #1a1a1a (very dark gray, NOT theme colors)
-   - Headings on dark backgrounds: color: #ffffff (white)
-   - Headings: font-weight: 700; text-transform: uppercase; letter-spacing: 0.08em
-   - Large headings: font-size: clamp(32px, 5vw, 48px); font-weight: 900
-   - Medium headings: font-size: clamp(24px, 4vw, 32px); font-weight: 700
-   - Small headings: font-size: clamp(18px, 3vw, 24px); font-weight: 600
-
-2. TOP NAVIGATION BAR: position: fixed; top: 0; width: 100%; height: clamp(60px, 8vh, 70px); background: var(--primary); padding: 0 clamp(20px, 5vw, 60px); z-index: 1000
-   - Display: flex; align-items: center; justify-content: space-between
-   - Logo/Name on left: font-size: clamp(16px, 2.5vw, 20px); font-weight: 700; uppercase; letter-spacing: 0.08em; color: white
-   - Nav links on right: display: inline-flex; gap: clamp(15px, 3vw, 30px); font-size: clamp(12px, 1.8vw, 14px); font-weight: 500; uppercase; letter-spacing: 0.05em; color: rgba(255,255,255,0.8)
-   - Link hover: color: white; text-decoration: underline
-
-3. MAIN CONTENT: margin-top: clamp(60px, 8vh, 70px); padding-top: 0; width: 100%; max-width: 100%
-
-4. HERO: min-height: clamp(500px, 80vh, 100vh); padding: clamp(60px, 10vw, 100px) clamp(30px, 8vw, 80px); background: var(--primary); display: flex; align-items: center; justify-content: center
-   - Content wrapper: max-width: 900px; margin: 0 auto; text-align: center; width: 100%
-   - ALL TEXT IN HERO: color: #ffffff !important (pure white for maximum contrast)
-   - Greeting: font-size: clamp(16px, 2.5vw, 20px); font-weight: 400; uppercase; letter-spacing: 0.05em; margin-bottom: 15px; color: #ffffff; opacity: 0.95
-   - Name: font-size: clamp(32px, 6vw, 56px); font-weight: 900; uppercase; letter-spacing: 0.08em; line-height: 1.2; margin: 0 auto 20px; text-align: center; color: #ffffff
-   - Title: font-size: clamp(18px, 3vw, 24px); font-weight: 400; uppercase; letter-spacing: 0.05em; color: #ffffff; opacity: 0.9; text-align: center
-   - IMPORTANT: DO NOT include phone number or mobile number anywhere in portfolio
-
-5. SECTIONS: padding: clamp(60px, 10vw, 100px) clamp(30px, 8vw, 80px); width: 100%; max-width: 100%; box-sizing: border-box; alternating backgrounds (white, #f5f5f5); opacity: 0; transform: translateY(30px); transition: opacity 0.8s ease, transform 0.8s ease
-   - Container: max-width: 1400px; margin: 0 auto
-   - Section headings: font-size: clamp(28px, 5vw, 42px); font-weight: 700; uppercase; letter-spacing: 0.06em; margin-bottom: clamp(30px, 5vw, 50px); color: #1a1a1a !important (dark gray, NOT theme color); text-align: center
-   - Subheadings: font-size: clamp(18px, 3vw, 22px); font-weight: 600; margin-bottom: 15px; color: #2c2c2c !important
-   - Body text in sections: color: #2c2c2c !important (dark gray on light backgrounds)
-   - Add class "visible" when in viewport: opacity: 1; transform: translateY(0)
-
-6. LAYOUT: display: grid; grid-template-columns: repeat(auto-fit, minmax(min(100%, 300px), 1fr)); gap: clamp(30px, 5vw, 50px); width: 100%
-   - Content blocks: padding: clamp(20px, 4vw, 30px); border-left: 4px solid var(--accent); background: transparent
-   - NO border-radius, NO box-shadows - flat minimal design
-   - Text in blocks: font-size: clamp(15px, 2vw, 17px); line-height: 1.7; color: #2c2c2c !important
-   - Job titles/company names: color: #1a1a1a !important; font-weight: 600
-   - Dates: color: #5a5a5a !important; font-style: italic
-
-7. SKILLS SECTION - MODERN GRAPHIC DESIGN:
-   - Display as grid; grid-template-columns: repeat(auto-fit, minmax(160px, 1fr)); gap: 20px
-   - Each skill card: padding: 20px 24px; background: #ffffff; border: 2px solid #e0e0e0; border-left: 4px solid var(--accent); position: relative; transition: all 0.3s ease
-   - Skill name: font-size: clamp(14px, 2vw, 16px); font-weight: 600; color: #1a1a1a !important; text-transform: uppercase; letter-spacing: 0.03em
-   - Progress bar container: width: 100%; height: 6px; background: #e8e8e8; margin-top: 12px; border-radius: 3px; overflow: hidden
-   - Progress fill: height: 100%; background: linear-gradient(90deg, var(--accent), var(--primary)); animation: fillBar 1.5s ease-out forwards
-   - Card hover: transform: translateY(-5px); border-color: var(--accent); box-shadow: 0 8px 20px rgba(0,0,0,0.1)
-   - Animation: @keyframes fillBar { from { width: 0; } to { width: 100%; } }
-
-8. BUTTONS: border: 2px solid var(--primary); background: transparent; padding: clamp(12px, 2vw, 15px) clamp(25px, 4vw, 35px); font-size: clamp(12px, 1.8vw, 14px); font-weight: 600; text-transform: uppercase; letter-spacing: 0.05em; cursor: pointer; transition: all 0.3s
-   - Hover: background: var(--primary); color: white
-
-9. FOOTER: padding: clamp(40px, 6vw, 60px) clamp(30px, 8vw, 80px); background: #2e3141; color: rgba(255,255,255,0.6); text-align: center
-   - Text: font-size: clamp(11px, 1.5vw, 13px); text-transform: uppercase; letter-spacing: 0.08em
-
-10. SCROLL ANIMATIONS - CRITICAL:
-   - CSS: section { opacity: 1 !important; transform: translateY(0) !important; } (ALL sections visible by default)
-   - CSS: section.animate-on-scroll:not(.visible) { opacity: 0; transform: translateY(30px); }
-   - CSS: section.animate-on-scroll { transition: opacity 0.8s ease, transform 0.8s ease; }
-   - CSS: section.animate-on-scroll.visible { opacity: 1; transform: translateY(0); }
-   - Add class "animate-on-scroll" to sections that should animate (NOT to #intro)
-   - Add JavaScript at end of <body> BEFORE closing </body> tag:
-     <script>
-     document.addEventListener('DOMContentLoaded', function() {
-       const sections = document.querySelectorAll('.animate-on-scroll');
-       const observer = new IntersectionObserver((entries) => {
-         entries.forEach(entry => {
-           if (entry.isIntersecting) {
-             entry.target.classList.add('visible');
-           }
-         });
-       }, { threshold: 0.1 });
-       sections.forEach(section => observer.observe(section));
-     });
-     </script>
-
-11. RESPONSIVE:
-   - All sizing uses clamp() for fluid scaling
-   - Grid layouts use auto-fit with minmax for flexible columns
-   - @media (max-width: 768px): nav links font-size: 11px, reduce letter-spacing to 0.03em, skills grid 2 columns
-   - @media (max-width: 480px): single column layouts, padding: 40px 20px, skills grid 1 column
-
-CRITICAL CSS RULES TO INCLUDE:
-section { opacity: 1 !important; }
-.animate-on-scroll:not(.visible) { opacity: 0; transform: translateY(30px); }
-.animate-on-scroll { transition: opacity 0.8s ease, transform 0.8s ease; }
-.animate-on-scroll.visible { opacity: 1; transform: translateY(0); }
-
-CRITICAL JAVASCRIPT (must be exactly this):
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-  const sections = document.querySelectorAll('.animate-on-scroll');
-  const observer = new IntersectionObserver((entries) => {
-    entries.forEach(entry => {
-      if (entry.isIntersecting) {
-        entry.target.classList.add('visible');
-      }
-    });
-  }, { threshold: 0.1 });
-  sections.forEach(section => observer.observe(section));
-});
-</script>
-
-STRUCTURE: <!DOCTYPE html><html><head><meta name="viewport" content="width=device-width, initial-scale=1.0">..Source Sans Pro..<style>* {box-sizing: border-box;} :root {--primary: X; --secondary: Y; --accent: Z;} body {margin: 0; overflow-x: hidden; color: #2c2c2c; background: #ffffff;} nav * {color: #ffffff !important;} #intro, #intro * {color: #ffffff !important;} section {opacity: 1 !important; background: #ffffff; color: #2c2c2c;} section h1, section h2, section h3 {color: #1a1a1a !important;} section p, section li, section span {color: #2c2c2c !important;} .animate-on-scroll:not(.visible) {opacity:0; transform:translateY(30px);} .animate-on-scroll {transition: opacity 0.8s ease, transform 0.8s ease;} .animate-on-scroll.visible {opacity:1; transform:translateY(0);} @keyframes fillBar {from {width:0;} to {width:100%;}}</style></head><body><nav id="navbar">LOGO (white) + NAV LINKS (white)</nav><main><section id="intro">HERO (no animate class)</section><section id="summary" class="animate-on-scroll">SUMMARY</section><section id="experience" class="animate-on-scroll">EXPERIENCE</section><section id="skills" class="animate-on-scroll">SKILLS with progress bars</section><section id="education" class="animate-on-scroll">EDUCATION</section><footer>COPYRIGHT</footer></main><script>document.addEventListener('DOMContentLoaded', function() { const sections = document.querySelectorAll('.animate-on-scroll'); const observer = new IntersectionObserver((entries) => { entries.forEach(entry => { if (entry.isIntersecting) { entry.target.classList.add('visible'); } }); }, { threshold: 0.1 }); sections.forEach(section => observer.observe(section)); });</script></body></html>
-
-CRITICAL COLOR CONTRAST RULES:
-1. Hero section (#intro): ALL text MUST be #ffffff (white) on var(--primary) background
-2. Navigation bar: ALL text MUST be #ffffff (white) on var(--primary) background
-3. Content sections: ALL text MUST be #1a1a1a or #2c2c2c (dark) on white/#f5f5f5 backgrounds
-4. Footer: text rgba(255,255,255,0.6) on #2e3141 background
-5. NEVER use theme colors (primary/secondary/accent) for text on similar colored backgrounds
-6. Use !important to enforce color contrast where needed
-
-CRITICAL REMINDERS:
-- DO NOT include phone numbers or mobile numbers anywhere
-- Skills MUST have progress bars with gradient fill animation
-- Name MUST be perfectly centered in hero section
-- ALL sections MUST be visible by default (opacity: 1 !important on section element)
-- Use class "animate-on-scroll" on sections (except #intro) to enable fade-in animation
-- Hero section (#intro) MUST NOT have "animate-on-scroll" class
-- JavaScript targets ".animate-on-scroll" class, not all sections
-- ALWAYS ensure sufficient color contrast between text and background
-- JavaScript MUST be inside <script> tags at end of <body> before </body>
-
-Output pure HTML only."""
-
-    def _get_user_prompt(self, resume_content: str, color_theme: Dict[str, str]) -> str:
-        return f"""Generate portfolio HTML with this resume:
-
-{resume_content}
-
-Colors:
-- Primary: {color_theme['primary']}
-- Secondary: {color_theme['secondary']}
-- Accent: {color_theme['accent']}
-- Background: {color_theme['background']}
-- Text: {color_theme['text']}
-
-Use Directive style. Start with <!DOCTYPE html>. NO text before/after."""
-
-    def generate_portfolio(self, resume_content: str, color_theme: Dict[str, str]) -> Dict[str, any]:
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
+        self.cache = cache
+        self.http_client = http_client or default_client()
+        self.async_http_client = async_http_client or default_async_client()
+        # Without a configured router every call goes to api_url alone, unhedged
+        self.router = router or LlmRouter([LlmBackend('default', api_url, api_key, model)],
+                                          self.http_client, self.async_http_client, hedge=False)
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.content_prompt_builder = PromptBuilder(self.prompt_builder.token_budget, structured=True)
+        self.timeout = timeout
+        self.optimize_html = optimize_html
+
+    def _get_payload(self, prompt: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "messages": prompt['messages'],
+            "temperature": 0.3,
+            "top_p": 0.95,
+            "max_tokens": self.CONTENT_MAX_TOKENS if prompt['structured'] else self.HTML_MAX_TOKENS,
+            "stream": stream
+        }
+        if prompt['structured']:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "portfolio", "strict": True, "schema": STRICT_PORTFOLIO_SCHEMA}
             }
+        return payload
+
+    def _get_cache_key(self, prompt: Dict[str, Any], color_theme: Dict[str, str]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return GenerationCache.make_key(prompt['resume'], color_theme, self.model, prompt['messages'][0]['content'])
+
+    def _get_cached_result(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        cached_html = self.cache.get(cache_key)
+        if cached_html is None:
+            return None
+        return {
+            'success': True,
+            'html': cached_html,
+            'error': None,
+            'cached': True,
+            'prompt_tokens': 0
+        }
+
+    @staticmethod
+    def _prompt_tokens(result: Dict[str, Any], prompt: Dict[str, Any]) -> int:
+        """Input tokens reported by the API, else the builder's estimate"""
+        return (result.get('usage') or {}).get('prompt_tokens') or prompt['prompt_tokens']
+
+    def _build_result(self, result: Dict[str, Any], cache_key: Optional[str],
+                      progress: Optional[Callable[[str], None]], prompt: Dict[str, Any]) -> Dict[str, Any]:
+        """Clean, validate and cache the completion returned by the API"""
+        html_content = result['choices'][0]['message']['content']
+
+        if progress:
+            progress('validating')
+        metrics = default_metrics()
+        metrics.observe_tokens(result.get('usage'))
+        with metrics.stage('html_validate'):
+            html_content = self._clean_html_response(html_content)
+            valid = self._validate_html(html_content)
 
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": self._get_user_prompt(resume_content, color_theme)}
-                ],
-                "temperature": 0.3,
-                "top_p": 0.95,
-                "max_tokens": 6000,
-                "stream": False
+        if not valid:
+            return {
+                'success': False,
+                'error': 'Generated HTML failed validation',
+                'html': None
             }
 
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=120
-            )
+        bytes_saved = 0
+        if self.optimize_html:
+            with metrics.stage('html_optimize'):
+                optimized = HtmlOptimizer.optimize(html_content)
+            html_content, bytes_saved = optimized['html'], optimized['bytes_saved']
+
+        if cache_key is not None:
+            self.cache.set(cache_key, html_content)
+
+        return {
+            'success': True,
+            'html': html_content,
+            'error': None,
+            'cached': False,
+            'prompt_tokens': self._prompt_tokens(result, prompt),
+            'bytes_saved': bytes_saved
+        }
+
+    @staticmethod
+    def _error_result(error: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error,
+            'html': None
+        }
+
+    def generate_portfolio(self, resume_content: str, color_theme: Dict[str, str],
+                           progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        prompt = self.prompt_builder.build(resume_content, color_theme)
+        cache_key = self._get_cache_key(prompt, color_theme)
+        cached_result = self._get_cached_result(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+        try:
+            with default_metrics().stage('llm_request'):
+                _, response = self.router.post(self._get_payload(prompt, stream=False), self.timeout)
 
             response.raise_for_status()
-            result = response.json()
-            html_content = result['choices'][0]['message']['content']
-            html_content = self._clean_html_response(html_content)
+            return self._build_result(response.json(), cache_key, progress, prompt)
 
-            if not self._validate_html(html_content):
-                return {
-                    'success': False,
-                    'error': 'Generated HTML failed validation',
-                    'html': None
-                }
+        except requests.exceptions.Timeout:
+            return self._error_result('Portfolio generation timed out. Please try again.')
+        except requests.exceptions.RequestException as e:
+            return self._error_result(f'API request failed: {str(e)}')
+        except (KeyError, IndexError) as e:
+            return self._error_result(f'Invalid API response format: {str(e)}')
+        except Exception as e:
+            return self._error_result(f'Portfolio generation failed: {str(e)}')
 
-            return {
-                'success': True,
-                'html': html_content,
-                'error': None
-            }
+    async def agenerate_portfolio(self, resume_content: str, color_theme: Dict[str, str],
+                                  progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Async counterpart of generate_portfolio; waits on the network without holding a thread"""
+        prompt = self.prompt_builder.build(resume_content, color_theme)
+        cache_key = self._get_cache_key(prompt, color_theme)
+        cached_result = self._get_cached_result(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+        try:
+            with default_metrics().stage('llm_request'):
+                _, response = await self.router.apost(self._get_payload(prompt, stream=False), self.timeout)
+
+            response.raise_for_status()
+            return self._build_result(response.json(), cache_key, progress, prompt)
+
+        except (requests.exceptions.Timeout, httpx.TimeoutException):
+            return self._error_result('Portfolio generation timed out. Please try again.')
+        except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+            return self._error_result(f'API request failed: {str(e)}')
+        except (KeyError, IndexError) as e:
+            return self._error_result(f'Invalid API response format: {str(e)}')
+        except Exception as e:
+            return self._error_result(f'Portfolio generation failed: {str(e)}')
+
+    def _build_content_result(self, result: Dict[str, Any], cache_key: Optional[str],
+                              progress: Optional[Callable[[str], None]], prompt: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse and schema-validate structured content returned by the API, then cache it"""
+        if progress:
+            progress('validating')
+        metrics = default_metrics()
+        metrics.observe_tokens(result.get('usage'))
+        try:
+            with metrics.stage('content_validate'):
+                content = parse_portfolio_content(result['choices'][0]['message']['content'])
+        except PortfolioSchemaError as e:
+            return {'success': False, 'error': f'Generated content failed validation: {str(e)}', 'content': None}
+
+        if cache_key is not None:
+            self.cache.set(cache_key, json.dumps(content))
+
+        return {
+            'success': True,
+            'content': content,
+            'error': None,
+            'cached': False,
+            'prompt_tokens': self._prompt_tokens(result, prompt)
+        }
+
+    def _get_cached_content(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        cached = self._get_cached_result(cache_key)
+        if cached is None:
+            return None
+        try:
+            content = parse_portfolio_content(cached['html'])
+        except PortfolioSchemaError:
+            return None
+        return {'success': True, 'content': content, 'error': None, 'cached': True, 'prompt_tokens': 0}
+
+    def generate_content(self, resume_content: str,
+                         progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Ask for structured portfolio content only (name, title, summary, jobs,
+        skills, education, projects). Content does not depend on the theme,
+        so one cached answer serves every theme.
+        """
+        prompt = self.content_prompt_builder.build(resume_content, {})
+        cache_key = self._get_cache_key(prompt, {})
+        cached_result = self._get_cached_content(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+        try:
+            with default_metrics().stage('llm_request'):
+                _, response = self.router.post(self._get_payload(prompt, stream=False), self.timeout)
+
+            response.raise_for_status()
+            return self._build_content_result(response.json(), cache_key, progress, prompt)
 
         except requests.exceptions.Timeout:
-            return {
-                'success': False,
-                'error': 'Portfolio generation timed out. Please try again.',
-                'html': None
-            }
+            return self._error_result('Portfolio generation timed out. Please try again.')
         except requests.exceptions.RequestException as e:
-            return {
-                'success': False,
-                'error': f'API request failed: {str(e)}',
-                'html': None
-            }
+            return self._error_result(f'API request failed: {str(e)}')
         except (KeyError, IndexError) as e:
-            return {
-                'success': False,
-                'error': f'Invalid API response format: {str(e)}',
-                'html': None
-            }
+            return self._error_result(f'Invalid API response format: {str(e)}')
         except Exception as e:
-            return {
-                'success': False,
-                'error': f'Portfolio generation failed: {str(e)}',
-                'html': None
-            }
+            return self._error_result(f'Portfolio generation failed: {str(e)}')
+
+    async def agenerate_content(self, resume_content: str,
+                                progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Async counterpart of generate_content"""
+        prompt = self.content_prompt_builder.build(resume_content, {})
+        cache_key = self._get_cache_key(prompt, {})
+        cached_result = self._get_cached_content(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+        try:
+            with default_metrics().stage('llm_request'):
+                _, response = await self.router.apost(self._get_payload(prompt, stream=False), self.timeout)
+
+            response.raise_for_status()
+            return self._build_content_result(response.json(), cache_key, progress, prompt)
+
+        except (requests.exceptions.Timeout, httpx.TimeoutException):
+            return self._error_result('Portfolio generation timed out. Please try again.')
+        except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+            return self._error_result(f'API request failed: {str(e)}')
+        except (KeyError, IndexError) as e:
+            return self._error_result(f'Invalid API response format: {str(e)}')
+        except Exception as e:
+            return self._error_result(f'Portfolio generation failed: {str(e)}')
+
+    def stream_portfolio(self, resume_content: str, color_theme: Dict[str, str],
+                         file_path: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream the portfolio as it is generated.
+        Yields ('chunk', html) for each cleaned piece of the document while
+        writing it to file_path, then a final ('result', dict) in the same
+        shape as generate_portfolio (without the 'html' payload).
+        """
+        prompt = self.prompt_builder.build(resume_content, color_theme)
+        cache_key = self._get_cache_key(prompt, color_theme)
+        cached_result = self._get_cached_result(cache_key)
+        if cached_result is not None:
+            if not self.save_portfolio(cached_result['html'], file_path):
+                yield 'result', {'success': False, 'error': 'Failed to save portfolio'}
+                return
+            yield 'chunk', cached_result['html']
+            yield 'result', {'success': True, 'error': None, 'cached': True, 'prompt_tokens': 0}
+            return
+
+        partial_path = file_path + '.part'
+        cleaner = HtmlStreamCleaner()
+        usage = {}
+        result = None
+        metrics = default_metrics()
+        started = time.perf_counter()
+
+        try:
+            # Times the wait for response headers; llm_stream below covers the whole body
+            with metrics.stage('llm_request'):
+                _, response = self.router.post(self._get_payload(prompt, stream=True), self.timeout, stream=True)
+            response.raise_for_status()
+
+            with response, open(partial_path, 'w', encoding='utf-8') as f:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        break
+
+                    event = json.loads(data)
+                    usage = event.get('usage') or usage
+                    if not event.get('choices'):
+                        continue
+
+                    choice = event['choices'][0]
+                    delta = choice.get('delta', {}).get('content') or ''
+                    html_chunk = cleaner.feed(delta)
+                    if html_chunk:
+                        f.write(html_chunk)
+                        yield 'chunk', html_chunk
+
+                html_chunk = cleaner.close()
+                if html_chunk:
+                    f.write(html_chunk)
+                    yield 'chunk', html_chunk
+
+            # Not a span: the generator is suspended at every yield, so no context can stay current
+            metrics.observe_stage('llm_stream', time.perf_counter() - started)
+            metrics.observe_tokens(usage)
+            if cleaner.is_valid():
+                if self.optimize_html:
+                    with metrics.stage('html_optimize'):
+                        bytes_saved = self._optimize_file(partial_path)
+                else:
+                    bytes_saved = 0
+                os.replace(partial_path, file_path)
+                precompress(file_path)
+                if cache_key is not None:
+                    self.cache.set_from_file(cache_key, file_path)
+                result = {
+                    'success': True,
+                    'error': None,
+                    'cached': False,
+                    'prompt_tokens': self._prompt_tokens({'usage': usage}, prompt),
+                    'bytes_saved': bytes_saved
+                }
+            else:
+                result = {'success': False, 'error': 'Generated HTML failed validation'}
+
+        except requests.exceptions.Timeout:
+            result = {'success': False, 'error': 'Portfolio generation timed out. Please try again.'}
+        except requests.exceptions.RequestException as e:
+            result = {'success': False, 'error': f'API request failed: {str(e)}'}
+        except (KeyError, IndexError, ValueError) as e:
+            result = {'success': False, 'error': f'Invalid API response format: {str(e)}'}
+        except Exception as e:
+            result = {'success': False, 'error': f'Portfolio generation failed: {str(e)}'}
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        yield 'result', result
+
+    @staticmethod
+    def _optimize_file(file_path: str) -> int:
+        """Optimise a streamed document in place once it is complete; returns bytes saved"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            optimized = HtmlOptimizer.optimize(f.read())
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(optimized['html'])
+        return optimized['bytes_saved']
 
     def _clean_html_response(self, html_content: str) -> str:
         html_content = html_content.strip()
@@ -260,11 +403,101 @@ Use Directive style. Start with <!DOCTYPE html>. NO text before/after."""
         return True
 
     def save_portfolio(self, html_content: str, file_path: str) -> bool:
-        """Save HTML content to file."""
+        """Atomically save HTML content to file, with precompressed siblings for previews."""
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            content = html_content.encode('utf-8')
+            write_atomic(file_path, content)
+            precompress(file_path, content)
             return True
         except Exception as e:
             print(f"Error saving portfolio: {str(e)}")
             return False
+
+
+class HtmlStreamCleaner:
+    """
+    Incremental counterpart of PortfolioGenerator._clean_html_response and
+    _validate_html for streamed completions: drops anything before
+    <!DOCTYPE html> and after the last </html>, holding back only as many
+    characters as needed to recognise markers split across chunks.
+    """
+
+    DOCTYPE = '<!DOCTYPE html>'
+    END_TAG = '</html>'
+    REQUIRED = ['<!DOCTYPE html>', '<html', '<head>', '</head>', '<body>', '</body>', '</html>']
+    # Give up waiting for a doctype once this much preamble has arrived
+    MAX_PREAMBLE = 2048
+
+    def __init__(self):
+        self._pending = ''
+        self._started = False
+        self._ended = False
+        self._seen = set()
+        self._tail = ''
+        self.length = 0
+
+    def feed(self, text: str) -> str:
+        """Accept the next piece of raw model output and return cleaned HTML ready to emit"""
+        self._pending += text
+
+        if not self._started:
+            start_idx = self._pending.find(self.DOCTYPE)
+            if start_idx != -1:
+                self._pending = self._pending[start_idx:]
+            elif len(self._pending) > self.MAX_PREAMBLE:
+                self._pending = self._strip_fence(self._pending.lstrip())
+            else:
+                return ''
+            self._started = True
+
+        end_idx = self._pending.rfind(self.END_TAG)
+        if end_idx != -1:
+            end_idx += len(self.END_TAG)
+            ready, self._pending = self._pending[:end_idx], self._pending[end_idx:]
+            self._ended = True
+        elif self._ended:
+            # Trailing text after </html> is only kept if another </html> follows
+            return ''
+        else:
+            hold = self._holdback()
+            ready, self._pending = self._pending[:len(self._pending) - hold], self._pending[len(self._pending) - hold:]
+
+        return self._emit(ready)
+
+    def close(self) -> str:
+        """Flush whatever is still held back at the end of the stream"""
+        if self._ended:
+            return ''
+        remaining = self._pending if self._started else self._strip_fence(self._pending.strip())
+        self._pending = ''
+        remaining = remaining.rstrip()
+        if remaining.endswith('`'):
+            remaining = remaining[:-3].rstrip()
+        return self._emit(remaining)
+
+    def is_valid(self) -> bool:
+        """Same verdict as _validate_html, computed from markers seen while streaming"""
+        if len(self._seen) < len(self.REQUIRED):
+            return self.length > 500
+        return self.length >= 50
+
+    def _holdback(self) -> int:
+        # Enough to complete a split </html> or a closing ``` fence
+        return min(len(self._pending), len(self.END_TAG) + 3)
+
+    @staticmethod
+    def _strip_fence(text: str) -> str:
+        if text.startswith('`html'):
+            text = text[7:]
+        if text.startswith('`'):
+            text = text[3:]
+        return text.lstrip()
+
+    def _emit(self, html_chunk: str) -> str:
+        window = self._tail + html_chunk
+        for element in self.REQUIRED:
+            if element in window:
+                self._seen.add(element)
+        self._tail = window[-max(len(e) for e in self.REQUIRED):]
+        self.length += len(html_chunk)
+        return html_chunk
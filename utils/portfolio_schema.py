@@ -0,0 +1,145 @@
+import json
+from typing import Any, Dict, List
+
+# JSON Schema of structured portfolio content; the API gets its strict-mode
+# variant (STRICT_PORTFOLIO_SCHEMA) as response_format, and
+# validate_portfolio_content enforces it locally so the server never renders unchecked data.
+PORTFOLIO_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {'type': 'string', 'minLength': 1},
+        'title': {'type': 'string'},
+        'summary': {'type': 'string'},
+        'experience': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'role': {'type': 'string', 'minLength': 1},
+                    'company': {'type': 'string'},
+                    'dates': {'type': 'string'},
+                    'highlights': {'type': 'array', 'items': {'type': 'string'}}
+                },
+                'required': ['role']
+            }
+        },
+        'skills': {'type': 'array', 'items': {'type': 'string'}},
+        'education': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'degree': {'type': 'string', 'minLength': 1},
+                    'institution': {'type': 'string'},
+                    'dates': {'type': 'string'}
+                },
+                'required': ['degree']
+            }
+        },
+        'projects': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string', 'minLength': 1},
+                    'description': {'type': 'string'}
+                },
+                'required': ['name']
+            }
+        }
+    },
+    'required': ['name', 'title', 'summary', 'experience', 'skills', 'education']
+}
+
+
+def strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a schema that structured outputs accept with strict: true -
+    every object lists all its properties as required and allows no others,
+    and unsupported keywords (minLength) are dropped. Optional fields come
+    back as empty strings or arrays, which local validation treats as absent.
+    """
+    result = {key: value for key, value in schema.items() if key != 'minLength'}
+    if schema['type'] == 'object':
+        result['properties'] = {key: strict_schema(field) for key, field in schema['properties'].items()}
+        result['required'] = list(schema['properties'])
+        result['additionalProperties'] = False
+    elif schema['type'] == 'array':
+        result['items'] = strict_schema(schema['items'])
+    return result
+
+
+STRICT_PORTFOLIO_SCHEMA = strict_schema(PORTFOLIO_SCHEMA)
+
+MAX_LIST_ITEMS = 50
+MAX_STRING_LENGTH = 2000
+
+
+class PortfolioSchemaError(ValueError):
+    """Raised when the model's structured output does not match PORTFOLIO_SCHEMA."""
+
+
+def _check_string(value, field: Dict[str, Any], path: str) -> str:
+    if value is None:
+        value = ''
+    if not isinstance(value, str):
+        raise PortfolioSchemaError(f'{path}: expected a string')
+    value = value.strip()
+    if len(value) < field.get('minLength', 0):
+        raise PortfolioSchemaError(f'{path}: must not be empty')
+    return value[:MAX_STRING_LENGTH]
+
+
+def _check_list(value, path: str) -> List:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise PortfolioSchemaError(f'{path}: expected an array')
+    return value[:MAX_LIST_ITEMS]
+
+
+def _check_object(value, schema: Dict[str, Any], path: str) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise PortfolioSchemaError(f'{path or "content"}: expected an object')
+
+    result = {}
+    for key, field in schema['properties'].items():
+        field_path = f'{path}.{key}' if path else key
+        if key in schema.get('required', []) and key not in value:
+            raise PortfolioSchemaError(f'{field_path}: missing')
+
+        if field['type'] == 'string':
+            result[key] = _check_string(value.get(key), field, field_path)
+        elif field['items']['type'] == 'string':
+            items = _check_list(value.get(key), field_path)
+            result[key] = [item for item in (
+                _check_string(item, field['items'], f'{field_path}[{index}]') for index, item in enumerate(items)
+            ) if item]
+        else:
+            items = _check_list(value.get(key), field_path)
+            result[key] = [
+                _check_object(item, field['items'], f'{field_path}[{index}]') for index, item in enumerate(items)
+            ]
+    return result
+
+
+def validate_portfolio_content(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check structured portfolio content against PORTFOLIO_SCHEMA.
+    Returns a normalised copy (strings stripped and length-capped, optional
+    fields filled in, unknown keys dropped) or raises PortfolioSchemaError.
+    """
+    return _check_object(data, PORTFOLIO_SCHEMA, '')
+
+
+def parse_portfolio_content(text: str) -> Dict[str, Any]:
+    """Parse and validate the model's reply, tolerating a ```json fence around it"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        text = text.rsplit('```', 1)[0]
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise PortfolioSchemaError(f'Response is not valid JSON: {str(e)}') from None
+    return validate_portfolio_content(data)
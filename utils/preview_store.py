@@ -0,0 +1,157 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip siblings are written
+    brotli = None
+
+# Content codings we precompress, in order of preference when the client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def precompress(path: str, content: Optional[bytes] = None):
+    """
+    Write .gz (and .br when brotli is installed) siblings next to a saved
+    file so previews can be served compressed without compressing per request.
+    """
+    if content is None:
+        with open(path, 'rb') as f:
+            content = f.read()
+
+    compressed = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed['.br'] = brotli.compress(content, mode=brotli.MODE_TEXT)
+
+    for suffix, data in compressed.items():
+        tmp_path = f'{path}{suffix}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path + suffix)
+
+
+def accepts(accept_encoding: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows coding (q=0, or a malformed q, means refused)"""
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.strip().partition(';')
+        if name.strip() not in (coding, '*'):
+            continue
+        params = params.replace(' ', '')
+        if not params.startswith('q='):
+            return True
+        try:
+            return float(params[2:] or 0) > 0
+        except ValueError:
+            return False
+    return False
+
+
+class Preview:
+    """One representation of a saved file: in-memory body or a file to send."""
+
+    def __init__(self, etag: str, encoding: Optional[str], body: Optional[bytes] = None,
+                 file_path: Optional[str] = None):
+        self.etag = etag
+        self.encoding = encoding
+        self.body = body
+        self.file_path = file_path
+
+
+class PreviewStore:
+    """
+    Look up the best representation of a generated portfolio for a request.
+    ETags come from the file's mtime and size (files are written atomically
+    and never edited in place), so validating a request needs only a stat.
+    Files are sent from disk (letting the server use sendfile) until they
+    have been requested promote_after times; from then on all their
+    representations are served from an LRU bounded by entry count and bytes.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024, promote_after: int = 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.promote_after = promote_after
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._requests: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _siblings(path: str, stat: os.stat_result) -> Dict[Optional[str], str]:
+        """Representations on disk; a sibling older than the file is stale and ignored"""
+        paths = {None: path}
+        for encoding, suffix in ENCODINGS:
+            try:
+                if os.stat(path + suffix).st_mtime_ns >= stat.st_mtime_ns:
+                    paths[encoding] = path + suffix
+            except FileNotFoundError:
+                pass
+        return paths
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry['size']
+
+    def _load(self, path: str, version: str, paths: Dict[Optional[str], str]):
+        bodies = {}
+        for encoding, file_path in paths.items():
+            with open(file_path, 'rb') as f:
+                bodies[encoding] = f.read()
+        entry = {'version': version, 'bodies': bodies, 'size': sum(len(body) for body in bodies.values())}
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old['size']
+            self._entries[path] = entry
+            self._bytes += entry['size']
+            self._evict()
+        return entry
+
+    def get(self, path: str, accept_encoding: str = '') -> Optional[Preview]:
+        """Best representation of path for the client's Accept-Encoding, or None if it does not exist"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                entry = self._entries.pop(path, None)
+                if entry is not None:
+                    self._bytes -= entry['size']
+                self._requests.pop(path, None)
+            return None
+
+        version = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+        promote = False
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['version'] == version:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                available = entry['bodies']
+            else:
+                entry = None
+                self.misses += 1
+                if len(self._requests) >= self.max_entries * 64:
+                    self._requests.clear()
+                self._requests[path] = self._requests.get(path, 0) + 1
+                promote = self._requests[path] >= self.promote_after
+
+        if entry is None:
+            available = self._siblings(path, stat)
+            if promote:
+                with self._lock:
+                    self._requests.pop(path, None)
+                available = self._load(path, version, available)['bodies']
+
+        encoding = next((name for name, _ in ENCODINGS if name in available and accepts(accept_encoding, name)), None)
+        etag = version if encoding is None else f'{version}-{encoding}'
+        chosen = available[encoding]
+        if isinstance(chosen, bytes):
+            return Preview(etag, encoding, body=chosen)
+        return Preview(etag, encoding, file_path=chosen)
@@ -0,0 +1,194 @@
+import math
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request is refused before any work starts.
+    status is 429 when the caller exceeded their own rate and 503 when the
+    server is at capacity; retry_after is the suggested wait in seconds.
+    """
+
+    def __init__(self, message: str, retry_after: float, status: int = 429):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class MemoryRateLimitBackend:
+    """Token buckets and concurrency slots held in this process."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._slots: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token from the bucket; returns 0 on success, else seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            return wait
+
+    def _live_slots(self, key: str) -> Dict[str, float]:
+        """Slot id -> expiry of key's unexpired slots (caller holds the lock)"""
+        now = time.monotonic()
+        slots = {slot_id: expires for slot_id, expires in self._slots.get(key, {}).items() if expires > now}
+        self._slots[key] = slots
+        return slots
+
+    def acquire(self, key: str, limit: int, ttl: float) -> Optional[str]:
+        """Claim one of limit slots for ttl seconds; returns its id, or None when all are taken"""
+        with self._lock:
+            slots = self._live_slots(key)
+            if len(slots) >= limit:
+                return None
+            slot_id = uuid.uuid4().hex
+            slots[slot_id] = time.monotonic() + ttl
+            return slot_id
+
+    def release(self, key: str, slot_id: str):
+        with self._lock:
+            self._slots.get(key, {}).pop(slot_id, None)
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._live_slots(key))
+
+
+class RedisRateLimitBackend:
+    """
+    Token buckets and concurrency slots shared through Redis (or any server
+    speaking its protocol and Lua scripting), so every app process sees the same
+    limits. Each operation is one atomic script call. Slots are kept in a
+    sorted set of slot id -> expiry, and each one lapses ttl seconds after it
+    was acquired, so a slot leaked by a crashed worker comes back on its own.
+    """
+
+    TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+    ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[4])
+-- The newest slot expires last, so the set can go when it does
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2])))
+return 1
+"""
+
+    def __init__(self, client, prefix: str = 'ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = 'ratelimit:') -> 'RedisRateLimitBackend':
+        try:
+            import redis
+        except ImportError:
+            raise ImportError('The redis package is required for a Redis rate limit backend') from None
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        return float(self.client.eval(self.TAKE_SCRIPT, 1, self.prefix + key, rate, burst, time.time()))
+
+    def acquire(self, key: str, limit: int, ttl: float) -> Optional[str]:
+        slot_id = uuid.uuid4().hex
+        acquired = int(self.client.eval(self.ACQUIRE_SCRIPT, 1, self.prefix + key, limit, ttl, time.time(), slot_id))
+        return slot_id if acquired else None
+
+    def release(self, key: str, slot_id: str):
+        self.client.zrem(self.prefix + key, slot_id)
+
+    def count(self, key: str) -> int:
+        return int(self.client.zcount(self.prefix + key, f'({time.time()}', '+inf'))
+
+
+class Slot:
+    """A held unit of global concurrency; release() is safe to call more than once."""
+
+    def __init__(self, backend, key: str, slot_id: str):
+        self._backend = backend
+        self._key = key
+        self._slot_id = slot_id
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._backend.release(self._key, self._slot_id)
+
+
+class RateLimiter:
+    """
+    Admission control for expensive routes.
+    limits maps an action name to (requests per minute, burst) and is
+    enforced per user with a token bucket; acquire() additionally caps the
+    number of generations in flight across all users.
+    """
+
+    SLOT_KEY = 'in-flight'
+
+    def __init__(self, backend=None, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 max_in_flight: int = 8, busy_retry_after: float = 5.0, slot_ttl: int = 600):
+        self.backend = backend or MemoryRateLimitBackend()
+        self.limits = limits or {}
+        self.max_in_flight = max_in_flight
+        self.busy_retry_after = busy_retry_after
+        self.slot_ttl = slot_ttl
+
+    def check(self, user_id, action: str):
+        """Spend one of the user's tokens for action or raise RateLimitExceeded (429)"""
+        if action not in self.limits:
+            return
+        per_minute, burst = self.limits[action]
+        wait = self.backend.take(f'{action}:{user_id}', per_minute / 60.0, burst)
+        if wait > 0:
+            raise RateLimitExceeded('Too many requests. Please slow down and try again shortly.', wait)
+
+    def acquire(self) -> Slot:
+        """Claim a generation slot or raise RateLimitExceeded (503) when all are busy"""
+        slot_id = self.backend.acquire(self.SLOT_KEY, self.max_in_flight, self.slot_ttl)
+        if slot_id is None:
+            raise RateLimitExceeded('The server is busy generating portfolios. Please try again shortly.',
+                                    self.busy_retry_after, status=503)
+        return Slot(self.backend, self.SLOT_KEY, slot_id)
+
+    def in_flight(self) -> int:
+        return self.backend.count(self.SLOT_KEY)
@@ -1,52 +1,107 @@
+import contextlib
+import io
 import re
-from typing import Dict
+import time
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
 
 import PyPDF2
 import docx
 
+from utils.pii_scrubber import PiiScrubber
+
+# A path, the document's bytes, or a binary file-like object such as an upload stream
+ResumeSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+# Line of its own between PDF pages, so running headers and footers can be told apart from content
+PAGE_BREAK = "\f"
+
+
 class ResumeParser:
     """
     Parse resume from PDF or DOCX files.
     Extracts content while filtering out personal data like phone numbers and addresses.
+    Documents can be parsed from a path or straight from memory: bytes,
+    memoryviews and file-like objects are read in place, with the format
+    taken from their file name when they have one and sniffed otherwise.
     """
 
-    # Regex patterns for personal data to filter
-    PHONE_PATTERN = re.compile(
-        r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-    )
-    # Address pattern - lines with street numbers, apartment numbers, zip codes
-    ADDRESS_PATTERN = re.compile(
-        r'\b\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|'
-        r'Lane|Ln|Boulevard|Blvd|Way|Court|Ct|Circle|Cir|Place|Pl)\b',
-        re.IGNORECASE
-    )
-    ZIP_PATTERN = re.compile(r'\b\d{5}(-\d{4})?\b')
+    # Single-pass scrubber for personal data (phone numbers, addresses, ZIP codes)
+    PII_SCRUBBER = PiiScrubber()
+
+    # Extraction budget: anything past this is noise to the LLM
+    MAX_PAGES = 10
+    MAX_CHARS = 50000
+
+    # Leading bytes of each format, for sources without a file name
+    SIGNATURES = {b'%PDF': 'pdf', b'PK\x03\x04': 'docx', b'\xd0\xcf\x11\xe0': 'doc'}
 
     @staticmethod
-    def parse_pdf(file_path: str) -> str:
-        """Extract text content from PDF file"""
+    @contextlib.contextmanager
+    def open_source(source: ResumeSource) -> Iterator[BinaryIO]:
+        """Binary stream over a source, rewound to the start; caller-owned streams are left open"""
+        if isinstance(source, str):
+            with open(source, 'rb') as file:
+                yield file
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            yield io.BytesIO(source)
+        else:
+            source.seek(0)
+            yield source
+
+    @classmethod
+    def detect_format(cls, source: ResumeSource) -> str:
+        """File extension of a path or named stream, else the format its first bytes identify"""
+        name = source if isinstance(source, str) else (getattr(source, 'filename', None)
+                                                       or getattr(source, 'name', None))
+        if isinstance(name, str) and '.' in name:
+            return name.rsplit('.', 1)[1].lower()
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            head = bytes(source[:4])
+        else:
+            with cls.open_source(source) as file:
+                head = file.read(4)
+                file.seek(0)
+        if head not in cls.SIGNATURES:
+            raise ValueError("Unsupported file format: unrecognised document")
+        return cls.SIGNATURES[head]
+
+    @staticmethod
+    def iter_pdf_pages(source: ResumeSource, max_pages: Optional[int] = None) -> Iterator[str]:
+        """Lazily yield the text of each PDF page, stopping after max_pages; later pages open with a PAGE_BREAK line"""
         try:
-            text = ""
-            with open(file_path, 'rb') as file:
+            with ResumeParser.open_source(source) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text
+                for index, page in enumerate(pdf_reader.pages):
+                    if max_pages is not None and index >= max_pages:
+                        break
+                    yield (PAGE_BREAK + "\n" if index else "") + page.extract_text() + "\n"
         except Exception as e:
             raise Exception(f"Error parsing PDF: {str(e)}")
 
     @staticmethod
-    def parse_docx(file_path: str) -> str:
-        """Extract text content from DOCX file"""
+    def iter_docx_paragraphs(source: ResumeSource) -> Iterator[str]:
+        """Lazily yield DOCX paragraph text, newline-separated"""
         try:
-            doc = docx.Document(file_path)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return text
+            with ResumeParser.open_source(source) as file:
+                doc = docx.Document(file)
+            for index, paragraph in enumerate(doc.paragraphs):
+                yield paragraph.text if index == 0 else "\n" + paragraph.text
         except Exception as e:
             raise Exception(f"Error parsing DOCX: {str(e)}")
 
     @staticmethod
-    def parse_doc(file_path: str) -> str:
+    def parse_pdf(source: ResumeSource) -> str:
+        """Extract text content from PDF file"""
+        return "".join(ResumeParser.iter_pdf_pages(source))
+
+    @staticmethod
+    def parse_docx(source: ResumeSource) -> str:
+        """Extract text content from DOCX file"""
+        return "".join(ResumeParser.iter_docx_paragraphs(source))
+
+    @staticmethod
+    def parse_doc(source: ResumeSource) -> str:
         """
         Extract text content from DOC file
         Note: DOC format is legacy, conversion may require additional libraries
@@ -58,67 +113,139 @@ class ResumeParser:
         )
 
     @staticmethod
-    def filter_personal_data(text: str) -> str:
+    def filter_personal_data(text: str, scrubber: Optional[PiiScrubber] = None) -> str:
         """
         Remove personal information like phone numbers and addresses from text
         """
-        # Remove phone numbers
-        text = ResumeParser.PHONE_PATTERN.sub('[PHONE NUMBER REMOVED]', text)
-
-        # Remove addresses
-        text = ResumeParser.ADDRESS_PATTERN.sub('[ADDRESS REMOVED]', text)
+        return (scrubber or ResumeParser.PII_SCRUBBER).scrub(text)
 
-        # Remove ZIP codes
-        text = ResumeParser.ZIP_PATTERN.sub('[ZIP REMOVED]', text)
+    # Header vocabulary per section; more specific phrasings first
+    SECTION_HEADERS = {
+        'summary': [r'professional\s+summary', 'summary', 'profile', 'objective'],
+        'experience': [r'work\s+experience', r'professional\s+experience', 'experience', 'employment'],
+        'education': ['education', r'academic\s+background'],
+        'skills': [r'technical\s+skills', r'core\s+competencies', 'skills'],
+        'projects': ['projects', 'portfolio'],
+        'certifications': ['certifications', 'certificates', 'licenses'],
+        'achievements': ['achievements', 'awards', 'accomplishments']
+    }
 
-        return text
+    # One scanner for every header: a header is a line of its own, optionally ending in a colon
+    SECTION_SCANNER = re.compile(
+        r'^[ \t]*(?:' + '|'.join(
+            f"(?P<{name}>{'|'.join(headers)})" for name, headers in SECTION_HEADERS.items()
+        ) + r')[ \t]*:?[ \t]*$',
+        re.IGNORECASE | re.MULTILINE
+    )
 
     @staticmethod
-    def extract_sections(text: str) -> Dict[str, str]:
+    def extract_sections(text: str) -> Dict[str, Dict[str, Any]]:
         """
-        Extract common resume sections for structured data
+        Split resume text into sections in a single scan.
+        Returns {name: {'start', 'end', 'text'}} where start/end are offsets of
+        the whole section (header included) and text is its stripped body.
+        Text before the first header (name, headline) is returned as 'intro';
+        if a header repeats, the first occurrence wins.
         """
         sections = {}
+        headers = [(match.lastgroup, match.start(), match.end())
+                   for match in ResumeParser.SECTION_SCANNER.finditer(text)]
 
-        # Common section headers
-        section_patterns = {
-            'summary': r'(?i)(professional\s+summary|summary|profile|objective)',
-            'experience': r'(?i)(work\s+experience|professional\s+experience|experience|employment)',
-            'education': r'(?i)(education|academic\s+background)',
-            'skills': r'(?i)(skills|technical\s+skills|core\s+competencies)',
-            'projects': r'(?i)(projects|portfolio)',
-            'certifications': r'(?i)(certifications|certificates|licenses)',
-            'achievements': r'(?i)(achievements|awards|accomplishments)'
-        }
+        if headers and text[:headers[0][1]].strip():
+            sections['intro'] = {'start': 0, 'end': headers[0][1], 'text': text[:headers[0][1]].strip()}
 
-        # Simple section extraction
-        for section_name, pattern in section_patterns.items():
-            match = re.search(pattern, text)
-            if match:
-                sections[section_name] = True
+        for index, (name, start, body_start) in enumerate(headers):
+            end = headers[index + 1][1] if index + 1 < len(headers) else len(text)
+            if name not in sections:
+                sections[name] = {'start': start, 'end': end, 'text': text[body_start:end].strip()}
 
         return sections
 
+    @staticmethod
+    def select_sections(text: str, sections: Dict[str, Dict[str, Any]], include: Optional[List[str]] = None,
+                        max_section_chars: Optional[int] = None) -> str:
+        """
+        Build the resume text sent to the LLM from the chosen sections, in
+        document order, cutting each one to max_section_chars at a line
+        boundary. Falls back to the full text when no headers were found or
+        none of them were chosen.
+        """
+        if not sections:
+            return text
+
+        parts = []
+        for name, section in sorted(sections.items(), key=lambda item: item[1]['start']):
+            if include is not None and name not in include:
+                continue
+
+            body = section['text']
+            if max_section_chars is not None and len(body) > max_section_chars:
+                cut = body[:max_section_chars]
+                body = (cut.rsplit('\n', 1)[0] if '\n' in cut else cut).rstrip() + '\n[...]'
+
+            parts.append(body if name == 'intro' else f"{name.upper()}\n{body}")
+
+        return "\n\n".join(parts) or text
+
+    @classmethod
+    def iter_text(cls, source: ResumeSource, max_pages: Optional[int] = None) -> Iterator[str]:
+        """Yield raw text chunks (pages or paragraphs) for any supported format"""
+        if not isinstance(source, (str, bytes, bytearray, memoryview)) and not source.seekable():
+            # Both readers jump around the document, so a one-way stream is buffered first
+            source = io.BytesIO(source.read())
+        file_extension = cls.detect_format(source)
+
+        if file_extension == 'pdf':
+            return cls.iter_pdf_pages(source, max_pages)
+        if file_extension == 'docx':
+            return cls.iter_docx_paragraphs(source)
+        if file_extension == 'doc':
+            return iter([cls.parse_doc(source)])
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
     @classmethod
-    def parse(cls, file_path: str) -> Dict[str, any]:
+    def parse(cls, source: ResumeSource, max_pages: Optional[int] = MAX_PAGES,
+              max_chars: Optional[int] = MAX_CHARS, scrubber: Optional[PiiScrubber] = None,
+              prompt_sections: Optional[List[str]] = None,
+              max_section_chars: Optional[int] = None) -> Dict[str, Any]:
         """
         Main parsing method that handles different file formats
         Returns a dictionary with parsed content and metadata
+        Text is extracted chunk by chunk, stopping once the page or
+        character budget is spent (at a line break, so no phone number or
+        address is cut in two), then filtered as a whole, since a match can
+        straddle a page or paragraph break; prompt_text holds only the
+        sections worth sending to the LLM (see select_sections).
+        timings holds the seconds spent extracting text and filtering personal
+        data, so callers in another process can report them
         """
-        file_extension = file_path.rsplit('.', 1)[1].lower()
+        raw_chunks = []
+        total_chars = 0
+        truncated = False
+        started = time.perf_counter()
 
-        # Parse based on file type
-        if file_extension == 'pdf':
-            raw_text = cls.parse_pdf(file_path)
-        elif file_extension == 'docx':
-            raw_text = cls.parse_docx(file_path)
-        elif file_extension == 'doc':
-            raw_text = cls.parse_doc(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+        for chunk in cls.iter_text(source, max_pages):
+            if max_chars is not None and total_chars + len(chunk) > max_chars:
+                # Chunks start on a new line, so a cut without a line break drops the whole chunk
+                cut = chunk[:max_chars - total_chars]
+                if '\n' in cut:
+                    chunk = cut[:cut.rindex('\n')]
+                else:
+                    chunk = '' if raw_chunks else cut
+                truncated = True
+
+            raw_chunks.append(chunk)
+            total_chars += len(chunk)
+
+            if truncated:
+                break
+
+        raw_text = "".join(raw_chunks)
 
         # Filter personal data
-        filtered_text = cls.filter_personal_data(raw_text)
+        filter_started = time.perf_counter()
+        filtered_text = cls.filter_personal_data(raw_text, scrubber)
+        filter_seconds = time.perf_counter() - filter_started
 
         # Extract sections
         sections = cls.extract_sections(filtered_text)
@@ -127,5 +254,8 @@ class ResumeParser:
             'raw_text': raw_text,
             'filtered_text': filtered_text,
             'sections': sections,
-            'has_content': bool(filtered_text.strip())
+            'prompt_text': cls.select_sections(filtered_text, sections, prompt_sections, max_section_chars),
+            'has_content': bool(filtered_text.strip()),
+            'truncated': truncated,
+            'timings': {'extract': time.perf_counter() - started - filter_seconds, 'pii_filter': filter_seconds}
         }
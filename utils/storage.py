@@ -0,0 +1,384 @@
+import datetime
+import hashlib
+import hmac
+import os
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import requests
+
+from utils.http_client import HttpClient, default_client
+
+
+class StorageError(Exception):
+    """Raised when a storage backend cannot complete an operation."""
+
+
+def write_atomic(path: str, data: bytes):
+    """Write data to path through a temporary file, so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def check_name(name: str) -> str:
+    """Names are flat file names; anything that could escape the storage root is refused"""
+    if not name or name in ('.', '..') or '/' in name or '\\' in name or '\0' in name:
+        raise ValueError(f'Invalid storage name: {name!r}')
+    return name
+
+
+class Storage:
+    """
+    Interface shared by the storage backends.
+    Writers either call save(name, data) or write the file at path(name)
+    themselves (e.g. while streaming) and then commit(name) to publish it.
+    Readers get a local file from local_path(name), or None if it is gone.
+    """
+
+    def path(self, name: str) -> str:
+        """Local path to write name to"""
+        raise NotImplementedError
+
+    def local_path(self, name: str) -> Optional[str]:
+        """Local path holding name, or None if it does not exist"""
+        raise NotImplementedError
+
+    def commit(self, name: str):
+        """Publish a file written at path(name)"""
+        raise NotImplementedError
+
+    def delete(self, name: str):
+        raise NotImplementedError
+
+    def collect(self, now: Optional[float] = None) -> int:
+        """Remove expired files and enforce the quota; returns the number removed"""
+        raise NotImplementedError
+
+    def save(self, name: str, data: bytes) -> str:
+        """Atomically store data under name and return its local path"""
+        path = self.path(name)
+        write_atomic(path, data)
+        self.commit(name)
+        return path
+
+
+class LocalStorage(Storage):
+    """
+    Files in one directory with TTL expiry and a byte quota.
+    Every commit may trigger garbage collection (at most once per
+    gc_interval, or straight away once usage passes the quota): files older
+    than ttl are deleted - including .tmp/.part leftovers of crashed
+    requests - then the oldest files until usage is under quota_bytes.
+    Usage is counted exactly by each collection and approximately (committed
+    files only) in between.
+    """
+
+    def __init__(self, root: str, ttl: Optional[float] = None, quota_bytes: Optional[int] = None,
+                 gc_interval: float = 300):
+        self.root = root
+        self.ttl = ttl
+        self.quota_bytes = quota_bytes
+        self.gc_interval = gc_interval
+        self.collected = 0
+        self._usage = None
+        self._last_collect = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _relpath(self, name: str) -> str:
+        return check_name(name)
+
+    def path(self, name: str) -> str:
+        path = os.path.join(self.root, self._relpath(name))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def local_path(self, name: str) -> Optional[str]:
+        try:
+            path = os.path.join(self.root, self._relpath(name))
+        except ValueError:
+            return None
+        return path if os.path.isfile(path) else None
+
+    def commit(self, name: str):
+        size = os.path.getsize(self.path(name))
+        with self._lock:
+            if self._usage is not None:
+                self._usage += size
+            due = (self._usage is None or time.time() - self._last_collect >= self.gc_interval
+                   or (self.quota_bytes is not None and self._usage > self.quota_bytes))
+        if due:
+            self.collect(keep=name)
+
+    def delete(self, name: str):
+        path = self.local_path(name)
+        if path is None:
+            return
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._usage is not None:
+                self._usage = max(0, self._usage - size)
+
+    def _files(self) -> Iterator[Tuple[str, os.stat_result]]:
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    yield path, os.stat(path)
+                except OSError:
+                    continue
+
+    def collect(self, now: Optional[float] = None, keep: Optional[str] = None) -> int:
+        now = time.time() if now is None else now
+        keep_path = os.path.join(self.root, self._relpath(keep)) if keep else None
+        removed = 0
+        usage = 0
+        files = []
+
+        for path, stat in self._files():
+            if self.ttl is not None and now - stat.st_mtime > self.ttl and path != keep_path:
+                removed += self._remove(path)
+            else:
+                usage += stat.st_size
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        if self.quota_bytes is not None and usage > self.quota_bytes:
+            for _, size, path in sorted(files):
+                if usage <= self.quota_bytes:
+                    break
+                if path != keep_path and self._remove(path):
+                    removed += 1
+                    usage -= size
+
+        with self._lock:
+            self._usage = usage
+            self._last_collect = now
+            self.collected += removed
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'usage_bytes': self._usage, 'quota_bytes': self.quota_bytes, 'collected': self.collected}
+
+
+class ShardedStorage(LocalStorage):
+    """
+    LocalStorage spread over hashed subdirectories (root/ab/cd/name for
+    depth 2), so no single directory grows large enough to slow lookups.
+    """
+
+    def __init__(self, root: str, depth: int = 2, **kwargs):
+        super().__init__(root, **kwargs)
+        self.depth = depth
+
+    def _relpath(self, name: str) -> str:
+        digest = hashlib.sha1(check_name(name).encode('utf-8')).hexdigest()
+        return os.path.join(*[digest[2 * level:2 * level + 2] for level in range(self.depth)], name)
+
+
+def sigv4_headers(method: str, url: str, payload_hash: str, access_key: str, secret_key: str,
+                  region: str, now: datetime.datetime, headers: Optional[Dict[str, str]] = None,
+                  service: str = 's3') -> Dict[str, str]:
+    """
+    Headers signing a request with AWS Signature Version 4. url must already
+    be percent-encoded, with its query parameters in sorted order.
+    """
+    parts = urlsplit(url)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    signed = {name.lower(): value.strip() for name, value in (headers or {}).items()}
+    signed.update({'host': parts.netloc, 'x-amz-content-sha256': payload_hash, 'x-amz-date': amz_date})
+    names = sorted(signed)
+
+    canonical_request = '\n'.join([
+        method,
+        parts.path or '/',
+        parts.query,
+        ''.join(f'{name}:{signed[name]}\n' for name in names),
+        ';'.join(names),
+        payload_hash
+    ])
+    scope = f'{amz_date[:8]}/{region}/{service}/aws4_request'
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+    ])
+
+    key = ('AWS4' + secret_key).encode('utf-8')
+    for part in (amz_date[:8], region, service, 'aws4_request'):
+        key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    signed['authorization'] = (f'AWS4-HMAC-SHA256 Credential={access_key}/{scope}, '
+                               f'SignedHeaders={";".join(names)}, Signature={signature}')
+    del signed['host']
+    return signed
+
+
+class S3Storage(Storage):
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO, ...) so every replica
+    sees every portfolio. Requests are path-style and SigV4-signed on the
+    shared HttpClient. Files are written to and read from a local cache (a
+    LocalStorage with its own TTL and quota): a replica fetches an object
+    once and then serves it from disk, calling on_fetch(path) after each
+    download (e.g. to precompress it). Object names are unique and never
+    rewritten, so cached copies do not go stale.
+    """
+
+    def __init__(self, endpoint_url: str, bucket: str, access_key: str, secret_key: str, cache: LocalStorage,
+                 region: str = 'us-east-1', prefix: str = '', ttl: Optional[float] = None,
+                 quota_bytes: Optional[int] = None, gc_interval: float = 300,
+                 http_client: Optional[HttpClient] = None, timeout: float = 30,
+                 on_fetch: Optional[Callable[[str], None]] = None):
+        self.endpoint_url = endpoint_url.rstrip('/')
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.cache = cache
+        self.region = region
+        self.prefix = prefix
+        self.ttl = ttl
+        self.quota_bytes = quota_bytes
+        self.gc_interval = gc_interval
+        self.http_client = http_client or default_client()
+        self.timeout = timeout
+        self.on_fetch = on_fetch
+        self.collected = 0
+        self._last_collect = 0.0
+        self._lock = threading.Lock()
+
+    def _request(self, method: str, key: str = '', query: Optional[Dict[str, str]] = None, data: bytes = b'',
+                 expected=(200,)):
+        path = quote(f'/{self.bucket}/{key}' if key else f'/{self.bucket}', safe='/-_.~')
+        url = self.endpoint_url + path
+        if query:
+            url += '?' + '&'.join(f'{quote(name, safe="-_.~")}={quote(value, safe="-_.~")}'
+                                  for name, value in sorted(query.items()))
+        headers = sigv4_headers(method, url, hashlib.sha256(data).hexdigest(), self.access_key, self.secret_key,
+                                self.region, datetime.datetime.now(datetime.timezone.utc))
+        try:
+            response = self.http_client.request(method, url, headers=headers, data=data or None,
+                                                timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise StorageError(f'{method} {path} failed: {str(e)}') from e
+        if response.status_code not in expected:
+            raise StorageError(f'{method} {path} returned {response.status_code}')
+        return response
+
+    def path(self, name: str) -> str:
+        return self.cache.path(name)
+
+    def local_path(self, name: str) -> Optional[str]:
+        path = self.cache.local_path(name)
+        if path is not None:
+            return path
+        try:
+            response = self._request('GET', self.prefix + check_name(name), expected=(200, 404))
+        except ValueError:
+            return None
+        if response.status_code == 404:
+            return None
+
+        path = self.cache.save(name, response.content)
+        if self.on_fetch is not None:
+            self.on_fetch(path)
+        return path
+
+    def commit(self, name: str):
+        with open(self.cache.path(name), 'rb') as f:
+            self._request('PUT', self.prefix + check_name(name), data=f.read())
+        self.cache.commit(name)
+        if self._claim_collection():
+            try:
+                self.collect()
+            except (StorageError, ElementTree.ParseError) as e:
+                # The object is stored; collection is retried after the next interval
+                print(f"Error collecting storage: {str(e)}")
+
+    def _claim_collection(self) -> bool:
+        """Whether this commit should collect: at most once per gc_interval, however many commits run at once"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_collect < self.gc_interval:
+                return False
+            self._last_collect = now
+            return True
+
+    def delete(self, name: str):
+        self._request('DELETE', self.prefix + check_name(name), expected=(200, 204, 404))
+        self.cache.delete(name)
+
+    def _list(self) -> List[Tuple[float, int, str]]:
+        """(last modified, size, key) of every object under the prefix"""
+        namespace = {'s3': 'http://s3.amazonaws.com/doc/2006-03-01/'}
+        objects = []
+        token = None
+        while True:
+            query = {'list-type': '2', 'prefix': self.prefix}
+            if token:
+                query['continuation-token'] = token
+            root = ElementTree.fromstring(self._request('GET', query=query).content)
+            for item in root.findall('s3:Contents', namespace):
+                modified = datetime.datetime.fromisoformat(item.findtext('s3:LastModified', '', namespace)
+                                                           .replace('Z', '+00:00'))
+                objects.append((modified.timestamp(), int(item.findtext('s3:Size', '0', namespace)),
+                                item.findtext('s3:Key', '', namespace)))
+            token = root.findtext('s3:NextContinuationToken', None, namespace)
+            if root.findtext('s3:IsTruncated', 'false', namespace) != 'true' or not token:
+                return objects
+
+    def collect(self, now: Optional[float] = None) -> int:
+        """Expire and evict objects in the bucket, then in the local cache"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_collect = now
+        removed = 0
+        usage = 0
+        kept = []
+
+        for modified, size, key in self._list():
+            if self.ttl is not None and now - modified > self.ttl:
+                self._request('DELETE', key, expected=(200, 204, 404))
+                removed += 1
+            else:
+                usage += size
+                kept.append((modified, size, key))
+
+        if self.quota_bytes is not None:
+            for modified, size, key in sorted(kept):
+                if usage <= self.quota_bytes:
+                    break
+                self._request('DELETE', key, expected=(200, 204, 404))
+                removed += 1
+                usage -= size
+
+        with self._lock:
+            self.collected += removed
+        self.cache.collect(now)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'quota_bytes': self.quota_bytes, 'collected': self.collected, 'cache': self.cache.stats()}
@@ -0,0 +1,97 @@
+import re
+from typing import Dict, Optional
+
+
+class ThemeApplier:
+    """
+    Re-skin generated portfolios without another LLM call.
+    Portfolios reference their colours through CSS custom properties declared
+    in a single :root block, so switching theme only rewrites that block.
+    """
+
+    THEME_VARIABLES = ('primary', 'secondary', 'accent', 'background', 'text')
+
+    ROOT_PATTERN = re.compile(r':root\s*\{(?P<body>[^{}]*)\}')
+    STYLE_PATTERN = re.compile(r'(<style[^>]*>)(.*?)(</style>)', re.IGNORECASE | re.DOTALL)
+    HEX_COLOR_PATTERN = re.compile(r'#[0-9A-Fa-f]{6}\b|#[0-9A-Fa-f]{3}\b')
+    DECLARATION_PATTERN = re.compile(r'(?P<property>[\w-]+)(?P<colon>\s*:\s*)(?P<value>[^;{}]*)')
+
+    # Which variable a colour shared by several (primary and text are often equal) stands for, by CSS property
+    PROPERTY_VARIABLES = {'color': 'text', 'background': 'background', 'background-color': 'background'}
+
+    @classmethod
+    def _root_declarations(cls, color_theme: Dict[str, str]) -> str:
+        return ''.join(f'--{name}: {color_theme[name]}; ' for name in cls.THEME_VARIABLES).strip()
+
+    @classmethod
+    def templatize(cls, html_content: str, color_theme: Dict[str, str]) -> str:
+        """
+        Replace literal theme colours inside <style> blocks with var(--name)
+        references so that apply() can later swap them through :root alone.
+        A colour two variables share is matched by property: color is text,
+        background is background, anything else the first non-text variable.
+        """
+        colors = {}
+        for name in cls.THEME_VARIABLES:
+            colors.setdefault(color_theme[name].lower(), []).append(name)
+
+        def variable_for(color: str, css_property: str) -> Optional[str]:
+            names = colors.get(color.lower())
+            if not names:
+                return None
+            preferred = cls.PROPERTY_VARIABLES.get(css_property.lower())
+            if preferred in names:
+                return preferred
+            # Elsewhere (borders, gradients, ...) a shared colour is the brand colour, not the text
+            return next((name for name in names if name != 'text'), names[0])
+
+        def replace_declaration(match):
+            def replace_color(color_match):
+                name = variable_for(color_match.group(0), match.group('property'))
+                return f'var(--{name})' if name else color_match.group(0)
+
+            value = cls.HEX_COLOR_PATTERN.sub(replace_color, match.group('value'))
+            return match.group('property') + match.group('colon') + value
+
+        def replace_colors(css: str) -> str:
+            return cls.DECLARATION_PATTERN.sub(replace_declaration, css)
+
+        def replace_style(match):
+            css = match.group(2)
+            root = cls.ROOT_PATTERN.search(css)
+            if root is None:
+                css = replace_colors(css)
+            else:
+                # Leave the :root declarations themselves untouched
+                css = replace_colors(css[:root.start()]) + root.group(0) + replace_colors(css[root.end():])
+            return match.group(1) + css + match.group(3)
+
+        html_content = cls.STYLE_PATTERN.sub(replace_style, html_content)
+        return cls.apply(html_content, color_theme)
+
+    @classmethod
+    def apply(cls, html_content: str, color_theme: Dict[str, str]) -> str:
+        """Set the theme's colours on the :root custom properties of a portfolio"""
+        match = cls.ROOT_PATTERN.search(html_content)
+
+        if match is None:
+            root_block = f'<style>:root {{{cls._root_declarations(color_theme)}}}</style>'
+            if '</head>' in html_content:
+                return html_content.replace('</head>', root_block + '</head>', 1)
+            return root_block + html_content
+
+        body = match.group('body')
+        for name in cls.THEME_VARIABLES:
+            declaration = re.compile(rf'--{name}\s*:\s*[^;{{}}]*')
+            if declaration.search(body):
+                body = declaration.sub(f'--{name}: {color_theme[name]}', body, count=1)
+            else:
+                body = body.rstrip().rstrip(';')
+                body = f'{body}; --{name}: {color_theme[name]}' if body.strip() else f'--{name}: {color_theme[name]}'
+
+        return html_content[:match.start('body')] + body + html_content[match.end('body'):]
+
+    @classmethod
+    def render_variants(cls, html_content: str, themes: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+        """Render one copy of the portfolio per theme"""
+        return {name: cls.apply(html_content, colors) for name, colors in themes.items()}